@@ -6,20 +6,32 @@ bilibili_api
 
 import asyncio
 import platform
+import importlib
+from typing import TYPE_CHECKING
 
 from .utils.sync import sync
 from .utils.credential_refresh import Credential
-from .utils.picture import Picture
-from .utils.short import get_real_url
-from .utils.parse_link import ResourceType, parse_link
+from .utils.credential_pool import PoolPolicy, CredentialPool
 from .utils.aid_bvid_transformer import aid2bvid, bvid2aid
-from .utils.danmaku import DmMode, Danmaku, DmFontSize, SpecialDanmaku
+from .utils.danmaku import DmMode, Danmaku, DmFontSize, DanmakuBatch, SpecialDanmaku
+from .utils.response_cache import ResponseCache, get_response_cache
+from .utils.rate_limit import RateLimiter, get_rate_limiter
+from .utils.batch import BatchResult, gather_apis
+from .utils.proxy_pool import ProxyPool, get_proxy_pool
+from .utils.instrumentation import (
+    RequestEvent,
+    RequestMetrics,
+    add_request_hook,
+    get_request_metrics,
+    remove_request_hook,
+)
 from .utils.network import (
     HEADERS,
     get_session,
     set_session,
     get_aiohttp_session,
     set_aiohttp_session,
+    get_pool_stats,
     get_httpx_sync_session,
     set_httpx_sync_session
 )
@@ -31,6 +43,7 @@ from .errors import (
     NetworkException,
     ResponseException,
     VideoUploadException,
+    CircuitOpenException,
     ResponseCodeException,
     DanmakuClosedException,
     CredentialNoBuvid3Exception,
@@ -39,50 +52,123 @@ from .errors import (
     CredentialNoSessdataException,
     CredentialNoDedeUserIDException,
 )
-from . import (
-    app,
-    ass,
-    hot,
-    game,
-    live,
-    note,
-    rank,
-    show,
-    user,
-    vote,
-    audio,
-    emoji,
-    login,
-    manga,
-    music,
-    topic,
-    video,
-    cheese,
-    client,
-    search,
-    article,
-    bangumi,
-    comment,
-    dynamic,
-    session,
-    festival,
-    homepage,
-    settings,
-    watchroom,
-    live_area,
-    video_tag,
-    black_room,
-    login_func,
-    video_zone,
-    favorite_list,
-    channel_series,
-    video_uploader,
-    creative_center,
-    article_category,
-    interactive_video,
-    audio_uploader,
+
+# 子模块与依赖较重的对象（PIL、bs4、apscheduler 等）在首次访问时才导入 (PEP 562)
+_LAZY_SUBMODULES = (
+    "app",
+    "ass",
+    "hot",
+    "game",
+    "live",
+    "note",
+    "rank",
+    "show",
+    "user",
+    "vote",
+    "audio",
+    "emoji",
+    "login",
+    "manga",
+    "music",
+    "topic",
+    "video",
+    "cheese",
+    "client",
+    "search",
+    "article",
+    "bangumi",
+    "comment",
+    "dynamic",
+    "session",
+    "festival",
+    "homepage",
+    "settings",
+    "watchroom",
+    "live_area",
+    "video_tag",
+    "black_room",
+    "login_func",
+    "video_zone",
+    "favorite_list",
+    "channel_series",
+    "video_uploader",
+    "creative_center",
+    "article_category",
+    "interactive_video",
+    "audio_uploader",
 )
 
+_LAZY_ATTRIBUTES = {
+    "Picture": ".utils.picture",
+    "get_real_url": ".utils.short",
+    "ResourceType": ".utils.parse_link",
+    "parse_link": ".utils.parse_link",
+}
+
+if TYPE_CHECKING:
+    from .utils.picture import Picture
+    from .utils.short import get_real_url
+    from .utils.parse_link import ResourceType, parse_link
+    from . import (
+        app,
+        ass,
+        hot,
+        game,
+        live,
+        note,
+        rank,
+        show,
+        user,
+        vote,
+        audio,
+        emoji,
+        login,
+        manga,
+        music,
+        topic,
+        video,
+        cheese,
+        client,
+        search,
+        article,
+        bangumi,
+        comment,
+        dynamic,
+        session,
+        festival,
+        homepage,
+        settings,
+        watchroom,
+        live_area,
+        video_tag,
+        black_room,
+        login_func,
+        video_zone,
+        favorite_list,
+        channel_series,
+        video_uploader,
+        creative_center,
+        article_category,
+        interactive_video,
+        audio_uploader,
+    )
+
+
+def __getattr__(name: str):
+    if name in _LAZY_SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
 BILIBILI_API_VERSION = "16.2.0"
 
 # 如果系统为 Windows，则修改默认策略，以解决代理报错问题
@@ -93,12 +179,16 @@ __all__ = [
     "ApiException",
     "ArgsException",
     "BILIBILI_API_VERSION",
+    "BatchResult",
+    "CircuitOpenException",
     "Credential",
     "CredentialNoBiliJctException",
     "CredentialNoBuvid3Exception",
     "CredentialNoDedeUserIDException",
     "CredentialNoSessdataException",
+    "CredentialPool",
     "Danmaku",
+    "DanmakuBatch",
     "DanmakuClosedException",
     "DmFontSize",
     "DmMode",
@@ -108,11 +198,18 @@ __all__ = [
     "LoginError",
     "NetworkException",
     "Picture",
+    "PoolPolicy",
+    "ProxyPool",
+    "RateLimiter",
+    "RequestEvent",
+    "RequestMetrics",
     "ResourceType",
     "ResponseCodeException",
+    "ResponseCache",
     "ResponseException",
     "SpecialDanmaku",
     "VideoUploadException",
+    "add_request_hook",
     "aid2bvid",
     "app",
     "article",
@@ -133,8 +230,14 @@ __all__ = [
     "favorite_list",
     "festival",
     "game",
+    "gather_apis",
     "get_aiohttp_session",
+    "get_pool_stats",
+    "get_proxy_pool",
+    "get_rate_limiter",
     "get_real_url",
+    "get_request_metrics",
+    "get_response_cache",
     "get_session",
     "homepage",
     "hot",
@@ -148,6 +251,7 @@ __all__ = [
     "note",
     "parse_link",
     "rank",
+    "remove_request_hook",
     "search",
     "session",
     "set_aiohttp_session",
@@ -1,5 +1,8 @@
 from typing import List, Tuple
 
-from PyInstaller.utils.hooks import collect_data_files
+from PyInstaller.utils.hooks import collect_data_files, collect_submodules
 
 datas: List[Tuple[str, str]] = collect_data_files("bilibili_api")
+
+# bilibili_api/__init__.py 通过 __getattr__ 延迟导入子模块，PyInstaller 无法静态分析到
+hiddenimports: List[str] = collect_submodules("bilibili_api")
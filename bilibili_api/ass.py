@@ -3,9 +3,15 @@ bilibili_api.ass
 
 有关 ASS 文件的操作
 """
+import io
 import os
+import re
+import time
+import asyncio
 from tempfile import gettempdir
-from typing import Union, Optional
+from dataclasses import dataclass
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Tuple, Union, TextIO, Iterable, Optional
 
 from .video import Video
 from .bangumi import Episode
@@ -13,7 +19,8 @@ from .cheese import CheeseVideo
 from .utils.srt2ass import srt2ass
 from .utils.json2srt import json2srt
 from .utils.credential import Credential
-from .utils.danmaku2ass import Danmaku2ASS
+from .utils.danmaku import Danmaku, DanmakuBatch
+from .utils.danmaku2ass import Danmaku2ASS, ProcessComments, CalculateLength
 from .utils.network import get_session
 from .exceptions.ArgsException import ArgsException
 
@@ -34,14 +41,14 @@ def export_ass_from_xml(
     一定看清楚 Arguments!
 
     Args:
-        file_local   (str)       : 文件输入
-        output_local (str)       : 文件输出
-        stage_size   (tuple(int)): 视频大小
-        font_name    (str)       : 字体
-        font_size    (float)     : 字体大小
-        alpha        (float)     : 透明度(0-1)
-        fly_time     (float)     : 滚动弹幕持续时间
-        static_time  (float)     : 静态弹幕持续时间
+        file_local   (str | List[TextIO]): 文件输入，也可以传入文本流列表
+        output_local (str | TextIO)      : 文件输出，也可以传入可写入文本的流
+        stage_size   (tuple(int))        : 视频大小
+        font_name    (str)               : 字体
+        font_size    (float)             : 字体大小
+        alpha        (float)             : 透明度(0-1)
+        fly_time     (float)             : 滚动弹幕持续时间
+        static_time  (float)             : 静态弹幕持续时间
     """
     Danmaku2ASS(
         input_files=file_local,
@@ -58,6 +65,280 @@ def export_ass_from_xml(
     )
 
 
+# danmaku2ass 中 Bilibili 弹幕类型到内部类型的映射
+_DANMAKU2ASS_MODES = {1: 0, 4: 2, 5: 1, 6: 3}
+
+# 与 danmaku2ass.FilterBadChars 一致，XML 中不允许出现的控制字符
+_BAD_CHARS = re.compile("[\\x00-\\x08\\x0b\\x0c\\x0e-\\x1f]")
+
+
+def _danmakus_to_comments(
+    danmakus: Union[Iterable[Danmaku], DanmakuBatch], font_size: float
+) -> List[tuple]:
+    """
+    将弹幕转换为 danmaku2ass 的评论元组，结果与先写出 XML 再用 ReadCommentsBilibili 解析一致。
+    """
+    if isinstance(danmakus, DanmakuBatch):
+        columns = zip(
+            danmakus.dm_time,
+            danmakus.send_time,
+            danmakus.mode,
+            danmakus.font_size,
+            danmakus.color,
+            danmakus.text,
+        )
+    else:
+        columns = (
+            (
+                dm.dm_time,
+                dm.send_time,
+                dm.mode,
+                dm.font_size,
+                int(dm.color, 16),
+                dm.text,
+            )
+            for dm in danmakus
+        )
+    comments = []
+    for i, (dm_time, send_time, mode, size, color, text) in enumerate(columns):
+        # 空弹幕在 XML 中没有文本节点，会被 danmaku2ass 忽略
+        if not text:
+            continue
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        text = _BAD_CHARS.sub("\ufffd", text)
+        if mode in _DANMAKU2ASS_MODES:
+            text = text.replace("/n", "\n")
+            size = size * font_size / 25.0
+            comments.append(
+                (
+                    float(dm_time),
+                    int(send_time),
+                    i,
+                    text,
+                    _DANMAKU2ASS_MODES[mode],
+                    color,
+                    size,
+                    (text.count("\n") + 1) * size,
+                    CalculateLength(text) * size,
+                )
+            )
+        elif mode == 7:
+            comments.append(
+                (float(dm_time), int(send_time), i, text, "bilipos", color, size, 0, 0)
+            )
+    comments.sort()
+    return comments
+
+
+def export_ass_from_danmakus(
+    danmakus: Union[List[Danmaku], DanmakuBatch],
+    output: Union[str, TextIO],
+    stage_size,
+    font_name: str = "Simsun",
+    font_size: float = 25.0,
+    alpha: float = 1,
+    fly_time: float = 7,
+    static_time: float = 5,
+    reserve_blank: int = 0,
+) -> None:
+    """
+    直接以弹幕对象创建 ASS，不经过临时 XML 文件。
+
+    Args:
+        danmakus      (List[Danmaku] | DanmakuBatch): 弹幕列表或列式弹幕集合
+
+        output        (str | TextIO)                : 输出文件路径，或任意可写入文本的流（如 io.StringIO）
+
+        stage_size    (tuple(int))                  : 视频大小
+
+        font_name     (str, optional)               : 字体. Defaults to "Simsun".
+
+        font_size     (float, optional)             : 字体大小. Defaults to 25.0.
+
+        alpha         (float, optional)             : 透明度(0-1). Defaults to 1.
+
+        fly_time      (float, optional)             : 滚动弹幕持续时间. Defaults to 7.
+
+        static_time   (float, optional)             : 静态弹幕持续时间. Defaults to 5.
+
+        reserve_blank (int, optional)               : 底部保留的空白高度. Defaults to 0.
+    """
+    comments = _danmakus_to_comments(danmakus, font_size)
+    if isinstance(output, str):
+        stream = open(
+            output, "w", encoding="utf-8-sig", errors="replace", newline="\r\n"
+        )
+    else:
+        stream = output
+    try:
+        ProcessComments(
+            comments,
+            stream,
+            stage_size[0],
+            stage_size[1],
+            reserve_blank,
+            font_name,
+            font_size,
+            alpha,
+            fly_time,
+            static_time,
+            [],
+            False,
+            None,
+        )
+    finally:
+        if stream is not output:
+            stream.close()
+
+
+@dataclass
+class AssJob:
+    """
+    批量渲染 ASS 的单个任务，会被发送到子进程中执行，因此所有字段都需要能被 pickle。
+
+    danmakus (List[Danmaku] | DanmakuBatch | None): 弹幕列表或列式弹幕集合，与 xml 二选一
+
+    xml (str | None): XML 格式的弹幕内容（不是文件路径），与 danmakus 二选一
+
+    out (str | None): 输出文件路径，为 None 时渲染结果保存在 AssJobResult.content 中
+
+    stage_size (Tuple[int, int]): 视频大小
+
+    font_name (str): 字体
+
+    font_size (float): 字体大小
+
+    alpha (float): 透明度(0-1)
+
+    fly_time (float): 滚动弹幕持续时间
+
+    static_time (float): 静态弹幕持续时间
+    """
+
+    danmakus: Union[List[Danmaku], DanmakuBatch, None] = None
+    xml: Optional[str] = None
+    out: Optional[str] = None
+    stage_size: Tuple[int, int] = (1440, 1080)
+    font_name: str = "Simsun"
+    font_size: float = 25.0
+    alpha: float = 1
+    fly_time: float = 7
+    static_time: float = 5
+
+
+@dataclass
+class AssJobResult:
+    """
+    批量渲染 ASS 的单个任务结果
+
+    index (int): 任务在传入列表中的索引
+
+    job (AssJob): 对应的任务
+
+    elapsed (float): 耗时（秒）。成功时为子进程中渲染的耗时，失败时为从提交到失败的耗时
+
+    content (str | None): 渲染结果，仅在 job.out 为 None 且成功时存在
+
+    exception (BaseException | None): 失败时的异常
+    """
+
+    index: int
+    job: AssJob
+    elapsed: float
+    content: Optional[str] = None
+    exception: Optional[BaseException] = None
+
+    @property
+    def success(self) -> bool:
+        """
+        任务是否成功
+        """
+        return self.exception is None
+
+
+def _render_job(job: AssJob) -> Tuple[float, Optional[str]]:
+    """
+    在子进程中渲染单个任务，返回耗时和渲染结果。
+    """
+    start = time.perf_counter()
+    output = job.out if job.out is not None else io.StringIO()
+    if job.danmakus is not None:
+        export_ass_from_danmakus(
+            job.danmakus,
+            output,
+            job.stage_size,
+            job.font_name,
+            job.font_size,
+            job.alpha,
+            job.fly_time,
+            job.static_time,
+        )
+    elif job.xml is not None:
+        export_ass_from_xml(
+            [io.StringIO(job.xml)],
+            output,
+            job.stage_size,
+            job.font_name,
+            job.font_size,
+            job.alpha,
+            job.fly_time,
+            job.static_time,
+        )
+    else:
+        raise ArgsException("danmakus 和 xml 至少提供一个。")
+    content = output.getvalue() if job.out is None else None
+    return time.perf_counter() - start, content
+
+
+async def render_many(
+    jobs: Iterable[AssJob],
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> List[AssJobResult]:
+    """
+    使用进程池批量渲染 ASS，不会阻塞事件循环。
+
+    单个任务失败不会影响其它任务，异常会记录在对应的 AssJobResult.exception 中。
+
+    Args:
+        jobs     (Iterable[AssJob])         : 任务列表
+
+        workers  (int | None, optional)     : 进程数，为 None 时使用 CPU 核心数. Defaults to None.
+
+        executor (Executor | None, optional): 自定义执行器，传入后忽略 workers，且不会被关闭. Defaults to None.
+
+    Returns:
+        List[AssJobResult]: 与 jobs 顺序一致的结果列表
+    """
+    jobs = list(jobs)
+    if workers is not None and workers < 1:
+        raise ArgsException("workers 必须大于 0。")
+    if not jobs:
+        return []
+    loop = asyncio.get_running_loop()
+    pool = executor
+    if pool is None:
+        max_workers = min(workers or os.cpu_count() or 1, len(jobs))
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+
+    async def run(index: int, job: AssJob) -> AssJobResult:
+        start = time.perf_counter()
+        try:
+            elapsed, content = await loop.run_in_executor(pool, _render_job, job)
+        except Exception as e:
+            return AssJobResult(index, job, time.perf_counter() - start, exception=e)
+        return AssJobResult(index, job, elapsed, content=content)
+
+    try:
+        return list(
+            await asyncio.gather(*(run(i, job) for i, job in enumerate(jobs)))
+        )
+    finally:
+        if executor is None:
+            # 关闭进程池时需要等待子进程退出，放到线程中避免阻塞事件循环
+            await loop.run_in_executor(None, pool.shutdown)
+
+
 def export_ass_from_srt(file_local, output_local) -> None:
     """
     转换 srt 至 ass
@@ -214,13 +495,8 @@ async def make_ass_file_danmakus_protobuf(
         danmakus = await obj.get_danmakus()
     else:
         raise ValueError("请传入 Video/Episode/CheeseVideo 类！")
-    with open(gettempdir() + "/danmaku_temp.xml", "w+", encoding="utf-8") as file:
-        file.write("<i>")
-        for d in danmakus:
-            file.write(d.to_xml())
-        file.write("</i>")
-    export_ass_from_xml(
-        gettempdir() + "/danmaku_temp.xml",
+    export_ass_from_danmakus(
+        danmakus,
         out,
         stage_size,
         font_name,
@@ -295,10 +571,9 @@ async def make_ass_file_danmakus_xml(
         xml_content = await obj.get_danmaku_xml()
     else:
         raise ValueError("请传入 Video/Episode/CheeseVideo 类！")
-    with open(gettempdir() + "/danmaku_temp.xml", "w+", encoding="utf-8") as file:
-        file.write(xml_content)
+    # 直接从内存读取，避免多个任务同时写同一个临时文件
     export_ass_from_xml(
-        gettempdir() + "/danmaku_temp.xml",
+        [io.StringIO(xml_content)],
         out,
         stage_size,
         font_name,
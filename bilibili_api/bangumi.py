@@ -12,7 +12,7 @@ bilibili_api.bangumi
 
 import datetime
 from enum import Enum
-from typing import Any, List, Tuple, Union, Optional
+from typing import Any, List, Tuple, Union, Optional, AsyncGenerator
 
 from bilibili_api.utils.danmaku import Danmaku
 
@@ -1450,18 +1450,44 @@ class Episode(Video):
         return await self.video_class.get_danmaku_view(0)
 
     async def get_danmakus(
-        self, date: Union[datetime.date, None] = None
+        self, date: Union[datetime.date, None] = None, concurrency: int = 1
     ) -> List["Danmaku"]:
         """
         获取弹幕
 
         Args:
-            date (datetime.date | None, optional): 指定某一天查询弹幕. Defaults to None. (不指定某一天)
+            date        (datetime.date | None, optional): 指定某一天查询弹幕. Defaults to None. (不指定某一天)
+
+            concurrency (int, optional)                 : 同时获取的最大段数，结果仍按段的顺序排列. Defaults to 1.
 
         Returns:
             dict[Danmaku]: 弹幕列表
         """
-        return await self.video_class.get_danmakus(0, date)
+        return await self.video_class.get_danmakus(0, date, concurrency=concurrency)
+
+    async def iter_danmakus(
+        self,
+        date: Union[datetime.date, None] = None,
+        concurrency: int = 1,
+        batch: bool = False,
+    ) -> AsyncGenerator[Union["Danmaku", List["Danmaku"]], None]:
+        """
+        逐段获取弹幕
+
+        Args:
+            date        (datetime.date | None, optional): 指定某一天查询弹幕. Defaults to None. (不指定某一天)
+
+            concurrency (int, optional)                 : 同时获取的最大段数，结果仍按段的顺序产出. Defaults to 1.
+
+            batch       (bool, optional)                : 是否按段产出弹幕列表，否则逐条产出弹幕. Defaults to False.
+
+        Returns:
+            AsyncGenerator[Danmaku | List[Danmaku], None]: 弹幕或每段的弹幕列表
+        """
+        async for item in self.video_class.iter_danmakus(
+            0, date, concurrency=concurrency, batch=batch
+        ):
+            yield item
 
     async def get_history_danmaku_index(
         self, date: Union[datetime.date, None] = None
@@ -20,7 +20,7 @@ from . import settings
 from .utils.utils import get_api
 from .utils.danmaku import Danmaku
 from .utils.credential import Credential
-from .utils.BytesReader import BytesReader
+from .utils.danmaku_protobuf import decode_danmaku_view, iter_danmaku_segments
 from .exceptions.ArgsException import ArgsException
 from .utils.network import Api, get_session
 from .exceptions import NetworkException, ResponseException, DanmakuClosedException
@@ -266,190 +266,18 @@ class CheeseVideo:
         except Exception as e:
             raise NetworkException(-1, str(e))
 
-        resp_data = resp.read()
-        json_data = {}
-        reader = BytesReader(resp_data)
-        # 解析二进制数据流
-
-        def read_dm_seg(stream: bytes):
-            reader_ = BytesReader(stream)
-            data = {}
-            while not reader_.has_end():
-                t = reader_.varint() >> 3
-                if t == 1:
-                    data["page_size"] = reader_.varint()
-                elif t == 2:
-                    data["total"] = reader_.varint()
-                else:
-                    continue
-            return data
-
-        def read_flag(stream: bytes):
-            reader_ = BytesReader(stream)
-            data = {}
-            while not reader_.has_end():
-                t = reader_.varint() >> 3
-                if t == 1:
-                    data["rec_flag"] = reader_.varint()
-                elif t == 2:
-                    data["rec_text"] = reader_.string()
-                elif t == 3:
-                    data["rec_switch"] = reader_.varint()
-                else:
-                    continue
-            return data
-
-        def read_command_danmakus(stream: bytes):
-            reader_ = BytesReader(stream)
-            data = {}
-            while not reader_.has_end():
-                t = reader_.varint() >> 3
-                if t == 1:
-                    data["id"] = reader_.varint()
-                elif t == 2:
-                    data["oid"] = reader_.varint()
-                elif t == 3:
-                    data["mid"] = reader_.varint()
-                elif t == 4:
-                    data["commend"] = reader_.string()
-                elif t == 5:
-                    data["content"] = reader_.string()
-                elif t == 6:
-                    data["progress"] = reader_.varint()
-                elif t == 7:
-                    data["ctime"] = reader_.string()
-                elif t == 8:
-                    data["mtime"] = reader_.string()
-                elif t == 9:
-                    data["extra"] = json.loads(reader_.string())
-
-                elif t == 10:
-                    data["id_str"] = reader_.string()
-                else:
-                    continue
-            return data
-
-        def read_settings(stream: bytes):
-            reader_ = BytesReader(stream)
-            data = {}
-            while not reader_.has_end():
-                t = reader_.varint() >> 3
-
-                if t == 1:
-                    data["dm_switch"] = reader_.bool()
-                elif t == 2:
-                    data["ai_switch"] = reader_.bool()
-                elif t == 3:
-                    data["ai_level"] = reader_.varint()
-                elif t == 4:
-                    data["enable_top"] = reader_.bool()
-                elif t == 5:
-                    data["enable_scroll"] = reader_.bool()
-                elif t == 6:
-                    data["enable_bottom"] = reader_.bool()
-                elif t == 7:
-                    data["enable_color"] = reader_.bool()
-                elif t == 8:
-                    data["enable_special"] = reader_.bool()
-                elif t == 9:
-                    data["prevent_shade"] = reader_.bool()
-                elif t == 10:
-                    data["dmask"] = reader_.bool()
-                elif t == 11:
-                    data["opacity"] = reader_.float(True)
-                elif t == 12:
-                    data["dm_area"] = reader_.varint()
-                elif t == 13:
-                    data["speed_plus"] = reader_.float(True)
-                elif t == 14:
-                    data["font_size"] = reader_.float(True)
-                elif t == 15:
-                    data["screen_sync"] = reader_.bool()
-                elif t == 16:
-                    data["speed_sync"] = reader_.bool()
-                elif t == 17:
-                    data["font_family"] = reader_.string()
-                elif t == 18:
-                    data["bold"] = reader_.bool()
-                elif t == 19:
-                    data["font_border"] = reader_.varint()
-                elif t == 20:
-                    data["draw_type"] = reader_.string()
-                else:
-                    continue
-            return data
-
-        def read_image_danmakus(string: bytes):
-            image_list = []
-            reader_ = BytesReader(string)
-            while not reader_.has_end():
-                type_ = reader_.varint() >> 3
-                if type_ == 1:
-                    details_dict = {}
-                    details_dict["texts"] = []
-                    img_details = reader_.bytes_string()
-                    reader_details = BytesReader(img_details)
-                    while not reader_details.has_end():
-                        type_details = reader_details.varint() >> 3
-                        if type_details == 1:
-                            details_dict["texts"].append(reader_details.string())
-                        elif type_details == 2:
-                            details_dict["image"] = reader_details.string()
-                        elif type_details == 3:
-                            id_string = reader_details.bytes_string()
-                            id_reader = BytesReader(id_string)
-                            while not id_reader.has_end():
-                                type_id = id_reader.varint() >> 3
-                                if type_id == 2:
-                                    details_dict["id"] = id_reader.varint()
-                                else:
-                                    raise ResponseException("解析响应数据错误")
-                    image_list.append(details_dict)
-                else:
-                    raise ResponseException("解析响应数据错误")
-            return image_list
-
-        while not reader.has_end():
-            type_ = reader.varint() >> 3
-
-            if type_ == 1:
-                json_data["state"] = reader.varint()
-            elif type_ == 2:
-                json_data["text"] = reader.string()
-            elif type_ == 3:
-                json_data["text_side"] = reader.string()
-            elif type_ == 4:
-                json_data["dm_seg"] = read_dm_seg(reader.bytes_string())
-            elif type_ == 5:
-                json_data["flag"] = read_flag(reader.bytes_string())
-            elif type_ == 6:
-                if "special_dms" not in json_data:
-                    json_data["special_dms"] = []
-                json_data["special_dms"].append(reader.string())
-            elif type_ == 7:
-                json_data["check_box"] = reader.bool()
-            elif type_ == 8:
-                json_data["count"] = reader.varint()
-            elif type_ == 9:
-                if "command_dms" not in json_data:
-                    json_data["command_dms"] = []
-                json_data["command_dms"].append(
-                    read_command_danmakus(reader.bytes_string())
-                )
-            elif type_ == 10:
-                json_data["dm_setting"] = read_settings(reader.bytes_string())
-            elif type_ == 12:
-                json_data["image_dms"] = read_image_danmakus(reader.bytes_string())
-            else:
-                continue
-        return json_data
+        return decode_danmaku_view(resp.read())
 
-    async def get_danmakus(self, date: Union[datetime.date, None] = None):
+    async def get_danmakus(
+        self, date: Union[datetime.date, None] = None, concurrency: int = 1
+    ):
         """
         获取弹幕。
 
         Args:
-            date (datetime.Date | None, optional): 指定日期后为获取历史弹幕，精确到年月日。Defaults to None.
+            date        (datetime.Date | None, optional): 指定日期后为获取历史弹幕，精确到年月日。Defaults to None.
+
+            concurrency (int, optional)                 : 同时获取的最大段数，结果仍按段的顺序排列. Defaults to 1.
 
         Returns:
             List[Danmaku]: Danmaku 类的列表。
@@ -459,7 +287,6 @@ class CheeseVideo:
 
         # self.credential.raise_for_no_sessdata()
 
-        session = get_session()
         aid = self.get_aid()
         params: dict[str, Any] = {"oid": self.get_cid(), "type": 1, "pid": aid}
         if date is not None:
@@ -467,109 +294,18 @@ class CheeseVideo:
             api = API_video["danmaku"]["get_history_danmaku"]
             params["date"] = date.strftime("%Y-%m-%d")
             params["type"] = 1
-            all_seg = 1
+            # 仅当获取当前弹幕时需要 segment_index 参数
+            segments = [None]
         else:
             api = API_video["danmaku"]["get_danmaku"]
             view = await self.get_danmaku_view()
-            all_seg = view["dm_seg"]["total"]
+            segments = range(view["dm_seg"]["total"])
 
         danmakus = []
-
-        for seg in range(all_seg):
-            if date is None:
-                # 仅当获取当前弹幕时需要该参数
-                params["segment_index"] = seg + 1
-
-            config = {}
-            config["url"] = api["url"]
-            config["params"] = params
-            config["headers"] = {
-                "Referer": "https://www.bilibili.com",
-                "User-Agent": "Mozilla/5.0",
-            }
-            config["cookies"] = self.credential.get_cookies()
-
-            try:
-                req = await session.get(**config)
-            except Exception as e:
-                raise NetworkException(-1, str(e))
-
-            if "content-type" not in req.headers.keys():
-                break
-            else:
-                content_type = req.headers["content-type"]
-                if content_type != "application/octet-stream":
-                    raise ResponseException("返回数据类型错误：")
-
-            # 解析二进制流数据
-            data = req.read()
-            if data == b"\x10\x01":
-                # 视频弹幕被关闭
-                raise DanmakuClosedException()
-
-            reader = BytesReader(data)
-            while not reader.has_end():
-                type_ = reader.varint() >> 3
-                if type_ != 1:
-                    if type_ == 4:
-                        reader.bytes_string()
-                        # 什么鬼？我用 protoc 解析出乱码！
-                    elif type_ == 5:
-                        # 大会员专属颜色
-                        reader.varint()
-                        reader.varint()
-                        reader.varint()
-                        reader.bytes_string()
-                    elif type_ == 13:
-                        # ???
-                        continue
-                    else:
-                        raise ResponseException("解析响应数据错误")
-
-                dm = Danmaku("")
-                dm_pack_data = reader.bytes_string()
-                dm_reader = BytesReader(dm_pack_data)
-
-                while not dm_reader.has_end():
-                    data_type = dm_reader.varint() >> 3
-
-                    if data_type == 1:
-                        dm.id_ = dm_reader.varint()
-                    elif data_type == 2:
-                        dm.dm_time = dm_reader.varint() / 1000
-                    elif data_type == 3:
-                        dm.mode = dm_reader.varint()
-                    elif data_type == 4:
-                        dm.font_size = dm_reader.varint()
-                    elif data_type == 5:
-                        dm.color = hex(dm_reader.varint())[2:]
-                    elif data_type == 6:
-                        dm.crc32_id = dm_reader.string()
-                    elif data_type == 7:
-                        dm.text = dm_reader.string()
-                    elif data_type == 8:
-                        dm.send_time = dm_reader.varint()
-                    elif data_type == 9:
-                        dm.weight = dm_reader.varint()
-                    elif data_type == 10:
-                        dm.action = str(dm_reader.varint())
-                    elif data_type == 11:
-                        dm.pool = dm_reader.varint()
-                    elif data_type == 12:
-                        dm.id_str = dm_reader.string()
-                    elif data_type == 13:
-                        dm.attr = dm_reader.varint()
-                    elif data_type == 14:
-                        dm.uid = dm_reader.varint()
-                    elif data_type == 15:
-                        dm_reader.varint()
-                    elif data_type == 20:
-                        dm_reader.bytes_string()
-                    elif data_type == 21:
-                        dm_reader.bytes_string()
-                    else:
-                        break
-                danmakus.append(dm)
+        async for _, seg_danmakus in iter_danmaku_segments(
+            api["url"], params, segments, self.credential, concurrency
+        ):
+            danmakus.extend(seg_danmakus)
         return danmakus
 
     async def get_pbp(self):
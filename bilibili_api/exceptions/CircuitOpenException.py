@@ -0,0 +1,25 @@
+"""
+bilibili_api.exceptions.CircuitOpenException
+
+熔断错误。
+"""
+
+from .ApiException import ApiException
+
+
+class CircuitOpenException(ApiException):
+    """
+    熔断错误。主机连续请求失败，暂时不再向其发送请求。
+    """
+
+    def __init__(self, host: str, retry_after: float):
+        """
+
+        Args:
+            host (str):           主机。
+
+            retry_after (float):  距离恢复尝试的秒数。
+        """
+        super().__init__(f"{host} 连续请求失败，已熔断，{retry_after:.1f} 秒后恢复尝试。")
+        self.host = host
+        self.retry_after = retry_after
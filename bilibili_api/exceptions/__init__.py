@@ -21,3 +21,4 @@ from .DynamicExceedImagesException import *
 from .CredentialNoAcTimeValueException import *
 from .StatementException import *
 from .ExClimbWuzhiException import *
+from .CircuitOpenException import *
@@ -6,6 +6,7 @@ bilibili_api.settings
 
 import logging
 from enum import Enum
+from typing import Any, Dict, List, Tuple, Union, Callable
 
 class HTTPClient(Enum):
     """
@@ -31,7 +32,7 @@ settings.http_client = settings.HTTPClient.AIOHTTP
 
 proxy: str = ""
 """
-代理设置
+代理设置，设置了 `proxy_pool` 时 Api 请求使用代理池中的代理
 
 e.x.:
 ``` python
@@ -40,24 +41,270 @@ settings.proxy = "https://www.example.com"
 ```
 """
 
+proxy_pool: List[Union[str, Tuple[str, float]]] = []
+"""
+代理池，设置后 Api 请求从中选择代理，不再使用 `proxy`
+
+每个请求按 `权重 × 成功率 / (1 + 平均延迟)` 随机选择代理，成功率与延迟根据请求结果更新，
+连接错误、超时与风控（-412 / -352）计为代理的失败。httpx 为每个代理创建单独的会话，
+aiohttp 在同一会话中按代理区分连接。可通过 `get_proxy_pool().state()` 查看各代理的状况。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.proxy_pool = ["http://10.0.0.1:8080", ("http://10.0.0.2:8080", 2.0)]
+```
+"""
+
+proxy_pool_health: Tuple[int, float] = (3, 30.0)
+"""
+代理池中的代理连续失败多少次后暂停使用，以及暂停的秒数
+"""
+
 timeout: float = 5.0
 """
 web 请求超时时间设置
 """
 
+pool_max_connections: int = 100
+"""
+每个会话的最大连接数，0 为不限制
+
+**Note: 连接池设置（pool_* / dns_cache_ttl / http2）或代理改变后，下一次获取会话时会创建新的会话，
+旧会话在 `timeout` 秒后关闭；通过 set_session 等手动设置的会话不受影响**
+"""
+
+pool_max_connections_per_host: int = 0
+"""
+每个会话对同一主机的最大连接数，0 为不限制（仅 aiohttp）
+"""
+
+pool_max_keepalive_connections: int = 20
+"""
+每个会话最多保持的空闲连接数（仅 httpx）
+"""
+
+pool_keepalive_expiry: float = 15.0
+"""
+空闲连接保持时间（秒），超过后关闭
+"""
+
+dns_cache_ttl: int = 10
+"""
+DNS 解析结果缓存时间（秒），0 为不缓存（仅 aiohttp，httpx 使用系统解析）
+"""
+
+http2: bool = False
+"""
+httpx 是否使用 HTTP/2，需要安装 h2（`pip install httpx[http2]`）
+"""
+
+pool_metrics_hook: Union[Callable[[dict], None], None] = None
+"""
+连接池使用情况回调，每次 Api 请求得到响应时以所用会话的连接池情况调用，
+参数包括 client、in_use、idle、queued、limit。也可以通过 `get_pool_stats()` 主动获取
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.pool_metrics_hook = lambda stats: print(stats)
+```
+"""
+
+json_decoder: Union[str, Callable[[bytes], Any]] = "auto"
+"""
+解码接口返回数据使用的 JSON 库，默认为 "auto"
+
+- "auto": 按 orjson、ujson、json 的顺序使用已安装的库
+- "orjson" / "ujson" / "json": 指定的库，未安装时使用 json
+- 也可以传入函数，参数为响应内容（bytes），返回解码结果
+
+解码失败时会再用标准库 json 尝试一次，以兼容 orjson 不支持的内容（如 NaN、超过 64 位的整数）。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.json_decoder = "json"
+```
+"""
+
 geetest_auto_open: bool = True
 """
 是否自动打开 geetest 验证窗口
 """
 
+sync_background_loop: bool = False
+"""
+是否在后台事件循环中执行同步调用，默认关闭
+
+开启后，`sync()` 与各 `*_sync` 方法（如 `Api.request_sync`、`Api.result_sync`）会提交到同一个在守护线程中运行的事件循环，
+并在当前线程等待结果。所有同步调用共用这个事件循环的会话（连接池），可以在多个线程中同时调用。
+
+**Note: 开启后传入 `sync()` 的协程在后台线程中运行，不能依赖调用线程的事件循环（例如之前在调用线程中创建的 aiohttp 对象）**
+
+e.x.:
+``` python
+from concurrent.futures import ThreadPoolExecutor
+from bilibili_api import settings, sync, video
+
+settings.sync_background_loop = True
+with ThreadPoolExecutor(8) as pool:
+    infos = list(pool.map(lambda bvid: sync(video.Video(bvid).get_info()), bvids))
+```
+"""
+
 request_log: bool = False
 """
 请求 Api 时是否打印 Api 信息
 """
 
+request_metrics: bool = False
+"""
+是否统计 Api 请求耗时，默认关闭
+
+开启后每次实际发送的请求都会按接口、请求方法与返回 code 记录到内置的耗时直方图中，
+可通过 `get_request_metrics().to_prometheus()` 导出为 Prometheus 文本格式。
+另见 `add_request_hook`，可以注册回调接收每次请求的详细信息。
+
+e.x.:
+``` python
+from bilibili_api import settings, get_request_metrics
+settings.request_metrics = True
+...
+print(get_request_metrics().to_prometheus())
+```
+"""
+
 wbi_retry_times: int = 3
 """
-WBI请求重试次数上限设置, 默认为3次
+Api 请求最多尝试次数（包括 WBI 密钥过期与可重试的网络错误）, 默认为3次。每次请求时读取，修改后立即生效
+"""
+
+wbi_mixin_key_ttl: float = 3600.0
+"""
+WBI 混合密钥的有效期（秒），过期后在下一次 WBI 请求前重新获取。密钥每天轮换，默认 1 小时刷新一次
+"""
+
+bootstrap_cache: str = ""
+"""
+WBI 混合密钥与 buvid3 的缓存文件路径，为空时不缓存。
+
+设置后获取到的值会保存到该文件，新进程启动时直接读取，不必再请求 nav / spi 接口。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.bootstrap_cache = "/tmp/bilibili_api_bootstrap.json"
+```
+"""
+
+retry_backoff: Tuple[float, float] = (0.5, 8.0)
+"""
+网络错误、超时与 5xx 重试前的退避时间 `(初始秒数, 最大秒数)`。每次重试退避时间翻倍，实际等待时间在其一半到全部之间随机选取
+"""
+
+retry_budget: Union[Tuple[float, float], None] = None
+"""
+进程内重试预算 `(每次请求可换取的重试次数, 每秒至少允许的重试次数)`，超出预算时不再重试，直接抛出异常。
+默认为 None，不限制
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.retry_budget = (0.2, 1.0)
+```
+"""
+
+circuit_breaker: Union[Tuple[int, float], None] = None
+"""
+按主机熔断 `(连续失败次数, 熔断秒数)`。某个主机连续多次因网络错误、超时或 5xx 失败后，
+熔断期间对其的请求直接抛出 CircuitOpenException，之后放行一个探测请求，成功则恢复。默认为 None，不熔断
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.circuit_breaker = (10, 10.0)
+```
+"""
+
+response_cache: bool = False
+"""
+是否启用 Api 请求结果缓存，默认关闭
+
+开启后，在 data/api 中声明了 `cache_ttl`（秒）的 GET 接口的结果会在进程内缓存，
+相同地址、参数（不含 wts / w_rid / web_location）与凭据的请求在有效期内直接返回缓存结果。
+缓存的结果在多次调用间共享，请勿修改，需要修改时请先 copy.deepcopy。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.response_cache = True
+```
+"""
+
+response_cache_size: int = 1024
+"""
+请求结果缓存最多保存的结果数量，超出时淘汰最久未使用的结果
+"""
+
+request_coalescing: bool = False
+"""
+是否合并相同的并发请求，默认关闭
+
+开启后，同一事件循环中同时发出的相同 GET 请求（地址、参数（不含 wts / w_rid / web_location）与凭据均相同）
+只会实际发送一次，其余请求等待并共享这次请求的结果或异常。
+共享的结果是同一个对象，请勿修改，需要修改时请先 copy.deepcopy。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.request_coalescing = True
+```
+"""
+
+rate_limit: bool = False
+"""
+是否启用请求限速，默认关闭
+
+开启后，每个请求需要同时从所属主机、所属接口分组与所用凭据（仅已登录时）的令牌桶中各取得一个令牌，
+没有令牌时等待。遇到风控（-412 / -352）时相关令牌桶会暂停一段带随机抖动的指数退避时间并降低速率，
+之后每次请求成功逐步恢复。当前状态可通过 `get_rate_limiter().state()` 获取。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.rate_limit = True
+```
+"""
+
+rate_limit_host: Union[Tuple[float, int], None] = (5.0, 10)
+"""
+每个主机的限速 `(每秒请求数, 突发请求数)`，为 None 时不按主机限速
+"""
+
+rate_limit_credential: Union[Tuple[float, int], None] = (2.0, 5)
+"""
+每个已登录凭据的限速 `(每秒请求数, 突发请求数)`，为 None 时不按凭据限速
+"""
+
+rate_limit_groups: Dict[str, Tuple[float, int]] = {}
+"""
+接口分组限速，键为 `主机 + 路径` 的前缀，值为 `(每秒请求数, 突发请求数)`。
+一个请求只属于前缀最长的一个分组。
+
+e.x.:
+``` python
+from bilibili_api import settings
+settings.rate_limit_groups = {
+    "api.bilibili.com/x/space/": (1.0, 3),
+    "api.bilibili.com/x/v2/reply": (2.0, 5),
+}
+```
+"""
+
+rate_limit_backoff: Tuple[float, float] = (2.0, 60.0)
+"""
+遇到风控时的退避时间 `(初始秒数, 最大秒数)`。连续风控时退避时间翻倍，实际暂停时间在其一半到全部之间随机选取
 """
 
 logger = logging.getLogger("request")
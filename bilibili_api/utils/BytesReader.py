@@ -69,7 +69,7 @@ class BytesReader:
         Returns:
             int。
         """
-        d, l = read_varint(self.__stream[self.__offset :])
+        d, l = read_varint(self.__stream, self.__offset)
         self.__offset += l
         return d
 
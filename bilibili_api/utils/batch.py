@@ -0,0 +1,121 @@
+"""
+bilibili_api.utils.batch
+
+限制并发数的批量请求。
+"""
+
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Union, Iterable, Optional, Awaitable, AsyncIterator
+
+from .network import Api
+from ..exceptions import ArgsException
+
+
+@dataclass
+class BatchResult:
+    """
+    批量请求的单个结果
+
+    index (int): 请求在传入序列中的索引
+
+    result (Any): 请求结果，失败时为 None
+
+    exception (BaseException | None): 失败时的异常
+
+    elapsed (float): 耗时（秒）
+    """
+
+    index: int
+    result: Any = None
+    exception: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        """
+        请求是否成功
+        """
+        return self.exception is None
+
+
+async def _run(index: int, item: Union[Awaitable, Api]) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        if isinstance(item, Api):
+            result = await item.request()
+        else:
+            result = await item
+    except Exception as e:
+        return BatchResult(index, exception=e, elapsed=time.perf_counter() - start)
+    return BatchResult(index, result, elapsed=time.perf_counter() - start)
+
+
+async def gather_apis(
+    items: Iterable[Union[Awaitable, Api]],
+    concurrency: int = 8,
+    ordered: bool = False,
+) -> AsyncIterator[BatchResult]:
+    """
+    在并发数限制下执行一批请求，并在完成时逐个返回结果。
+
+    items 可以是协程（如 `Video(...).get_info()`）或 Api 对象，按需从中取出，可以传入生成器。
+    请求仍会经过 Api 的限速（settings.rate_limit）与重试。单个请求失败不会影响其它请求，
+    异常会记录在对应的 BatchResult.exception 中。提前结束迭代时会取消尚未完成的请求。
+
+    e.x.:
+    ``` python
+    coros = (video.Video(aid=aid).get_info() for aid in aids)
+    async for r in gather_apis(coros, concurrency=16):
+        if r.success:
+            print(r.index, r.result["title"])
+    ```
+
+    Args:
+        items       (Iterable[Awaitable | Api]): 协程或 Api 对象
+
+        concurrency (int, optional)            : 同时进行的请求数上限. Defaults to 8.
+
+        ordered     (bool, optional)           : 是否按传入顺序返回结果，为 False 时按完成顺序返回. Defaults to False.
+
+    Returns:
+        AsyncIterator[BatchResult]: 请求结果
+    """
+    if concurrency < 1:
+        raise ArgsException("concurrency 必须大于 0。")
+    source = enumerate(items)
+    queue: "asyncio.Queue[Union[BatchResult, None]]" = asyncio.Queue()
+
+    async def worker() -> None:
+        try:
+            # 多个 worker 共享同一个迭代器，取出的顺序即为传入顺序
+            for index, item in source:
+                await queue.put(await _run(index, item))
+        finally:
+            await queue.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    pending = {}
+    expected = 0
+    running = len(workers)
+    try:
+        while running:
+            result = await queue.get()
+            if result is None:
+                running -= 1
+                continue
+            if not ordered:
+                yield result
+                continue
+            pending[result.index] = result
+            while expected in pending:
+                yield pending.pop(expected)
+                expected += 1
+        for task in workers:
+            # 迭代 items 时抛出的异常
+            task.result()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
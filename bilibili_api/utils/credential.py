@@ -5,7 +5,7 @@ bilibili_api.utils.Credential
 """
 
 import uuid
-from typing import Union
+from typing import Any, Union
 import urllib.parse
 
 from ..exceptions import (
@@ -63,6 +63,13 @@ class Credential:
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        """
+        修改任何字段都清除缓存的 Cookies 字典
+        """
+        object.__setattr__(self, name, value)
+        self.__dict__.pop("_Credential__cookies", None)
+
     def get_cookies(self) -> dict:
         """
         获取请求 Cookies 字典
@@ -70,6 +77,24 @@ class Credential:
         Returns:
             dict: 请求 Cookies 字典
         """
+        return self.get_cookies_view().copy()
+
+    def get_cookies_view(self) -> dict:
+        """
+        获取缓存的请求 Cookies 字典，修改凭据的字段后重新生成。
+
+        返回的字典在多个请求间共享，不能修改，需要修改时请使用 get_cookies()
+
+        Returns:
+            dict: 请求 Cookies 字典
+        """
+        cookies = self.__dict__.get("_Credential__cookies")
+        if cookies is None:
+            cookies = self.__build_cookies()
+            self.__dict__["_Credential__cookies"] = cookies
+        return cookies
+
+    def __build_cookies(self) -> dict:
         cookies = {
             "SESSDATA": self.sessdata,
             "buvid3": self.buvid3,
@@ -81,7 +106,7 @@ class Credential:
 
         # 填入所有其他参数
         for key, value in self.__dict__.items():
-            if key not in cookies and value is not None:
+            if key not in cookies and value is not None and key != "_Credential__cookies":
                 cookies[key] = value
         return cookies
 
@@ -0,0 +1,366 @@
+"""
+bilibili_api.utils.credential_pool
+
+凭据池，按策略把请求分配到多个凭据（账号或匿名身份）上。
+"""
+
+import time
+import threading
+from enum import Enum
+from typing import Any, List, Union, Callable, Iterable, Iterator, Optional
+
+from .. import settings
+from .credential import Credential
+from .rate_limit import is_risk_control
+from ..exceptions import ApiException, CredentialNoSessdataException
+
+# 接口返回 -101 表示账号未登录，即凭据已失效
+NOT_LOGIN_CODE = -101
+
+# STICKY 策略默认按以下参数识别请求的资源，均不存在时按接口地址
+RESOURCE_KEYS = (
+    "bvid",
+    "aid",
+    "oid",
+    "cid",
+    "mid",
+    "vmid",
+    "host_mid",
+    "uid",
+    "room_id",
+    "roomid",
+    "media_id",
+    "season_id",
+    "ep_id",
+    "rid",
+)
+
+
+class PoolPolicy(Enum):
+    """
+    凭据池的分配策略
+
+    - ROUND_ROBIN: 轮流使用
+    - LEAST_LIMITED: 优先使用最久没有被风控的凭据
+    - STICKY: 同一资源（如同一视频）固定使用同一凭据，该凭据不可用时才换用其他凭据
+    """
+
+    ROUND_ROBIN = "round_robin"
+    LEAST_LIMITED = "least_limited"
+    STICKY = "sticky"
+
+
+class _Member:
+    """
+    凭据池中的一个凭据及其健康状态
+    """
+
+    __slots__ = (
+        "credential",
+        "token",
+        "requests",
+        "limited",
+        "strikes",
+        "limited_at",
+        "paused_until",
+        "expired",
+    )
+
+    def __init__(self, credential: Credential, token: int) -> None:
+        self.credential = credential
+        self.token = token
+        self.requests = 0
+        self.limited = 0
+        self.strikes = 0
+        self.limited_at = float("-inf")
+        self.paused_until = 0.0
+        self.expired = False
+
+    def available(self, now: float) -> bool:
+        return not self.expired and self.paused_until <= now
+
+    def state(self, now: float) -> dict:
+        credential = self.credential
+        if credential.dedeuserid:
+            label = str(credential.dedeuserid)
+        elif credential.has_sessdata():
+            label = f"sessdata#{self.token}"
+        else:
+            label = f"anonymous#{self.token}"
+        return {
+            "credential": label,
+            "requests": self.requests,
+            "limited": self.limited,
+            "paused": max(0.0, self.paused_until - now),
+            "expired": self.expired,
+        }
+
+
+class CredentialPool(Credential):
+    """
+    凭据池，可以在任何接受 Credential 的地方传入。
+
+    每次发送请求时按策略选出一个凭据。接口返回 -412 / -352（风控）时该凭据暂停使用一段时间，
+    连续被风控时暂停时间翻倍；已登录的凭据返回 -101（未登录）时视为失效，不再使用。
+
+    没有 buvid3 的凭据（包括匿名身份）在首次使用时会单独获取 buvid3，不与其他请求共用全局的 buvid3。
+
+    在请求之外读取字段或调用 get_cookies() 时使用池中第一个可用的凭据。载荷中的 csrf / csrf_token
+    会在发送前替换为选出的凭据的 bili_jct。
+
+    不经过 Api 而是直接使用 get_cookies() 发送请求的功能（如 video、cheese、user、danmaku_protobuf、
+    initial_state 与上传模块中的部分请求）不会轮换凭据，始终使用第一个可用的凭据。
+    """
+
+    def __init__(
+        self,
+        credentials: Iterable[Credential] = (),
+        policy: PoolPolicy = PoolPolicy.ROUND_ROBIN,
+        anonymous: int = 0,
+        cooldown: float = 60.0,
+        isolate_buvid3: bool = True,
+        resource_key: Optional[Callable[[str, dict], Any]] = None,
+    ) -> None:
+        """
+        Args:
+            credentials    (Iterable[Credential], optional): 凭据. Defaults to ().
+
+            policy         (PoolPolicy, optional)          : 分配策略. Defaults to PoolPolicy.ROUND_ROBIN.
+
+            anonymous      (int, optional)                 : 额外添加的匿名身份数量. Defaults to 0.
+
+            cooldown       (float, optional)               : 被风控后暂停使用的初始秒数. Defaults to 60.0.
+
+            isolate_buvid3 (bool, optional)                : 是否为没有 buvid3 的凭据单独获取 buvid3. Defaults to True.
+
+            resource_key   (Callable[[str, dict], Any], optional): STICKY 策略下由请求地址与参数得到资源标识的函数. Defaults to None (见 RESOURCE_KEYS).
+        """
+        self.policy = policy
+        self.cooldown = cooldown
+        self.isolate_buvid3 = isolate_buvid3
+        self.resource_key = resource_key
+        self.__lock = threading.Lock()
+        self.__members: List[_Member] = []
+        self.__tokens = 0
+        self.__counter = 0
+        for credential in credentials:
+            self.add(credential)
+        for _ in range(anonymous):
+            self.add(Credential())
+
+    def __getattr__(self, name: str) -> Any:
+        # sessdata 等字段读取池中第一个可用的凭据
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.__peek(), name)
+
+    def __len__(self) -> int:
+        return len(self.__members)
+
+    def __bool__(self) -> bool:
+        # 定义了 __len__ 后空的凭据池会被视为 False，与 Credential 的行为不一致
+        return True
+
+    def __iter__(self) -> Iterator[Credential]:
+        return iter([member.credential for member in self.__members])
+
+    def __find(self, credential: Credential) -> Optional[_Member]:
+        """
+        查找凭据对应的成员，需要在持有锁时调用
+
+        按对象本身比较而不是 id()：凭据被移除并回收后，新的凭据可能得到相同的 id
+        """
+        for member in self.__members:
+            if member.credential is credential:
+                return member
+        return None
+
+    def __peek(self) -> Credential:
+        now = time.monotonic()
+        members = self.__members
+        if not members:
+            raise ApiException("凭据池为空")
+        for member in members:
+            if member.available(now):
+                return member.credential
+        return members[0].credential
+
+    def add(self, credential: Credential) -> None:
+        """
+        添加凭据
+
+        Args:
+            credential (Credential): 凭据类
+        """
+        if isinstance(credential, CredentialPool):
+            raise ApiException("凭据池不能嵌套")
+        with self.__lock:
+            if self.__find(credential) is not None:
+                return
+            self.__tokens += 1
+            self.__members.append(_Member(credential, self.__tokens))
+
+    def remove(self, credential: Credential) -> None:
+        """
+        移除凭据
+
+        Args:
+            credential (Credential): 凭据类
+        """
+        with self.__lock:
+            member = self.__find(credential)
+            if member is not None:
+                self.__members.remove(member)
+
+    def owns(self, credential: Credential) -> bool:
+        """
+        凭据是否在池中
+        """
+        with self.__lock:
+            return self.__find(credential) is not None
+
+    def restore(self, credential: Credential) -> None:
+        """
+        恢复使用被判定为失效或正在暂停的凭据，例如刷新 cookies 之后
+
+        Args:
+            credential (Credential): 凭据类
+        """
+        with self.__lock:
+            member = self.__find(credential)
+            if member is not None:
+                member.expired = False
+                member.strikes = 0
+                member.paused_until = 0.0
+
+    def resource_of(self, url: str, params: dict) -> Any:
+        """
+        获取请求对应的资源标识，用于 STICKY 策略
+
+        Args:
+            url    (str) : 请求地址
+
+            params (dict): 请求参数（GET）或载荷
+
+        Returns:
+            Any: 可哈希的资源标识
+        """
+        if self.resource_key is not None:
+            return self.resource_key(url, params)
+        for key in RESOURCE_KEYS:
+            value = params.get(key)
+            if value is not None and value != "":
+                return (key, str(value))
+        return url
+
+    def select(
+        self, resource: Any = None, require_login: bool = False
+    ) -> Credential:
+        """
+        按策略选出一个凭据。没有可用的凭据时返回最早恢复可用的凭据。
+
+        Args:
+            resource      (Any, optional) : 资源标识，STICKY 策略使用. Defaults to None.
+
+            require_login (bool, optional): 是否只从已登录的凭据中选择. Defaults to False.
+
+        Returns:
+            Credential: 凭据类
+        """
+        now = time.monotonic()
+        with self.__lock:
+            members = self.__members
+            if require_login:
+                members = [m for m in members if m.credential.has_sessdata()]
+                if not members:
+                    raise CredentialNoSessdataException()
+            elif not members:
+                raise ApiException("凭据池为空")
+            candidates = [m for m in members if m.available(now)]
+            if not candidates:
+                candidates = [m for m in members if not m.expired] or members
+                candidates = [min(candidates, key=lambda m: m.paused_until)]
+            member = self.__choose(candidates, resource)
+            member.requests += 1
+            return member.credential
+
+    def __choose(self, candidates: List[_Member], resource: Any) -> _Member:
+        if self.policy == PoolPolicy.LEAST_LIMITED:
+            return min(candidates, key=lambda m: (m.limited_at, m.requests))
+        if self.policy == PoolPolicy.STICKY and resource is not None:
+            # 最高随机权重哈希：凭据增减时只有少数资源会换用其他凭据
+            return max(candidates, key=lambda m: hash((resource, m.token)))
+        self.__counter += 1
+        return candidates[self.__counter % len(candidates)]
+
+    def report(
+        self, credential: Credential, error: Union[BaseException, None] = None
+    ) -> None:
+        """
+        报告请求结果，Api 发送请求后会自动调用。
+
+        Args:
+            credential (Credential)                : 请求使用的凭据
+
+            error      (BaseException | None, optional): 请求失败时的异常. Defaults to None.
+        """
+        now = time.monotonic()
+        with self.__lock:
+            member = self.__find(credential)
+            if member is None:
+                return
+            if error is None:
+                member.strikes = 0
+            elif is_risk_control(error):
+                member.limited += 1
+                member.strikes += 1
+                member.limited_at = now
+                member.paused_until = now + self.cooldown * 2 ** min(
+                    member.strikes - 1, 6
+                )
+                settings.logger.warning(
+                    "凭据 %s 被风控，暂停使用 %.0f 秒",
+                    member.state(now)["credential"],
+                    member.paused_until - now,
+                )
+            elif (
+                getattr(error, "code", None) == NOT_LOGIN_CODE
+                and credential.has_sessdata()
+            ):
+                member.expired = True
+                settings.logger.warning(
+                    "凭据 %s 已失效，不再使用", member.state(now)["credential"]
+                )
+
+    def state(self) -> List[dict]:
+        """
+        获取池中各凭据的状态
+
+        Returns:
+            List[dict]: 每个凭据的 credential（DedeUserID 或匿名身份编号）、requests（分配到的请求数）、
+            limited（被风控次数）、paused（剩余暂停秒数）、expired（是否失效）
+        """
+        now = time.monotonic()
+        with self.__lock:
+            return [member.state(now) for member in self.__members]
+
+    def get_cookies(self) -> dict:
+        return self.__peek().get_cookies()
+
+    def get_cookies_view(self) -> dict:
+        return self.__peek().get_cookies_view()
+
+    def has_dedeuserid(self) -> bool:
+        return any(c.has_dedeuserid() for c in self)
+
+    def has_sessdata(self) -> bool:
+        return any(c.has_sessdata() for c in self)
+
+    def has_bili_jct(self) -> bool:
+        return any(c.has_bili_jct() for c in self)
+
+    def has_buvid3(self) -> bool:
+        return any(c.has_buvid3() for c in self)
+
+    def has_ac_time_value(self) -> bool:
+        return any(c.has_ac_time_value() for c in self)
@@ -4,11 +4,16 @@ bilibili_api.utils.Danmaku
 弹幕类。
 """
 
+import re
 import time
+from array import array
 from enum import Enum
-from typing import Union
+from typing import Any, Dict, Iterable, Iterator, List, Pattern, Union
 
 from .utils import crack_uid as _crack_uid
+from .utils import crack_uids as _crack_uids
+
+_new_object = object.__new__
 
 
 class DmFontSize(Enum):
@@ -37,18 +42,42 @@ class DmMode(Enum):
     SPECIAL = 9
 
 
+# 大会员专属颜色在 protobuf 中的取值
+SPECIAL_COLOR = 60001
+
+
 class Danmaku:
     """
     弹幕类。
+
+    `color`、`mode`、`font_size` 可以以原始值（整数颜色、枚举）保存，在首次访问时才转换为字符串或整数。
     """
 
+    __slots__ = (
+        "text",
+        "dm_time",
+        "send_time",
+        "crc32_id",
+        "_color",
+        "weight",
+        "id_",
+        "id_str",
+        "action",
+        "_mode",
+        "_font_size",
+        "is_sub",
+        "pool",
+        "attr",
+        "uid",
+    )
+
     def __init__(
         self,
         text: str,
         dm_time: float = 0.0,
-        send_time: float = time.time(),
+        send_time: Union[float, None] = None,
         crc32_id: str = "",
-        color: str = "ffffff",
+        color: Union[str, int] = "ffffff",
         weight: int = -1,
         id_: int = -1,
         id_str: str = "",
@@ -66,11 +95,11 @@ class Danmaku:
 
             (self.)dm_time   (float, optional)                 : 弹幕在视频中的位置，单位为秒。Defaults to 0.0.
 
-            (self.)send_time (float, optional)                 : 弹幕发送的时间。Defaults to time.time().
+            (self.)send_time (float | None, optional)          : 弹幕发送的时间，为 None 时取创建弹幕时的 time.time()（此前的版本为模块导入时的时间）。Defaults to None.
 
             (self.)crc32_id  (str, optional)                   : 弹幕发送者 UID 经 CRC32 算法取摘要后的值。Defaults to "".
 
-            (self.)color     (str, optional)                   : 弹幕十六进制颜色。Defaults to "ffffff" (如果为大会员专属的颜色则为"special").
+            (self.)color     (str | int, optional)             : 弹幕十六进制颜色，也可传入整数颜色。Defaults to "ffffff" (如果为大会员专属的颜色则为"special").
 
             (self.)weight    (int, optional)                   : 弹幕在弹幕列表显示的权重。Defaults to -1.
 
@@ -98,22 +127,88 @@ class Danmaku:
         """
         self.text = text
         self.dm_time = dm_time
-        self.send_time = send_time
+        self.send_time = time.time() if send_time is None else send_time
         self.crc32_id = crc32_id
-        self.color = color
+        self._color = color
         self.weight = weight
         self.id_ = id_
         self.id_str = id_str
         self.action = action
-        self.mode = mode.value if isinstance(mode, DmMode) else mode
-        self.font_size = (
-            font_size.value if isinstance(font_size, DmFontSize) else font_size
-        )
+        self._mode = mode
+        self._font_size = font_size
         self.is_sub = is_sub
         self.pool = pool
         self.attr = attr
         self.uid = uid
 
+    @classmethod
+    def from_dict(cls, fields: Dict[str, Any]) -> "Danmaku":
+        """
+        (@classmethod)
+
+        以字段字典快速创建弹幕，供解析器使用。缺少的字段取默认值。
+
+        Args:
+            fields (dict): 属性名 -> 值，属性名同 `__init__` 的参数名
+
+        Returns:
+            Danmaku: 弹幕对象
+        """
+        dm = _new_object(cls)
+        get = fields.get
+        dm.text = get("text", "")
+        dm.dm_time = get("dm_time", 0.0)
+        send_time = get("send_time")
+        dm.send_time = time.time() if send_time is None else send_time
+        dm.crc32_id = get("crc32_id", "")
+        dm._color = get("color", "ffffff")
+        dm.weight = get("weight", -1)
+        dm.id_ = get("id_", -1)
+        dm.id_str = get("id_str", "")
+        dm.action = get("action", "")
+        dm._mode = get("mode", 1)
+        dm._font_size = get("font_size", 25)
+        dm.is_sub = get("is_sub", False)
+        dm.pool = get("pool", 0)
+        dm.attr = get("attr", -1)
+        dm.uid = get("uid", -1)
+        return dm
+
+    @property
+    def color(self) -> str:
+        color = self._color
+        if type(color) is int:
+            color = self._color = (
+                "special" if color == SPECIAL_COLOR else hex(color)[2:]
+            )
+        return color
+
+    @color.setter
+    def color(self, value: Union[str, int]) -> None:
+        self._color = value
+
+    @property
+    def mode(self) -> int:
+        mode = self._mode
+        if isinstance(mode, DmMode):
+            mode = self._mode = mode.value
+        return mode
+
+    @mode.setter
+    def mode(self, value: Union[DmMode, int]) -> None:
+        self._mode = value
+
+    @property
+    def font_size(self) -> int:
+        font_size = self._font_size
+        if isinstance(font_size, DmFontSize):
+            font_size = self._font_size = font_size.value
+        return font_size
+
+    @font_size.setter
+    def font_size(self, value: Union[DmFontSize, int]) -> None:
+        self._font_size = value
+
     def __str__(self):
         ret = "%s, %s, %s" % (self.send_time, self.dm_time, self.text)
         return ret
@@ -126,9 +221,9 @@ class Danmaku:
         """
         (@staticmethod)
 
-        暴力破解 UID，可能存在误差，请慎重使用。
+        破解 UID，可能存在误差，请慎重使用。
 
-        精确至 UID 小于 10000000 的破解。
+        支持位数不超过 10 位的 UID，存在多个结果时取最小者，找不到时返回 -1。
 
         Args:
             crc32_id (str): crc32 id
@@ -148,6 +243,8 @@ class Danmaku:
 
 
 class SpecialDanmaku:
+    __slots__ = ("content", "id_", "id_str", "_mode", "pool")
+
     def __init__(
         self,
         content: str,
@@ -171,8 +268,393 @@ class SpecialDanmaku:
         self.content = content
         self.id_ = id_
         self.id_str = id_str
-        self.mode = mode.value if isinstance(mode, DmMode) else mode
+        self._mode = mode
         self.pool = pool
 
+    @classmethod
+    def from_dict(cls, fields: Dict[str, Any]) -> "SpecialDanmaku":
+        """
+        (@classmethod)
+
+        以字段字典快速创建特殊弹幕，供解析器使用。缺少的字段取默认值。
+
+        Args:
+            fields (dict): 属性名 -> 值，属性名同 `__init__` 的参数名
+
+        Returns:
+            SpecialDanmaku: 特殊弹幕对象
+        """
+        dm = _new_object(cls)
+        get = fields.get
+        dm.content = get("content", "")
+        dm.id_ = get("id_", -1)
+        dm.id_str = get("id_str", "")
+        dm._mode = get("mode", 9)
+        dm.pool = get("pool", 2)
+        return dm
+
+    @property
+    def mode(self) -> int:
+        mode = self._mode
+        if isinstance(mode, DmMode):
+            mode = self._mode = mode.value
+        return mode
+
+    @mode.setter
+    def mode(self, value: Union[DmMode, int]) -> None:
+        self._mode = value
+
     def __str__(self):
         return f"{self.content}"
+
+
+class DanmakuBatch:
+    """
+    按列存储的弹幕集合。
+
+    数值字段使用 `array` 存储，文本字段去重后存储，只有在按下标访问或迭代时才会生成 `Danmaku` 对象。
+
+    Attributes:
+        dm_time   (array('d')): 弹幕在视频中的位置，单位为秒
+
+        send_time (array('q')): 弹幕发送的时间
+
+        id_       (array('q')): 弹幕 ID
+
+        uid       (array('q')): 弹幕发送者 UID
+
+        color     (array('q')): 弹幕颜色，`SPECIAL_COLOR` 表示大会员专属颜色
+
+        mode      (array('i')): 弹幕模式
+
+        font_size (array('i')): 弹幕字体大小
+
+        weight    (array('i')): 弹幕权重
+
+        pool      (array('i')): 弹幕池
+
+        attr      (array('i')): 弹幕属性
+
+        is_sub    (array('b')): 是否为字幕弹幕
+
+        text      (List[str]) : 弹幕文本
+
+        crc32_id  (List[str]) : 弹幕发送者 UID 的 CRC32 摘要
+
+        id_str    (List[str]) : 弹幕字符串 ID
+
+        action    (List[str]) : 暂不清楚
+    """
+
+    # protobuf 中的 int32 字段使用 "i" 列，解析器需按有符号整数解码
+    NUMERIC_COLUMNS = {
+        "dm_time": "d",
+        "send_time": "q",
+        "id_": "q",
+        "uid": "q",
+        "color": "q",
+        "mode": "i",
+        "font_size": "i",
+        "weight": "i",
+        "pool": "i",
+        "attr": "i",
+        "is_sub": "b",
+    }
+    TEXT_COLUMNS = ("text", "crc32_id", "id_str", "action")
+
+    def __init__(self):
+        # 列的类型需与 NUMERIC_COLUMNS / TEXT_COLUMNS 一致
+        self.dm_time = array("d")
+        self.send_time = array("q")
+        self.id_ = array("q")
+        self.uid = array("q")
+        self.color = array("q")
+        self.mode = array("i")
+        self.font_size = array("i")
+        self.weight = array("i")
+        self.pool = array("i")
+        self.attr = array("i")
+        self.is_sub = array("b")
+        self.text: List[str] = []
+        self.crc32_id: List[str] = []
+        self.id_str: List[str] = []
+        self.action: List[str] = []
+        # 文本去重表，高度重复的弹幕文本只保留一份
+        self.__interned: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.dm_time)
+
+    def __repr__(self) -> str:
+        return f"<DanmakuBatch of {len(self)} danmakus>"
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Danmaku, "DanmakuBatch"]:
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        return self.__materialize(index)
+
+    def __iter__(self) -> Iterator[Danmaku]:
+        for i in range(len(self)):
+            yield self.__materialize(i)
+
+    def __materialize(self, i: int) -> Danmaku:
+        return Danmaku(
+            self.text[i],
+            dm_time=self.dm_time[i],
+            send_time=self.send_time[i],
+            crc32_id=self.crc32_id[i],
+            color=self.color[i],
+            weight=self.weight[i],
+            id_=self.id_[i],
+            id_str=self.id_str[i],
+            action=self.action[i],
+            mode=self.mode[i],
+            font_size=self.font_size[i],
+            is_sub=bool(self.is_sub[i]),
+            pool=self.pool[i],
+            attr=self.attr[i],
+            uid=self.uid[i],
+        )
+
+    def intern(self, text: str) -> str:
+        """
+        返回去重后的文本对象。
+
+        Args:
+            text (str): 文本
+
+        Returns:
+            str: 与之前出现过的相同文本为同一个对象
+        """
+        return self.__interned.setdefault(text, text)
+
+    def append_fields(
+        self,
+        text: str = "",
+        dm_time: float = 0.0,
+        send_time: int = 0,
+        crc32_id: str = "",
+        color: int = 0xFFFFFF,
+        weight: int = -1,
+        id_: int = -1,
+        id_str: str = "",
+        action: str = "",
+        mode: int = DmMode.FLY.value,
+        font_size: int = DmFontSize.NORMAL.value,
+        is_sub: bool = False,
+        pool: int = 0,
+        attr: int = -1,
+        uid: int = -1,
+    ) -> None:
+        """
+        直接以字段值追加一条弹幕，不创建 `Danmaku` 对象。颜色为整数。
+        """
+        intern = self.intern
+        self.text.append(intern(text))
+        self.dm_time.append(dm_time)
+        self.send_time.append(int(send_time))
+        self.crc32_id.append(intern(crc32_id))
+        self.color.append(color)
+        self.weight.append(weight)
+        self.id_.append(id_)
+        self.id_str.append(id_str)
+        self.action.append(intern(action))
+        self.mode.append(mode)
+        self.font_size.append(font_size)
+        self.is_sub.append(1 if is_sub else 0)
+        self.pool.append(pool)
+        self.attr.append(attr)
+        self.uid.append(uid)
+
+    def append(self, danmaku: Danmaku) -> None:
+        """
+        追加一条弹幕。
+
+        Args:
+            danmaku (Danmaku): 弹幕
+        """
+        color = danmaku.color
+        self.append_fields(
+            text=danmaku.text,
+            dm_time=danmaku.dm_time,
+            send_time=danmaku.send_time,
+            crc32_id=danmaku.crc32_id,
+            color=SPECIAL_COLOR if color == "special" else int(color, 16),
+            weight=danmaku.weight,
+            id_=danmaku.id_,
+            id_str=danmaku.id_str,
+            action=danmaku.action,
+            mode=danmaku.mode,
+            font_size=danmaku.font_size,
+            is_sub=danmaku.is_sub,
+            pool=danmaku.pool,
+            attr=danmaku.attr,
+            uid=danmaku.uid,
+        )
+
+    def extend(self, other: Union["DanmakuBatch", Iterable[Danmaku]]) -> None:
+        """
+        追加多条弹幕。
+
+        Args:
+            other (DanmakuBatch | Iterable[Danmaku]): 另一个弹幕集合或弹幕列表
+        """
+        if not isinstance(other, DanmakuBatch):
+            for dm in other:
+                self.append(dm)
+            return
+        for name in self.NUMERIC_COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+        for name in self.TEXT_COLUMNS:
+            getattr(self, name).extend(map(self.intern, getattr(other, name)))
+
+    @classmethod
+    def from_danmakus(cls, danmakus: Iterable[Danmaku]) -> "DanmakuBatch":
+        """
+        从弹幕列表创建。
+
+        Args:
+            danmakus (Iterable[Danmaku]): 弹幕列表
+
+        Returns:
+            DanmakuBatch: 弹幕集合
+        """
+        batch = cls()
+        batch.extend(danmakus)
+        return batch
+
+    def to_danmakus(self) -> List[Danmaku]:
+        """
+        转换为 `Danmaku` 列表。
+
+        Returns:
+            List[Danmaku]: 弹幕列表
+        """
+        return list(self)
+
+    def take(self, indices: Iterable[int]) -> "DanmakuBatch":
+        """
+        按下标选出若干条弹幕，组成新的集合。
+
+        Args:
+            indices (Iterable[int]): 下标
+
+        Returns:
+            DanmakuBatch: 新的弹幕集合
+        """
+        if not isinstance(indices, (list, range)):
+            indices = list(indices)
+        batch = DanmakuBatch()
+        for name, typecode in self.NUMERIC_COLUMNS.items():
+            column = getattr(self, name)
+            setattr(batch, name, array(typecode, [column[i] for i in indices]))
+        for name in self.TEXT_COLUMNS:
+            column = getattr(self, name)
+            setattr(batch, name, [column[i] for i in indices])
+        batch._DanmakuBatch__interned = self.__interned
+        return batch
+
+    def filter(self, mask: Iterable[Any]) -> "DanmakuBatch":
+        """
+        按布尔掩码筛选弹幕。
+
+        Args:
+            mask (Iterable[Any]): 与弹幕一一对应的真值序列
+
+        Returns:
+            DanmakuBatch: 筛选后的弹幕集合
+        """
+        return self.take([i for i, keep in enumerate(mask) if keep])
+
+    def filter_time(
+        self, start: float = 0.0, end: float = float("inf")
+    ) -> "DanmakuBatch":
+        """
+        筛选视频中位置处于 [start, end) 的弹幕。
+
+        Args:
+            start (float, optional): 起始时间，单位为秒. Defaults to 0.0.
+
+            end   (float, optional): 结束时间，单位为秒. Defaults to inf.
+
+        Returns:
+            DanmakuBatch: 筛选后的弹幕集合
+        """
+        return self.take([i for i, t in enumerate(self.dm_time) if start <= t < end])
+
+    def filter_mode(self, *modes: Union[DmMode, int]) -> "DanmakuBatch":
+        """
+        筛选指定模式的弹幕。
+
+        Args:
+            *modes (DmMode | int): 弹幕模式
+
+        Returns:
+            DanmakuBatch: 筛选后的弹幕集合
+        """
+        wanted = {m.value if isinstance(m, DmMode) else m for m in modes}
+        return self.take([i for i, m in enumerate(self.mode) if m in wanted])
+
+    def filter_pool(self, *pools: int) -> "DanmakuBatch":
+        """
+        筛选指定弹幕池的弹幕。
+
+        Args:
+            *pools (int): 弹幕池
+
+        Returns:
+            DanmakuBatch: 筛选后的弹幕集合
+        """
+        wanted = set(pools)
+        return self.take([i for i, p in enumerate(self.pool) if p in wanted])
+
+    def filter_text(self, pattern: Union[str, Pattern]) -> "DanmakuBatch":
+        """
+        筛选文本匹配正则表达式的弹幕，相同的文本只匹配一次。
+
+        Args:
+            pattern (str | re.Pattern): 正则表达式
+
+        Returns:
+            DanmakuBatch: 筛选后的弹幕集合
+        """
+        search = re.compile(pattern).search
+        cache: Dict[str, bool] = {}
+        mask = []
+        for text in self.text:
+            matched = cache.get(text)
+            if matched is None:
+                matched = cache[text] = search(text) is not None
+            mask.append(matched)
+        return self.filter(mask)
+
+    def crack_uids(self) -> List[int]:
+        """
+        批量破解所有弹幕发送者的 UID，相同的 crc32_id 只计算一次。可能存在误差，请慎重使用。
+
+        Returns:
+            List[int]: 与弹幕一一对应的 UID，找不到时为 -1
+        """
+        return [int(uid) for uid in _crack_uids(self.crc32_id)]
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        将数值列转换为 NumPy 数组，与本对象共享内存（不复制）。
+
+        需要安装 numpy。共享期间请勿再向本对象追加弹幕。
+
+        Returns:
+            Dict[str, numpy.ndarray]: 列名 -> 数组
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("DanmakuBatch.to_numpy() 需要 numpy，可通过 `pip3 install numpy` 安装")
+        result = {}
+        for name, typecode in self.NUMERIC_COLUMNS.items():
+            column = getattr(self, name)
+            if len(column) == 0:
+                result[name] = numpy.empty(0, dtype=typecode)
+            else:
+                result[name] = numpy.frombuffer(column, dtype=typecode)
+        return result
@@ -20,8 +20,10 @@ import re
 import sys
 import json
 import math
+import bisect
 import time
 import random
+import functools
 import gettext
 import logging
 import argparse
@@ -821,7 +823,7 @@ def ProcessComments(
 ):
     styleid = "Danmaku2ASS_%04x" % random.randint(0, 0xFFFF)
     WriteASSHead(f, width, height, fontface, fontsize, alpha, styleid)
-    rows = [[None] * (height - bottomReserved + 1) for i in range(4)]
+    rows = [CommentRows(height - bottomReserved + 1) for i in range(4)]
     for idx, i in enumerate(comments):
         if progress_callback and idx % 1000 == 0:
             progress_callback(idx, len(comments))
@@ -861,8 +863,12 @@ def ProcessComments(
                         styleid,
                     )
                     break
+                elif freerows:
+                    row += freerows
                 else:
-                    row += freerows or 1
+                    # Every row up to the end of the blocking run is blocked by
+                    # the same comment, skip them all at once.
+                    row = rows[i[4]].RunEnd(row)
             else:
                 if not reduced:
                     row = FindAlternativeRow(rows, i, height, bottomReserved)
@@ -889,59 +895,103 @@ def ProcessComments(
         progress_callback(len(comments), len(comments))
 
 
+class CommentRows(object):
+    # Row occupancy of one comment type. Instead of one slot per pixel row,
+    # the rows are stored as runs: run k covers [starts[k], starts[k + 1])
+    # and is occupied by owners[k] (None when free).
+    __slots__ = ("starts", "owners", "size")
+
+    def __init__(self, size):
+        self.starts = [0]
+        self.owners = [None]
+        self.size = size
+
+    def RunEnd(self, row):
+        k = bisect.bisect_right(self.starts, row)
+        return self.starts[k] if k < len(self.starts) else self.size
+
+    def Mark(self, row, end, c):
+        end = min(end, self.size)
+        if row >= end:
+            return
+        starts = self.starts
+        owners = self.owners
+        lo = bisect.bisect_right(starts, row) - 1
+        if starts[lo] < row:
+            lo += 1
+        if end >= self.size:
+            starts[lo:] = [row]
+            owners[lo:] = [c]
+            return
+        hi = bisect.bisect_right(starts, end) - 1
+        if starts[hi] == end:
+            starts[lo:hi] = [row]
+            owners[lo:hi] = [c]
+        else:
+            starts[lo : hi + 1] = [row, end]
+            owners[lo : hi + 1] = [c, owners[hi]]
+
+
 def TestFreeRows(
     rows, c, row, width, height, bottomReserved, duration_marquee, duration_still
 ):
-    res = 0
     rowmax = height - bottomReserved
-    targetRow = None
+    limit = min(rowmax, row + max(math.ceil(c[7]), 0))
+    if row >= limit:
+        return 0
+    lane = rows[c[4]]
+    starts = lane.starts
+    owners = lane.owners
+    k = bisect.bisect_right(starts, row) - 1
+    count = len(starts)
     if c[4] in (1, 2):
-        while row < rowmax and res < c[7]:
-            if targetRow != rows[c[4]][row]:
-                targetRow = rows[c[4]][row]
-                if targetRow and targetRow[0] + duration_still > c[0]:
-                    break
-            row += 1
-            res += 1
+        while True:
+            targetRow = owners[k]
+            if targetRow and targetRow[0] + duration_still > c[0]:
+                return max(starts[k], row) - row
+            k += 1
+            if k >= count or starts[k] >= limit:
+                return limit - row
     else:
         try:
             thresholdTime = c[0] - duration_marquee * (1 - width / (c[8] + width))
         except ZeroDivisionError:
             thresholdTime = c[0] - duration_marquee
-        while row < rowmax and res < c[7]:
-            if targetRow != rows[c[4]][row]:
-                targetRow = rows[c[4]][row]
-                try:
-                    if targetRow and (
-                        targetRow[0] > thresholdTime
-                        or targetRow[0]
-                        + targetRow[8] * duration_marquee / (targetRow[8] + width)
-                        > c[0]
-                    ):
-                        break
-                except ZeroDivisionError:
-                    pass
-            row += 1
-            res += 1
-    return res
+        while True:
+            targetRow = owners[k]
+            try:
+                if targetRow and (
+                    targetRow[0] > thresholdTime
+                    or targetRow[0]
+                    + targetRow[8] * duration_marquee / (targetRow[8] + width)
+                    > c[0]
+                ):
+                    return max(starts[k], row) - row
+            except ZeroDivisionError:
+                pass
+            k += 1
+            if k >= count or starts[k] >= limit:
+                return limit - row
 
 
 def FindAlternativeRow(rows, c, height, bottomReserved):
     res = 0
-    for row in range(height - bottomReserved - math.ceil(c[7])):
-        if not rows[c[4]][row]:
-            return row
-        elif rows[c[4]][row][0] < rows[c[4]][res][0]:
-            res = row
+    restime = None
+    lane = rows[c[4]]
+    limit = height - bottomReserved - math.ceil(c[7])
+    for start, owner in zip(lane.starts, lane.owners):
+        if start >= limit:
+            break
+        if not owner:
+            return start
+        elif restime is None or owner[0] < restime:
+            res = start
+            restime = owner[0]
     return res
 
 
 def MarkCommentRow(rows, c, row):
-    try:
-        for i in range(row, row + math.ceil(c[7])):
-            rows[c[4]][i] = c
-    except IndexError:
-        pass
+    rows[c[4]].Mark(row, row + math.ceil(c[7]), c)
 
 
 def WriteASSHead(f, width, height, fontface, fontsize, alpha, styleid):
@@ -976,6 +1026,12 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     )
 
 
+# Real danmaku repeat the same short texts ("233", "hahaha") over and over, so
+# text width, escaped text and style fragments are memoized with bounded caches.
+TEXT_CACHE_SIZE = 8192
+STYLE_CACHE_SIZE = 1024
+
+
 def WriteComment(
     f,
     c,
@@ -989,48 +1045,54 @@ def WriteComment(
     styleid,
 ):
     text = ASSEscape(c[3])
-    styles = []
     if c[4] == 1:
-        styles.append(
-            "\\an8\\pos(%(halfwidth)d, %(row)d)" % {"halfwidth": width / 2, "row": row}
-        )
+        position = "\\an8\\pos(%d, %d)" % (width / 2, row)
         duration = duration_still
     elif c[4] == 2:
-        styles.append(
-            "\\an2\\pos(%(halfwidth)d, %(row)d)"
-            % {"halfwidth": width / 2, "row": ConvertType2(row, height, bottomReserved)}
+        position = "\\an2\\pos(%d, %d)" % (
+            width / 2,
+            ConvertType2(row, height, bottomReserved),
         )
         duration = duration_still
     elif c[4] == 3:
-        styles.append(
-            "\\move(%(neglen)d, %(row)d, %(width)d, %(row)d)"
-            % {"width": width, "row": row, "neglen": -math.ceil(c[8])}
-        )
+        position = "\\move(%d, %d, %d, %d)" % (-math.ceil(c[8]), row, width, row)
         duration = duration_marquee
     else:
-        styles.append(
-            "\\move(%(width)d, %(row)d, %(neglen)d, %(row)d)"
-            % {"width": width, "row": row, "neglen": -math.ceil(c[8])}
-        )
+        position = "\\move(%d, %d, %d, %d)" % (width, row, -math.ceil(c[8]), row)
         duration = duration_marquee
-    if not (-1 < c[6] - fontsize < 1):
-        styles.append("\\fs%.0f" % c[6])
-    if c[5] != 0xFFFFFF:
-        styles.append("\\c&H%s&" % ConvertColor(c[5]))
-        if c[5] == 0x000000:
-            styles.append("\\3c&HFFFFFF&")
     f.write(
-        "Dialogue: 2,%(start)s,%(end)s,%(styleid)s,,0000,0000,0000,,{%(styles)s}%(text)s\n"
-        % {
-            "start": ConvertTimestamp(c[0]),
-            "end": ConvertTimestamp(c[0] + duration),
-            "styles": "".join(styles),
-            "text": text,
-            "styleid": styleid,
-        }
+        GetDialogueFormat(styleid)
+        % (
+            ConvertTimestamp(c[0]),
+            ConvertTimestamp(c[0] + duration),
+            position,
+            GetStyleFragment(c[6], c[5], fontsize),
+            text,
+        )
     )
 
 
+@functools.lru_cache(maxsize=STYLE_CACHE_SIZE)
+def GetDialogueFormat(styleid):
+    return (
+        "Dialogue: 2,%%s,%%s,%s,,0000,0000,0000,,{%%s%%s}%%s\n"
+        % styleid.replace("%", "%%")
+    )
+
+
+@functools.lru_cache(maxsize=STYLE_CACHE_SIZE)
+def GetStyleFragment(size, color, fontsize):
+    styles = []
+    if not (-1 < size - fontsize < 1):
+        styles.append("\\fs%.0f" % size)
+    if color != 0xFFFFFF:
+        styles.append("\\c&H%s&" % ConvertColor(color))
+        if color == 0x000000:
+            styles.append("\\3c&HFFFFFF&")
+    return "".join(styles)
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
 def ASSEscape(s):
     def ReplaceLeadingSpace(s):
         sstrip = s.strip(" ")
@@ -1054,6 +1116,7 @@ def ASSEscape(s):
     )
 
 
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
 def CalculateLength(s):
     return max(map(len, s.split("\n")))  # May not be accurate
 
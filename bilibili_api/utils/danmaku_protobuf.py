@@ -0,0 +1,538 @@
+"""
+bilibili_api.utils.danmaku_protobuf
+
+弹幕 protobuf 数据获取与解析。
+
+基于偏移量直接在原始字节流（或 memoryview）上解析，不对剩余数据切片，
+解析耗时与数据长度成线性关系。
+"""
+
+import json
+import struct
+import asyncio
+import functools
+from collections import deque
+from typing import Any, Dict, List, Tuple, Union, Iterable, Optional, AsyncGenerator
+
+from .danmaku import Danmaku, DanmakuBatch, SpecialDanmaku
+from .varint import read_varint_at
+from .credential import Credential
+from .network import get_session
+from ..exceptions import (
+    ArgsException,
+    NetworkException,
+    ResponseException,
+    DanmakuClosedException,
+)
+
+# wire type
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LEN = 2
+WIRE_FIXED32 = 5
+
+# 字段解析方式
+_VARINT = 0
+_BOOL = 1
+_STRING = 2
+_FLOAT = 3
+_JSON = 4
+_MS = 5
+_SIGNED = 6
+
+_EXPECTED_WIRE = {
+    _VARINT: WIRE_VARINT,
+    _BOOL: WIRE_VARINT,
+    _STRING: WIRE_LEN,
+    _FLOAT: WIRE_FIXED32,
+    _JSON: WIRE_LEN,
+    _MS: WIRE_VARINT,
+    _SIGNED: WIRE_VARINT,
+}
+
+# int32 / int64 的负数按 64 位补码编码为 10 字节的 varint
+_SIGN_BIT = 1 << 63
+_UINT64 = 1 << 64
+
+_unpack_float = struct.Struct("<f").unpack_from
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# DanmakuElem 字段表: 字段编号 -> (Danmaku 属性名, 解析方式)
+# 颜色 (uint32) 保留为整数，由 Danmaku 在访问时转换；其余整数字段均为有符号类型
+DANMAKU_ELEM_FIELDS: Dict[int, Tuple[str, int]] = {
+    1: ("id_", _SIGNED),
+    2: ("dm_time", _MS),
+    3: ("mode", _SIGNED),
+    4: ("font_size", _SIGNED),
+    5: ("color", _VARINT),
+    6: ("crc32_id", _STRING),
+    7: ("text", _STRING),
+    8: ("send_time", _SIGNED),
+    9: ("weight", _SIGNED),
+    10: ("action", _STRING),
+    11: ("pool", _SIGNED),
+    12: ("id_str", _STRING),
+    13: ("attr", _SIGNED),
+    14: ("uid", _SIGNED),
+}
+
+# 特殊弹幕字段表
+SPECIAL_DANMAKU_FIELDS: Dict[int, Tuple[str, int]] = {
+    1: ("id_", _SIGNED),
+    3: ("mode", _SIGNED),
+    7: ("content", _STRING),
+    11: ("pool", _SIGNED),
+    12: ("id_str", _STRING),
+}
+
+# DmWebViewReply 中各子消息的字段表: 字段编号 -> (键名, 解析方式)
+DM_SEG_FIELDS = {
+    1: ("page_size", _VARINT),
+    2: ("total", _VARINT),
+}
+
+DM_FLAG_FIELDS = {
+    1: ("rec_flag", _VARINT),
+    2: ("rec_text", _STRING),
+    3: ("rec_switch", _VARINT),
+}
+
+COMMAND_DM_FIELDS = {
+    1: ("id", _VARINT),
+    2: ("oid", _VARINT),
+    3: ("mid", _VARINT),
+    4: ("commend", _STRING),
+    5: ("content", _STRING),
+    6: ("progress", _VARINT),
+    7: ("ctime", _STRING),
+    8: ("mtime", _STRING),
+    9: ("extra", _JSON),
+    10: ("id_str", _STRING),
+}
+
+DM_SETTING_FIELDS = {
+    1: ("dm_switch", _BOOL),
+    2: ("ai_switch", _BOOL),
+    3: ("ai_level", _VARINT),
+    4: ("enable_top", _BOOL),
+    5: ("enable_scroll", _BOOL),
+    6: ("enable_bottom", _BOOL),
+    7: ("enable_color", _BOOL),
+    8: ("enable_special", _BOOL),
+    9: ("prevent_shade", _BOOL),
+    10: ("dmask", _BOOL),
+    11: ("opacity", _FLOAT),
+    12: ("dm_area", _VARINT),
+    13: ("speed_plus", _FLOAT),
+    14: ("font_size", _FLOAT),
+    15: ("screen_sync", _BOOL),
+    16: ("speed_sync", _BOOL),
+    17: ("font_family", _STRING),
+    18: ("bold", _BOOL),
+    19: ("font_border", _VARINT),
+    20: ("draw_type", _STRING),
+}
+
+DM_VIEW_FIELDS = {
+    1: ("state", _VARINT),
+    2: ("text", _STRING),
+    3: ("text_side", _STRING),
+    7: ("check_box", _BOOL),
+    8: ("count", _VARINT),
+}
+
+
+def skip_field(buf: Buffer, pos: int, wire_type: int) -> int:
+    """
+    跳过一个字段的值。
+
+    Args:
+        buf (bytes | memoryview): 字节流
+
+        pos (int): 字段值的起始位置
+
+        wire_type (int): 字段的 wire type
+
+    Returns:
+        int: 跳过后的新位置
+    """
+    if wire_type == WIRE_VARINT:
+        return read_varint_at(buf, pos)[1]
+    if wire_type == WIRE_LEN:
+        length, pos = read_varint_at(buf, pos)
+        return pos + length
+    if wire_type == WIRE_FIXED32:
+        return pos + 4
+    if wire_type == WIRE_FIXED64:
+        return pos + 8
+    raise ResponseException("解析响应数据错误")
+
+
+def _read_value(buf: Buffer, pos: int, kind: int) -> Tuple[Any, int]:
+    """
+    按解析方式读取一个字段值，返回值与新位置。
+    """
+    if kind == _STRING or kind == _JSON:
+        length, pos = read_varint_at(buf, pos)
+        end = pos + length
+        value = str(buf[pos:end], "utf8", "ignore")
+        if kind == _JSON:
+            value = json.loads(value)
+        return value, end
+    if kind == _FLOAT:
+        return _unpack_float(buf, pos)[0], pos + 4
+    value, pos = read_varint_at(buf, pos)
+    if kind == _VARINT:
+        return value, pos
+    if kind == _BOOL:
+        return value == 1, pos
+    if value >= _SIGN_BIT:
+        value -= _UINT64
+    if kind == _MS:
+        return value / 1000, pos
+    return value, pos
+
+
+def decode_message(
+    buf: Buffer, pos: int, end: int, fields: Dict[int, Tuple[str, int]]
+) -> dict:
+    """
+    按字段表解析 buf[pos:end] 中的一条消息，未知字段或类型不匹配的字段会被跳过。
+
+    Args:
+        buf    (bytes | memoryview): 字节流
+
+        pos    (int)               : 消息起始位置
+
+        end    (int)               : 消息结束位置
+
+        fields (dict)              : 字段表，字段编号 -> (键名, 解析方式)
+
+    Returns:
+        dict: 解析结果
+    """
+    data = {}
+    while pos < end:
+        tag, pos = read_varint_at(buf, pos)
+        spec = fields.get(tag >> 3)
+        if spec is None or _EXPECTED_WIRE[spec[1]] != tag & 7:
+            pos = skip_field(buf, pos, tag & 7)
+            continue
+        data[spec[0]], pos = _read_value(buf, pos, spec[1])
+    return data
+
+
+def _read_len(buf: Buffer, pos: int) -> Tuple[int, int]:
+    """
+    读取 length-delimited 字段，返回内容的起止位置。
+    """
+    length, pos = read_varint_at(buf, pos)
+    end = pos + length
+    if end > len(buf):
+        raise ResponseException("解析响应数据错误：数据不完整")
+    return pos, end
+
+
+def _complete(func):
+    """
+    数据被截断时 varint 会越界读取，统一转换为 ResponseException。
+    """
+
+    @functools.wraps(func)
+    def inner(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except (IndexError, struct.error) as e:
+            raise ResponseException("解析响应数据错误：数据不完整") from e
+
+    return inner
+
+
+def decode_danmaku_elem(buf: Buffer, pos: int, end: int) -> Danmaku:
+    """
+    解析单条 DanmakuElem 消息。
+
+    Args:
+        buf (bytes | memoryview): 字节流
+
+        pos (int): 消息起始位置
+
+        end (int): 消息结束位置
+
+    Returns:
+        Danmaku: 弹幕对象
+    """
+    return Danmaku.from_dict(decode_message(buf, pos, end, DANMAKU_ELEM_FIELDS))
+
+
+@_complete
+def decode_danmaku_segment(data: Buffer) -> List[Danmaku]:
+    """
+    解析弹幕分段 (DmSegMobileReply) 二进制数据。
+
+    Args:
+        data (bytes | memoryview): 接口返回的二进制数据
+
+    Returns:
+        List[Danmaku]: 弹幕列表
+    """
+    buf = data if isinstance(data, (bytes, memoryview)) else memoryview(data)
+    danmakus = []
+    pos, end = 0, len(buf)
+    while pos < end:
+        tag, pos = read_varint_at(buf, pos)
+        if tag == 0x0A:
+            # field 1, length-delimited: DanmakuElem
+            start, pos = _read_len(buf, pos)
+            danmakus.append(decode_danmaku_elem(buf, start, pos))
+        else:
+            pos = skip_field(buf, pos, tag & 7)
+    return danmakus
+
+
+@_complete
+def decode_danmaku_segment_batch(
+    data: Buffer, batch: Optional[DanmakuBatch] = None
+) -> DanmakuBatch:
+    """
+    解析弹幕分段 (DmSegMobileReply) 二进制数据，直接写入按列存储的 DanmakuBatch。
+
+    Args:
+        data  (bytes | memoryview)  : 接口返回的二进制数据
+
+        batch (DanmakuBatch | None) : 追加到的弹幕集合，为 None 时新建. Defaults to None.
+
+    Returns:
+        DanmakuBatch: 弹幕集合
+    """
+    if batch is None:
+        batch = DanmakuBatch()
+    buf = data if isinstance(data, (bytes, memoryview)) else memoryview(data)
+    append_fields = batch.append_fields
+    pos, end = 0, len(buf)
+    while pos < end:
+        tag, pos = read_varint_at(buf, pos)
+        if tag == 0x0A:
+            start, pos = _read_len(buf, pos)
+            append_fields(**decode_message(buf, start, pos, DANMAKU_ELEM_FIELDS))
+        else:
+            pos = skip_field(buf, pos, tag & 7)
+    return batch
+
+
+@_complete
+def decode_special_danmakus(data: Buffer) -> List[SpecialDanmaku]:
+    """
+    解析特殊弹幕二进制数据。
+
+    Args:
+        data (bytes | memoryview): 特殊弹幕文件内容
+
+    Returns:
+        List[SpecialDanmaku]: 特殊弹幕列表
+    """
+    buf = data if isinstance(data, (bytes, memoryview)) else memoryview(data)
+    dms = []
+    pos, end = 0, len(buf)
+    while pos < end:
+        tag, pos = read_varint_at(buf, pos)
+        if tag == 0x0A:
+            start, pos = _read_len(buf, pos)
+            dms.append(
+                SpecialDanmaku.from_dict(
+                    decode_message(buf, start, pos, SPECIAL_DANMAKU_FIELDS)
+                )
+            )
+        else:
+            pos = skip_field(buf, pos, tag & 7)
+    return dms
+
+
+def _decode_image_danmakus(buf: Buffer, pos: int, end: int) -> List[dict]:
+    image_list = []
+    while pos < end:
+        tag, pos = read_varint_at(buf, pos)
+        if tag >> 3 != 1:
+            raise ResponseException("解析响应数据错误")
+        details_dict: Dict[str, Any] = {"texts": []}
+        d_pos, d_end = _read_len(buf, pos)
+        pos = d_end
+        while d_pos < d_end:
+            d_tag, d_pos = read_varint_at(buf, d_pos)
+            field = d_tag >> 3
+            if field == 1:
+                text, d_pos = _read_value(buf, d_pos, _STRING)
+                details_dict["texts"].append(text)
+            elif field == 2:
+                details_dict["image"], d_pos = _read_value(buf, d_pos, _STRING)
+            elif field == 3:
+                i_pos, d_pos = _read_len(buf, d_pos)
+                while i_pos < d_pos:
+                    i_tag, i_pos = read_varint_at(buf, i_pos)
+                    if i_tag >> 3 != 2:
+                        raise ResponseException("解析响应数据错误")
+                    details_dict["id"], i_pos = read_varint_at(buf, i_pos)
+            else:
+                d_pos = skip_field(buf, d_pos, d_tag & 7)
+        image_list.append(details_dict)
+    return image_list
+
+
+@_complete
+def decode_danmaku_view(data: Buffer) -> dict:
+    """
+    解析弹幕设置、特殊弹幕、弹幕分段等信息 (DmWebViewReply) 的二进制数据。
+
+    Args:
+        data (bytes | memoryview): 接口返回的二进制数据
+
+    Returns:
+        dict: 解析结果
+    """
+    buf = data if isinstance(data, (bytes, memoryview)) else memoryview(data)
+    json_data: Dict[str, Any] = {}
+    pos, end = 0, len(buf)
+    while pos < end:
+        tag, pos = read_varint_at(buf, pos)
+        field, wire_type = tag >> 3, tag & 7
+        spec = DM_VIEW_FIELDS.get(field)
+        if spec is not None and _EXPECTED_WIRE[spec[1]] == wire_type:
+            json_data[spec[0]], pos = _read_value(buf, pos, spec[1])
+        elif wire_type != WIRE_LEN:
+            pos = skip_field(buf, pos, wire_type)
+        elif field == 6:
+            value, pos = _read_value(buf, pos, _STRING)
+            json_data.setdefault("special_dms", []).append(value)
+        else:
+            start, pos = _read_len(buf, pos)
+            if field == 4:
+                json_data["dm_seg"] = decode_message(buf, start, pos, DM_SEG_FIELDS)
+            elif field == 5:
+                json_data["flag"] = decode_message(buf, start, pos, DM_FLAG_FIELDS)
+            elif field == 9:
+                json_data.setdefault("command_dms", []).append(
+                    decode_message(buf, start, pos, COMMAND_DM_FIELDS)
+                )
+            elif field == 10:
+                json_data["dm_setting"] = decode_message(
+                    buf, start, pos, DM_SETTING_FIELDS
+                )
+            elif field == 12:
+                json_data["image_dms"] = _decode_image_danmakus(buf, start, pos)
+    return json_data
+
+
+async def fetch_danmaku_segment(
+    url: str, params: dict, credential: Credential, columnar: bool = False
+) -> Union[List[Danmaku], DanmakuBatch, None]:
+    """
+    获取并解析一段弹幕。
+
+    Args:
+        url        (str)           : 接口地址
+
+        params     (dict)          : 请求参数
+
+        credential (Credential)    : 凭据类
+
+        columnar   (bool, optional): 是否解析为 DanmakuBatch. Defaults to False.
+
+    Returns:
+        List[Danmaku] | DanmakuBatch | None: 弹幕，响应不含 content-type 时（已无更多数据）为 None。
+    """
+    config = {}
+    config["url"] = url
+    config["params"] = params
+    config["headers"] = {
+        "Referer": "https://www.bilibili.com",
+        "User-Agent": "Mozilla/5.0",
+    }
+    config["cookies"] = credential.get_cookies()
+
+    try:
+        req = await get_session().get(**config)
+    except Exception as e:
+        raise NetworkException(-1, str(e))
+
+    if "content-type" not in req.headers.keys():
+        return None
+    else:
+        content_type = req.headers["content-type"]
+        if content_type != "application/octet-stream":
+            raise ResponseException("返回数据类型错误：")
+
+    # 解析二进制流数据
+    data = req.read()
+    if data == b"\x10\x01":
+        # 视频弹幕被关闭
+        raise DanmakuClosedException()
+
+    if columnar:
+        return decode_danmaku_segment_batch(data)
+    return decode_danmaku_segment(data)
+
+
+async def iter_danmaku_segments(
+    url: str,
+    params: dict,
+    segments: Iterable[Optional[int]],
+    credential: Credential,
+    concurrency: int = 1,
+    columnar: bool = False,
+) -> AsyncGenerator[Tuple[Optional[int], Union[List[Danmaku], DanmakuBatch]], None]:
+    """
+    按顺序逐段获取弹幕，最多同时进行 concurrency 个请求。
+
+    某一段返回无数据时停止，之后已发出的请求会被取消。
+
+    Args:
+        url         (str)                    : 接口地址
+
+        params      (dict)                   : 请求参数（不含 segment_index）
+
+        segments    (Iterable[int | None])   : 段号（0 开始编号），为 None 时不传 segment_index（如历史弹幕）
+
+        credential  (Credential)             : 凭据类
+
+        concurrency (int, optional)          : 最大并发请求数. Defaults to 1.
+
+        columnar    (bool, optional)         : 是否将每段解析为 DanmakuBatch. Defaults to False.
+
+    Returns:
+        AsyncGenerator[Tuple[int | None, List[Danmaku] | DanmakuBatch], None]: 段号与该段弹幕
+    """
+    if concurrency < 1:
+        raise ArgsException("concurrency 必须大于 0。")
+
+    def create_task(seg: Optional[int]) -> "asyncio.Task":
+        seg_params = params.copy()
+        if seg is not None:
+            seg_params["segment_index"] = seg + 1
+        return asyncio.ensure_future(
+            fetch_danmaku_segment(url, seg_params, credential, columnar)
+        )
+
+    segments = iter(segments)
+    pending: deque = deque()
+    try:
+        for seg in segments:
+            pending.append((seg, create_task(seg)))
+            if len(pending) >= concurrency:
+                break
+        while pending:
+            seg, task = pending.popleft()
+            danmakus = await task
+            if danmakus is None:
+                break
+            for next_seg in segments:
+                pending.append((next_seg, create_task(next_seg)))
+                break
+            yield seg, danmakus
+    finally:
+        for _, task in pending:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # 取出异常，避免 "Task exception was never retrieved"
+                task.exception()
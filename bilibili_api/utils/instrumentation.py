@@ -0,0 +1,308 @@
+"""
+bilibili_api.utils.instrumentation
+
+Api 请求的结构化监控：每次实际发送请求后向已注册的回调报告耗时与结果，
+并提供可导出为 Prometheus 文本格式的内置耗时直方图。
+"""
+
+import time
+import bisect
+import threading
+from contextvars import ContextVar
+from dataclasses import field, dataclass
+from urllib.parse import urlsplit
+from typing import Any, Dict, List, Tuple, Union, Callable, Optional
+
+from .. import settings
+
+# 当前是第几次重试（0 为首次请求），由重试装饰器设置
+current_attempt: ContextVar[int] = ContextVar("current_attempt", default=0)
+
+# 耗时直方图默认的桶（秒）
+DEFAULT_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class RequestEvent:
+    """
+    一次实际发送的 Api 请求（每次重试单独报告，命中缓存或合并的请求不报告）
+
+    endpoint (str): 接口，为 `主机 + 路径`
+
+    method (str): 请求方法
+
+    comment (str): 接口说明，即 Api.comment
+
+    client (str): 使用的 HTTP 客户端，httpx 或 aiohttp
+
+    attempt (int): 第几次重试，0 为首次请求
+
+    status (int | None): HTTP 状态码，未收到响应时为 None
+
+    code (int | None): 接口返回的 code，未解析到时为 None
+
+    bytes (int): 响应体大小
+
+    elapsed (float): 总耗时（秒），不含 queue_time
+
+    queue_time (float): 在限速器中等待的时间（秒）
+
+    dns (float | None): DNS 解析耗时（秒），仅 aiohttp 且新建连接时存在
+
+    connect (float | None): 建立连接耗时（秒），新建连接时存在。httpx 包含 DNS 解析
+
+    ttfb (float | None): 从发送请求到收到响应头的耗时（秒）
+
+    error (str | None): 失败时的异常类名
+    """
+
+    endpoint: str
+    method: str
+    comment: str = ""
+    client: str = ""
+    attempt: int = 0
+    status: Optional[int] = None
+    code: Optional[int] = None
+    bytes: int = 0
+    elapsed: float = 0.0
+    queue_time: float = 0.0
+    dns: Optional[float] = None
+    connect: Optional[float] = None
+    ttfb: Optional[float] = None
+    error: Optional[str] = None
+    _marks: Dict[str, float] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def success(self) -> bool:
+        """
+        请求是否成功
+        """
+        return self.error is None
+
+    def mark(self, name: str) -> None:
+        """
+        记录某个阶段的时间点
+        """
+        self._marks[name] = time.perf_counter()
+
+    def _span(self, start: str, end: str) -> Optional[float]:
+        if start in self._marks and end in self._marks:
+            return self._marks[end] - self._marks[start]
+        return None
+
+    def _on_httpx_trace(self, name: str) -> None:
+        if name == "connection.connect_tcp.started":
+            self.mark("connect_start")
+        elif name == "connection.connect_tcp.complete":
+            self.mark("connect_end")
+        elif name.endswith(".send_request_headers.started"):
+            self.mark("request_start")
+        elif name.endswith(".receive_response_headers.complete"):
+            self.mark("headers_received")
+
+    def httpx_trace(self, name: str, info: dict) -> None:
+        """
+        httpx.Client 的 trace 回调
+        """
+        self._on_httpx_trace(name)
+
+    async def httpx_trace_async(self, name: str, info: dict) -> None:
+        """
+        httpx.AsyncClient 的 trace 回调
+        """
+        self._on_httpx_trace(name)
+
+    def finish(self, start: float, error: Union[BaseException, None] = None) -> None:
+        """
+        请求结束时计算各阶段耗时
+        """
+        self.elapsed = time.perf_counter() - start
+        self.dns = self._span("dns_start", "dns_end")
+        self.connect = self._span("connect_start", "connect_end")
+        self.ttfb = self._span("request_start", "headers_received")
+        if error is not None:
+            self.error = type(error).__name__
+            self.status = getattr(error, "status", self.status)
+            self.code = getattr(error, "code", self.code)
+
+
+def endpoint_of(url: str) -> str:
+    """
+    获取请求地址对应的接口名（`主机 + 路径`）
+    """
+    parts = urlsplit(url)
+    return (parts.hostname or "") + parts.path
+
+
+class RequestMetrics:
+    """
+    按接口、请求方法与返回 code 统计请求耗时直方图、响应大小与重试次数，可导出为 Prometheus 文本格式。
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """
+        Args:
+            buckets (Tuple[float, ...], optional): 耗时直方图的桶上界（秒）. Defaults to DEFAULT_BUCKETS.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.__lock = threading.Lock()
+        # (endpoint, method, code) -> [各桶计数..., 总数, 耗时总和, 响应大小总和, 重试次数]
+        self.__series: Dict[Tuple[str, str, str], List[float]] = {}
+
+    def observe(self, event: RequestEvent) -> None:
+        """
+        记录一次请求，可直接作为回调传给 add_request_hook
+
+        Args:
+            event (RequestEvent): 请求事件
+        """
+        code = str(event.code) if event.code is not None else event.error or "none"
+        key = (event.endpoint, event.method, code)
+        index = bisect.bisect_left(self.buckets, event.elapsed)
+        with self.__lock:
+            series = self.__series.get(key)
+            if series is None:
+                series = self.__series[key] = [0] * (len(self.buckets) + 4)
+            if index < len(self.buckets):
+                series[index] += 1
+            n = len(self.buckets)
+            series[n] += 1
+            series[n + 1] += event.elapsed
+            series[n + 2] += event.bytes
+            series[n + 3] += 1 if event.attempt else 0
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        获取各接口的统计数据，按总耗时从高到低排列
+
+        Returns:
+            List[dict]: endpoint、method、code、count、sum、mean、bytes、retries
+        """
+        n = len(self.buckets)
+        with self.__lock:
+            items = [(k, list(v)) for k, v in self.__series.items()]
+        result = []
+        for (endpoint, method, code), series in items:
+            result.append(
+                {
+                    "endpoint": endpoint,
+                    "method": method,
+                    "code": code,
+                    "count": int(series[n]),
+                    "sum": series[n + 1],
+                    "mean": series[n + 1] / series[n],
+                    "bytes": int(series[n + 2]),
+                    "retries": int(series[n + 3]),
+                }
+            )
+        result.sort(key=lambda item: item["sum"], reverse=True)
+        return result
+
+    def to_prometheus(self, prefix: str = "bilibili_api") -> str:
+        """
+        导出为 Prometheus 文本格式
+
+        Args:
+            prefix (str, optional): 指标名前缀. Defaults to "bilibili_api".
+
+        Returns:
+            str: Prometheus 文本格式的指标
+        """
+        n = len(self.buckets)
+        with self.__lock:
+            items = sorted((k, list(v)) for k, v in self.__series.items())
+        duration = f"{prefix}_request_duration_seconds"
+        size = f"{prefix}_response_bytes_total"
+        retries = f"{prefix}_request_retries_total"
+        lines = [
+            f"# HELP {duration} Api 请求耗时",
+            f"# TYPE {duration} histogram",
+        ]
+        for (endpoint, method, code), series in items:
+            labels = _labels(endpoint=endpoint, method=method, code=code)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{duration}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{duration}_bucket{{{labels},le="+Inf"}} {int(series[n])}')
+            lines.append(f"{duration}_sum{{{labels}}} {series[n + 1]}")
+            lines.append(f"{duration}_count{{{labels}}} {int(series[n])}")
+        lines += [f"# HELP {size} Api 响应体大小总和", f"# TYPE {size} counter"]
+        for (endpoint, method, code), series in items:
+            labels = _labels(endpoint=endpoint, method=method, code=code)
+            lines.append(f"{size}{{{labels}}} {int(series[n + 2])}")
+        lines += [f"# HELP {retries} Api 重试请求数", f"# TYPE {retries} counter"]
+        for (endpoint, method, code), series in items:
+            labels = _labels(endpoint=endpoint, method=method, code=code)
+            lines.append(f"{retries}{{{labels}}} {int(series[n + 3])}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """
+        清空统计数据
+        """
+        with self.__lock:
+            self.__series.clear()
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{k}="{escape(v)}"' for k, v in labels.items())
+
+
+__hooks: List[Callable[[RequestEvent], None]] = []
+__request_metrics = RequestMetrics()
+
+
+def add_request_hook(hook: Callable[[RequestEvent], None]) -> None:
+    """
+    注册请求回调，每次实际发送 Api 请求后以 RequestEvent 调用。回调中的异常会被记录并忽略。
+
+    Args:
+        hook (Callable[[RequestEvent], None]): 回调函数
+    """
+    if hook not in __hooks:
+        __hooks.append(hook)
+
+
+def remove_request_hook(hook: Callable[[RequestEvent], None]) -> None:
+    """
+    移除请求回调
+
+    Args:
+        hook (Callable[[RequestEvent], None]): 回调函数
+    """
+    if hook in __hooks:
+        __hooks.remove(hook)
+
+
+def get_request_metrics() -> RequestMetrics:
+    """
+    获取内置的请求统计，开启 settings.request_metrics 后记录
+
+    Returns:
+        RequestMetrics: 请求统计
+    """
+    return __request_metrics
+
+
+def instrumentation_enabled() -> bool:
+    """
+    是否需要收集请求事件
+    """
+    return bool(__hooks) or settings.request_metrics
+
+
+def emit(event: RequestEvent) -> None:
+    """
+    向内置统计与所有回调报告请求事件
+    """
+    if settings.request_metrics:
+        __request_metrics.observe(event)
+    for hook in list(__hooks):
+        try:
+            hook(event)
+        except Exception as e:
+            settings.logger.warning("请求回调 %r 出错：%s", hook, e)
@@ -0,0 +1,108 @@
+"""
+bilibili_api.utils.json_decoder
+
+接口返回数据的 JSON 解码，安装了 orjson / ujson 时优先使用。
+"""
+
+import json
+import importlib
+from typing import Any, Dict, Tuple, Union, Callable
+
+from .. import settings
+
+Decoder = Callable[[bytes], Any]
+
+# settings.json_decoder 为 "auto" 时按顺序尝试
+AUTO_BACKENDS = ("orjson", "ujson", "json")
+
+__decoders: Dict[str, Decoder] = {}
+__resolved: Tuple[Any, Union[Decoder, None]] = (None, None)
+
+
+def _load_backend(name: str) -> Union[Decoder, None]:
+    """
+    加载 JSON 库的 loads 函数，未安装时返回 None
+    """
+    if name not in __decoders:
+        try:
+            __decoders[name] = importlib.import_module(name).loads
+        except ImportError:
+            return None
+    return __decoders[name]
+
+
+def get_json_decoder() -> Decoder:
+    """
+    获取当前使用的 JSON 解码函数，见 settings.json_decoder
+
+    Returns:
+        Callable[[bytes], Any]: 解码函数
+    """
+    global __resolved
+    option = settings.json_decoder
+    cached_option, decoder = __resolved
+    if decoder is not None and cached_option == option:
+        return decoder
+    if callable(option):
+        decoder = option
+    elif option == "auto":
+        decoder = next(
+            d for d in map(_load_backend, AUTO_BACKENDS) if d is not None
+        )
+    else:
+        decoder = _load_backend(option)
+        if decoder is None:
+            settings.logger.warning("未安装 %s，使用 json 解码", option)
+            decoder = json.loads
+    __resolved = (option, decoder)
+    return decoder
+
+
+def strip_jsonp(data: Union[bytes, str]) -> Union[bytes, str]:
+    """
+    去掉 JSONP 的回调函数包裹，保留第一个 `{` 到最后一个 `}` 之间的内容
+
+    Args:
+        data (bytes | str): JSONP 响应
+
+    Returns:
+        bytes | str: JSON 内容，找不到 `{` / `}` 时原样返回
+    """
+    if isinstance(data, bytes):
+        start, end = data.find(b"{"), data.rfind(b"}")
+    else:
+        start, end = data.find("{"), data.rfind("}")
+    if start == -1 or end < start:
+        return data
+    return data[start : end + 1]
+
+
+def decode_json(data: Union[bytes, str], jsonp: bool = False) -> Any:
+    """
+    解码 JSON / JSONP
+
+    解码失败时统一抛出 json.JSONDecodeError，与使用的 JSON 库无关
+
+    Args:
+        data  (bytes | str)   : 响应内容
+
+        jsonp (bool, optional): 是否为 JSONP. Defaults to False.
+
+    Returns:
+        Any: 解码结果
+    """
+    if jsonp:
+        data = strip_jsonp(data)
+    decoder = get_json_decoder()
+    if decoder is not json.loads:
+        try:
+            return decoder(data)
+        except ValueError:
+            # orjson / ujson 不支持的内容（如 NaN、超过 64 位的整数）交给 json 再试一次
+            pass
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        raise
+    except ValueError as e:
+        raise json.JSONDecodeError(str(e), "", 0) from e
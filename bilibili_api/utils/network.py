@@ -4,36 +4,71 @@ bilibili_api.utils.network
 与网络请求相关的模块。能对会话进行管理（复用 TCP 连接）。
 """
 
-import re
+import os
 import json
 import time
 import atexit
 import asyncio
 import hashlib
 import hmac
-from functools import reduce
+import threading
+import weakref
+from functools import reduce, lru_cache
 from urllib.parse import urlencode
+from types import MappingProxyType
 from dataclasses import field, dataclass
-from typing import Any, Dict, Union, Coroutine, Type
+from typing import Any, Dict, List, Union, Callable, Coroutine, Tuple, Type
 from inspect import iscoroutinefunction as isAsync
 from urllib.parse import quote
 
 import httpx
 import aiohttp
 
-from .sync import sync
+from .sync import sync, run_in_background
 from .. import settings
 from .utils import get_api
 from .credential import Credential
+from .credential_pool import PoolPolicy, CredentialPool
+from .proxy_pool import select_proxy, get_proxy_pool
+from .response_cache import MISSING, get_response_cache, make_request_key
+from .json_decoder import decode_json
+from .instrumentation import (
+    RequestEvent,
+    emit,
+    endpoint_of,
+    current_attempt,
+    instrumentation_enabled,
+)
+from .rate_limit import get_rate_limiter, is_risk_control
+from .retry import get_retry_policy
+from .session_factory import (
+    close_later,
+    pool_stats,
+    session_key,
+    report_pool_stats,
+    create_aiohttp_session,
+    create_httpx_client,
+    create_httpx_async_client,
+)
 from ..exceptions import ApiException, ResponseCodeException, NetworkException, ExClimbWuzhiException
 from .exclimbwuzhi import *
 
 __httpx_session_pool: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
 __aiohttp_session_pool: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
 __httpx_sync_session: httpx.Client = None
+# 由模块创建的会话及创建时的设置快照，手动设置的会话不在其中
+__session_keys: "weakref.WeakKeyDictionary[Any, tuple]" = weakref.WeakKeyDictionary()
+# (事件循环，同步会话为 None；代理) -> 通过代理池中的代理发送请求的 httpx 会话
+__proxy_sessions: Dict[tuple, Union[httpx.AsyncClient, httpx.Client]] = {}
+__proxy_sessions_version: Dict[Any, int] = {}
+__inflight_requests: Dict[asyncio.AbstractEventLoop, Dict[tuple, asyncio.Task]] = {}
 last_proxy = ""
 wbi_mixin_key = ""
+wbi_mixin_key_expires = 0.0
 buvid3 = ""
+__bootstrap_cache_loaded = None
+__wbi_mixin_key_lock = threading.Lock()
+__buvid3_lock = threading.Lock()
 
 # 获取密钥时的申必数组
 OE = [
@@ -110,12 +145,21 @@ HEADERS = {
 API = get_api("credential")
 
 
-def retry_sync(times: int = 3):
+def _retry_target(args: tuple) -> Tuple[str, str]:
+    # 被装饰的是 Api 的方法时，按请求地址所属主机熔断，按请求方法判断能否重试
+    if not args:
+        return "", "GET"
+    return getattr(args[0], "url", ""), getattr(args[0], "method", "GET")
+
+
+def retry_sync(times: Union[int, None] = None):
     """
     重试装饰器
 
+    可重试的错误（见 RetryPolicy.is_retryable）会在指数退避后重试，-403 时重新获取 wbi_mixin_key 后立即重试。
+
     Args:
-        times (int): 最大重试次数 默认 3 次 负数则一直重试直到成功
+        times (int | None): 最大尝试次数 负数则一直重试直到成功 为 None 时每次调用读取 settings.wbi_retry_times
 
     Returns:
         Any: 原函数调用结果
@@ -123,19 +167,21 @@ def retry_sync(times: int = 3):
 
     def wrapper(func):
         def inner(*args, **kwargs):
-            # 这里必须新建一个变量用来计数！！不能直接对 times 操作！！！
-            nonlocal times
-            loop = times
-            while loop != 0:
-                if loop != times and settings.request_log:
-                    settings.logger.info("第 %d 次重试", times - loop)
-                loop -= 1
+            policy = get_retry_policy()
+            url, method = _retry_target(args)
+            total = settings.wbi_retry_times if times is None else times
+            policy.on_request()
+            attempt = 0
+            while attempt != total:
+                if attempt and settings.request_log:
+                    settings.logger.info("第 %d 次重试", attempt)
+                attempt += 1
+                policy.before_attempt(url)
+                token = current_attempt.set(attempt - 1)
                 try:
-                    return func(*args, **kwargs)
-                except json.decoder.JSONDecodeError:
-                    # json 解析错误 说明数据获取有误 再给次机会
-                    continue
+                    result = func(*args, **kwargs)
                 except ResponseCodeException as e:
+                    policy.record(url, e)
                     # -403 时尝试重新获取 wbi_mixin_key 可能过期了
                     if e.code == -403:
                         global wbi_mixin_key
@@ -143,6 +189,24 @@ def retry_sync(times: int = 3):
                         continue
                     # 不是 -403 错误直接报错
                     raise
+                except Exception as e:
+                    policy.record(url, e)
+                    if (
+                        not policy.is_retryable(e, method)
+                        or attempt == total
+                        or not policy.allow_retry()
+                    ):
+                        raise
+                    time.sleep(policy.delay(attempt))
+                    continue
+                except BaseException as e:
+                    # 被取消时也要报告，否则熔断器可能一直等待探测请求的结果
+                    policy.record(url, e)
+                    raise
+                finally:
+                    current_attempt.reset(token)
+                policy.record(url, None)
+                return result
             raise ApiException("重试达到最大次数")
 
         return inner
@@ -150,12 +214,14 @@ def retry_sync(times: int = 3):
     return wrapper
 
 
-def retry(times: int = 3):
+def retry(times: Union[int, None] = None):
     """
     重试装饰器
 
+    可重试的错误（见 RetryPolicy.is_retryable）会在指数退避后重试，-403 时重新获取 wbi_mixin_key 后立即重试。
+
     Args:
-        times (int): 最大重试次数 默认 3 次 负数则一直重试直到成功
+        times (int | None): 最大尝试次数 负数则一直重试直到成功 为 None 时每次调用读取 settings.wbi_retry_times
 
     Returns:
         Any: 原函数调用结果
@@ -163,19 +229,21 @@ def retry(times: int = 3):
 
     def wrapper(func: Coroutine):
         async def inner(*args, **kwargs):
-            # 这里必须新建一个变量用来计数！！不能直接对 times 操作！！！
-            nonlocal times
-            loop = times
-            while loop != 0:
-                if loop != times and settings.request_log:
-                    settings.logger.info("第 %d 次重试", times - loop)
-                loop -= 1
+            policy = get_retry_policy()
+            url, method = _retry_target(args)
+            total = settings.wbi_retry_times if times is None else times
+            policy.on_request()
+            attempt = 0
+            while attempt != total:
+                if attempt and settings.request_log:
+                    settings.logger.info("第 %d 次重试", attempt)
+                attempt += 1
+                policy.before_attempt(url)
+                token = current_attempt.set(attempt - 1)
                 try:
-                    return await func(*args, **kwargs)
-                except json.decoder.JSONDecodeError:
-                    # json 解析错误 说明数据获取有误 再给次机会
-                    continue
+                    result = await func(*args, **kwargs)
                 except ResponseCodeException as e:
+                    policy.record(url, e)
                     # -403 时尝试重新获取 wbi_mixin_key 可能过期了
                     if e.code == -403:
                         global wbi_mixin_key
@@ -183,6 +251,24 @@ def retry(times: int = 3):
                         continue
                     # 不是 -403 错误直接报错
                     raise
+                except Exception as e:
+                    policy.record(url, e)
+                    if (
+                        not policy.is_retryable(e, method)
+                        or attempt == total
+                        or not policy.allow_retry()
+                    ):
+                        raise
+                    await asyncio.sleep(policy.delay(attempt))
+                    continue
+                except BaseException as e:
+                    # 被取消时也要报告，否则熔断器可能一直等待探测请求的结果
+                    policy.record(url, e)
+                    raise
+                finally:
+                    current_attempt.reset(token)
+                policy.record(url, None)
+                return result
             raise ApiException("重试达到最大次数")
 
         return inner
@@ -190,12 +276,93 @@ def retry(times: int = 3):
     if isAsync(times):
         # 防呆不防傻 防止有人 @retry() 不打括号
         func = times
-        times = 3
+        times = None
         return wrapper(func)
 
     return wrapper
 
 
+@lru_cache(maxsize=8)
+def _aiohttp_timeout(timeout: float) -> aiohttp.ClientTimeout:
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+class _Endpoint:
+    """
+    预编译的接口描述：构造 Api 时只需复制参数模板，不必每次重新解析 data/api 中的字段说明
+    """
+
+    __slots__ = (
+        "method",
+        "sources",
+        "data",
+        "params",
+        "files",
+        "headers",
+        "original_data",
+        "original_params",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        data: Union[dict, None],
+        params: Union[dict, None],
+        files: Union[dict, None],
+        headers: Union[dict, None],
+    ) -> None:
+        self.method = method.upper()
+        # 用于判断描述是否来自同一份接口信息（data/api 中的接口每次传入的都是同一个字典）
+        # 未传入的字段每次都是新的空字典，按 None 比较
+        self.sources = tuple(source or None for source in (data, params, files, headers))
+        self.data = dict.fromkeys(data or (), "")
+        self.params = dict.fromkeys(params or (), "")
+        self.files = dict.fromkeys(files or (), "")
+        self.headers = dict.fromkeys(headers or (), "")
+        self.original_data = MappingProxyType(dict(data or {}))
+        self.original_params = MappingProxyType(dict(params or {}))
+
+    def matches(self, *sources: Union[dict, None]) -> bool:
+        return all(a is (b or None) for a, b in zip(self.sources, sources))
+
+
+# (url, method) -> 接口描述
+__endpoints: Dict[tuple, _Endpoint] = {}
+ENDPOINT_CACHE_SIZE = 4096
+
+
+def _compile_endpoint(
+    url: str,
+    method: str,
+    data: Union[dict, None],
+    params: Union[dict, None],
+    files: Union[dict, None],
+    headers: Union[dict, None],
+) -> _Endpoint:
+    """
+    获取接口描述，同一接口只解析一次
+    """
+    key = (url, method)
+    endpoint = __endpoints.get(key)
+    if endpoint is None or not endpoint.matches(data, params, files, headers):
+        endpoint = _Endpoint(method, data, params, files, headers)
+        if len(__endpoints) >= ENDPOINT_CACHE_SIZE:
+            __endpoints.clear()
+        __endpoints[key] = endpoint
+    return endpoint
+
+
+def _clean_values(values: dict) -> dict:
+    """
+    去掉值为 None 的项，并把 bool 转为 int
+    """
+    return {
+        key: int(value) if isinstance(value, bool) else value
+        for key, value in values.items()
+        if value is not None
+    }
+
+
 @dataclass
 class Api:
     """
@@ -223,6 +390,8 @@ class Api:
         params (dict, optional): 请求参数. Defaults to {}.
 
         credential (Credential, optional): 凭据. Defaults to Credential().
+
+        cache_ttl (float, optional): 结果缓存有效期（秒），仅在 settings.response_cache 开启时生效. Defaults to 0.
     """
 
     url: str
@@ -238,30 +407,55 @@ class Api:
     files: dict = field(default_factory=dict)
     headers: dict = field(default_factory=dict)
     credential: Credential = field(default_factory=Credential)
+    cache_ttl: float = 0
 
     def __post_init__(self) -> None:
-        self.method = self.method.upper()
-        self.original_data = self.data.copy()
-        self.original_params = self.params.copy()
-        self.data = {k: "" for k in self.data.keys()}
-        self.params = {k: "" for k in self.params.keys()}
-        self.files = {k: "" for k in self.files.keys()}
-        self.headers = {k: "" for k in self.headers.keys()}
+        endpoint = _compile_endpoint(
+            self.url, self.method, self.data, self.params, self.files, self.headers
+        )
+        self.method = endpoint.method
+        self.data = endpoint.data.copy()
+        self.params = endpoint.params.copy()
+        self.files = endpoint.files.copy()
+        self.headers = endpoint.headers.copy()
         if self.credential is None:
             self.credential = Credential()
+        self.pool: Union[CredentialPool, None] = None
+        self.original_data = endpoint.original_data
+        self.original_params = endpoint.original_params
         self.__result = None
+        self.__result_state = None
 
-    def __setattr__(self, __name: str, __value: Any) -> None:
+    def __state(self) -> tuple:
         """
-        每次更新参数都要把 __result 清除
+        当前的请求字段，用于判断暂存的结果是否仍然有效
         """
-        if self.initialized and __name != "_Api__result":
+        return (
+            self.url,
+            self.method,
+            self.wbi,
+            self.verify,
+            self.no_csrf,
+            self.json_body,
+            self.ignore_code,
+            self.data,
+            self.params,
+            self.files,
+            self.headers,
+            self.credential,
+        )
+
+    def __cached_result(self) -> Union[int, str, dict, None]:
+        # 请求后更换过请求字段时丢弃暂存的结果
+        if self.__result is not None and not all(
+            a is b for a, b in zip(self.__result_state, self.__state())
+        ):
             self.__result = None
-        return super().__setattr__(__name, __value)
+        return self.__result
 
-    @property
-    def initialized(self):
-        return "_Api__result" in self.__dict__
+    def __store_result(self, result: Union[int, str, dict]) -> None:
+        self.__result = result
+        self.__result_state = self.__state()
 
     @property
     async def result(self) -> Union[int, str, dict]:
@@ -270,8 +464,8 @@ class Api:
 
         `self.__result` 用来暂存数据 参数不变时获取结果不变
         """
-        if self.__result is None:
-            self.__result = await self.request()
+        if self.__cached_result() is None:
+            self.__store_result(await self.request())
         return self.__result
 
     @property
@@ -283,8 +477,8 @@ class Api:
 
         `self.__result` 用来暂存数据 参数不变时获取结果不变
         """
-        if self.__result is None:
-            self.__result = self.request_sync()
+        if self.__cached_result() is None:
+            self.__store_result(self.request_sync())
         return self.__result
 
     def update_data(self, **kwargs) -> "Api":
@@ -329,18 +523,53 @@ class Api:
             return self.update_data(**kwargs)
 
     def _prepare_params_data(self) -> None:
-        new_params, new_data = {}, {}
-        for key, value in self.params.items():
-            if isinstance(value, bool):
-                new_params[key] = int(value)
-            elif value != None:
-                new_params[key] = value
-        for key, value in self.data.items():
-            if isinstance(value, bool):
-                new_params[key] = int(value)
-            elif value != None:
-                new_data[key] = value
-        self.params, self.data = new_params, new_data
+        self.params = _clean_values(self.params)
+        self.data = _clean_values(self.data)
+
+    def _select_credential(self) -> bool:
+        """
+        使用凭据池时为本次请求选出凭据
+
+        Returns:
+            bool: 是否需要为选出的凭据单独获取 buvid3
+        """
+        credential = self.credential
+        if isinstance(credential, CredentialPool):
+            self.pool = credential
+        elif self.pool is None or not self.pool.owns(credential):
+            # 请求之间手动更换了凭据
+            self.pool = None
+            return False
+        pool = self.pool
+        resource = None
+        if pool.policy == PoolPolicy.STICKY:
+            resource = pool.resource_of(
+                self.url, self.params if self.method == "GET" else self.data
+            )
+        self.credential = pool.select(
+            resource,
+            require_login=self.verify or (self.method != "GET" and not self.no_csrf),
+        )
+        if not self.no_csrf:
+            # 调用方填入的 csrf 读取自池中第一个可用的凭据，需与选出的凭据一致
+            bili_jct = self.credential.bili_jct
+            for values in (self.params, self.data):
+                for key in ("csrf", "csrf_token"):
+                    if key in values:
+                        values[key] = bili_jct
+        return pool.isolate_buvid3 and self.credential.buvid3 is None
+
+    def _get_request_key(self, raw: bool, kwargs: dict) -> Union[tuple, None]:
+        """
+        获取用于结果缓存与合并并发请求的键，不可缓存 / 合并时返回 None
+
+        仅处理无额外请求配置、无载荷的 GET 请求
+        """
+        if self.method != "GET" or kwargs or self.data or self.files:
+            return None
+        return make_request_key(
+            self.url, self.method, self.params, self.credential, raw
+        )
 
     def _prepare_request_sync(self, **kwargs) -> dict:
         """
@@ -368,10 +597,7 @@ class Api:
             self.params["callback"] = "callback"
 
         if self.wbi:
-            global wbi_mixin_key
-            if wbi_mixin_key == "":
-                wbi_mixin_key = get_mixin_key_sync()
-            enc_wbi(self.params, wbi_mixin_key)
+            enc_wbi(self.params, _get_wbi_mixin_key_sync())
 
         # 自动添加 csrf
         if (
@@ -382,15 +608,13 @@ class Api:
             self.data["csrf"] = self.credential.bili_jct
             self.data["csrf_token"] = self.credential.bili_jct
 
-        cookies = self.credential.get_cookies()
-
+        # 凭据缓存的 Cookies 字典为共享的，需要修改时复制一份
+        cookies = self.credential.get_cookies_view()
         if self.credential.buvid3 is None:
-            global buvid3
-            if buvid3 == "" and self.url != API["info"]["spi"]["url"]:
-                buvid3 = get_spi_buvid_sync()["b_3"]
-            cookies["buvid3"] = buvid3
-        else:
-            cookies["buvid3"] = self.credential.buvid3
+            if self.url != API["info"]["spi"]["url"]:
+                cookies = {**cookies, "buvid3": _get_buvid3_sync()}
+            else:
+                cookies = {**cookies, "buvid3": buvid3}
         # cookies["Domain"] = ".bilibili.com"
 
         config = {
@@ -400,13 +624,14 @@ class Api:
             "params": self.params,
             "files": self.files,
             "cookies": cookies,
-            "headers": HEADERS.copy() if len(self.headers) == 0 else self.headers,
+            # HTTP 客户端不会修改传入的请求头，未指定时直接使用共享的 HEADERS
+            "headers": HEADERS if len(self.headers) == 0 else self.headers,
             "timeout": settings.timeout,
         }
         config.update(kwargs)
 
         if self.json_body:
-            config["headers"]["Content-Type"] = "application/json"
+            config["headers"] = {**config["headers"], "Content-Type": "application/json"}
             config["data"] = json.dumps(config["data"])
 
         return config
@@ -437,10 +662,7 @@ class Api:
             self.params["callback"] = "callback"
 
         if self.wbi:
-            global wbi_mixin_key
-            if wbi_mixin_key == "":
-                wbi_mixin_key = await get_mixin_key()
-            enc_wbi(self.params, wbi_mixin_key)
+            enc_wbi(self.params, await _get_wbi_mixin_key())
 
         # 自动添加 csrf
         if (
@@ -451,17 +673,13 @@ class Api:
             self.data["csrf"] = self.credential.bili_jct
             self.data["csrf_token"] = self.credential.bili_jct
 
-        cookies = self.credential.get_cookies()
-
+        # 凭据缓存的 Cookies 字典为共享的，需要修改时复制一份
+        cookies = self.credential.get_cookies_view()
         if self.credential.buvid3 is None:
-            global buvid3
-            if buvid3 == "" and self.url != API["info"]["spi"]["url"]:
-                resp = await get_spi_buvid()
-                buvid3 = resp["b_3"]
-                await active_buvid(buvid3, resp["b_4"])
-            cookies["buvid3"] = buvid3
-        else:
-            cookies["buvid3"] = self.credential.buvid3
+            if self.url != API["info"]["spi"]["url"]:
+                cookies = {**cookies, "buvid3": await _get_buvid3()}
+            else:
+                cookies = {**cookies, "buvid3": buvid3}
         # cookies["Domain"] = ".bilibili.com"
 
         config = {
@@ -471,17 +689,18 @@ class Api:
             "params": self.params,
             "files": self.files,
             "cookies": cookies,
-            "headers": HEADERS.copy() if len(self.headers) == 0 else self.headers,
+            # HTTP 客户端不会修改传入的请求头，未指定时直接使用共享的 HEADERS
+            "headers": HEADERS if len(self.headers) == 0 else self.headers,
             "timeout": (
                 settings.timeout
                 if settings.http_client == settings.HTTPClient.HTTPX
-                else aiohttp.ClientTimeout(total=settings.timeout)
+                else _aiohttp_timeout(settings.timeout)
             ),
         }
         config.update(kwargs)
 
         if self.json_body:
-            config["headers"]["Content-Type"] = "application/json"
+            config["headers"] = {**config["headers"], "Content-Type": "application/json"}
             config["data"] = json.dumps(config["data"])
 
         if settings.http_client == settings.HTTPClient.AIOHTTP and not self.json_body:
@@ -500,37 +719,102 @@ class Api:
 
         return config
 
-    def _get_resp_text_sync(self, resp: httpx.Response):
-        return resp.text
+    def _get_resp_content_sync(self, resp: httpx.Response) -> bytes:
+        return resp.content
 
-    async def _get_resp_text(self, resp: Union[httpx.Response, aiohttp.ClientResponse]):
+    async def _get_resp_content(
+        self, resp: Union[httpx.Response, aiohttp.ClientResponse]
+    ) -> bytes:
         if isinstance(resp, httpx.Response):
-            return resp.text
+            return resp.content
         else:
-            return await resp.text()
+            return await resp.read()
 
-    @retry_sync(times=settings.wbi_retry_times)
     def request_sync(self, raw: bool = False, **kwargs) -> Union[int, str, dict]:
         """
         向接口发送请求。
 
+        开启 settings.sync_background_loop 时在后台事件循环中执行异步请求，与 sync() 共用会话，
+        否则使用 httpx.Client 发送请求。
+
         Returns:
             接口未返回数据时，返回 None，否则返回该接口提供的 data 或 result 字段的数据。
         """
+        if settings.sync_background_loop:
+            return run_in_background(self.request(raw, **kwargs))
+        return self._request_sync(raw, **kwargs)
+
+    @retry_sync()
+    def _request_sync(self, raw: bool = False, **kwargs) -> Union[int, str, dict]:
+        """
+        使用 httpx.Client 向接口发送请求。
+        """
         self._prepare_params_data()
-        config = self._prepare_request_sync(**kwargs)
-        session = get_httpx_sync_session()
-        resp = session.request(**config)
-        try:
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            raise NetworkException(resp.status_code, str(resp.status_code))
-        real_data = self._process_response(
-            resp, self._get_resp_text_sync(resp), raw=raw
+        if self._select_credential():
+            _assign_buvid3_sync(self.credential)
+        request_key = self._get_request_key(raw, kwargs)
+        use_cache = (
+            request_key is not None and settings.response_cache and self.cache_ttl > 0
         )
+        if use_cache:
+            cached = get_response_cache().get(request_key)
+            if cached is not MISSING:
+                return cached
+        event = self._new_event("httpx") if instrumentation_enabled() else None
+        limiter = get_rate_limiter()
+        start = time.perf_counter()
+        limiter.acquire_sync(self.url, self.credential)
+        if event is not None:
+            event.queue_time = time.perf_counter() - start
+            start = time.perf_counter()
+        proxy = None
+        sent = start
+        try:
+            config = self._prepare_request_sync(**kwargs)
+            if event is not None:
+                config["extensions"] = {"trace": event.httpx_trace}
+            proxy = select_proxy()
+            sent = time.perf_counter()
+            session = (
+                get_httpx_sync_session()
+                if proxy is None
+                else _get_proxy_session(proxy, sync=True)
+            )
+            resp = session.request(**config)
+            report_pool_stats(session)
+            if event is not None:
+                event.status = resp.status_code
+            try:
+                resp.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                raise NetworkException(resp.status_code, str(resp.status_code))
+            real_data = self._process_response(
+                resp, self._get_resp_content_sync(resp), raw=raw, event=event
+            )
+        except Exception as e:
+            if proxy is not None:
+                get_proxy_pool().report(proxy, time.perf_counter() - sent, e)
+            if is_risk_control(e):
+                limiter.report(self.url, self.credential, True)
+            if self.pool is not None:
+                self.pool.report(self.credential, e)
+            if event is not None:
+                event.finish(start, e)
+                emit(event)
+            raise
+        if proxy is not None:
+            get_proxy_pool().report(proxy, time.perf_counter() - sent)
+        limiter.report(self.url, self.credential, False)
+        if self.pool is not None:
+            self.pool.report(self.credential)
+        if event is not None:
+            event.finish(start)
+            emit(event)
+        if use_cache:
+            get_response_cache().set(request_key, real_data, self.cache_ttl)
         return real_data
 
-    @retry(times=settings.wbi_retry_times)
+    @retry()
     async def request(self, raw: bool = False, **kwargs) -> Union[int, str, dict]:
         """
         向接口发送请求。
@@ -539,37 +823,141 @@ class Api:
             接口未返回数据时，返回 None，否则返回该接口提供的 data 或 result 字段的数据。
         """
         self._prepare_params_data()
+        if self._select_credential():
+            await _assign_buvid3(self.credential)
+        request_key = self._get_request_key(raw, kwargs)
+        use_cache = (
+            request_key is not None and settings.response_cache and self.cache_ttl > 0
+        )
+        if use_cache:
+            cached = get_response_cache().get(request_key)
+            if cached is not MISSING:
+                return cached
+        if request_key is not None and settings.request_coalescing:
+            real_data = await _single_flight(
+                request_key, lambda: self._send(raw, **kwargs)
+            )
+        else:
+            real_data = await self._send(raw, **kwargs)
+        if use_cache:
+            get_response_cache().set(request_key, real_data, self.cache_ttl)
+        return real_data
+
+    async def _send(self, raw: bool = False, **kwargs) -> Union[int, str, dict]:
+        """
+        经过限速器发送请求，并向限速器报告是否遇到风控
+        """
+        event = (
+            self._new_event(settings.http_client.value)
+            if instrumentation_enabled()
+            else None
+        )
+        limiter = get_rate_limiter()
+        start = time.perf_counter()
+        await limiter.acquire(self.url, self.credential)
+        if event is not None:
+            event.queue_time = time.perf_counter() - start
+            start = time.perf_counter()
+        try:
+            real_data = await self._fetch(raw, event, **kwargs)
+        except Exception as e:
+            if is_risk_control(e):
+                limiter.report(self.url, self.credential, True)
+            if self.pool is not None:
+                self.pool.report(self.credential, e)
+            if event is not None:
+                event.finish(start, e)
+                emit(event)
+            raise
+        limiter.report(self.url, self.credential, False)
+        if self.pool is not None:
+            self.pool.report(self.credential)
+        if event is not None:
+            event.finish(start)
+            emit(event)
+        return real_data
+
+    async def _fetch(
+        self, raw: bool = False, event: Union[RequestEvent, None] = None, **kwargs
+    ) -> Union[int, str, dict]:
+        """
+        实际发送请求并处理响应
+        """
         config = await self._prepare_request(**kwargs)
+        proxy = select_proxy()
+        sent = time.perf_counter()
+        try:
+            real_data = await self._request_with_session(config, proxy, raw, event)
+        except Exception as e:
+            if proxy is not None:
+                get_proxy_pool().report(proxy, time.perf_counter() - sent, e)
+            raise
+        if proxy is not None:
+            get_proxy_pool().report(proxy, time.perf_counter() - sent)
+        return real_data
+
+    async def _request_with_session(
+        self,
+        config: dict,
+        proxy: Union[str, None],
+        raw: bool,
+        event: Union[RequestEvent, None],
+    ) -> Union[int, str, dict]:
+        """
+        使用对应的会话发送请求，proxy 为代理池选出的代理（None 为使用 settings.proxy）
+        """
         session: Union[httpx.AsyncClient, aiohttp.ClientSession]
         # 判断http_client的类型
         if settings.http_client == settings.HTTPClient.HTTPX:
-            session = get_session()
+            if event is not None:
+                config["extensions"] = {"trace": event.httpx_trace_async}
+            # httpx 的代理在创建会话时指定，每个代理使用单独的会话（连接池）
+            session = get_session() if proxy is None else _get_proxy_session(proxy)
             resp = await session.request(**config)
+            report_pool_stats(session)
+            if event is not None:
+                event.status = resp.status_code
             try:
                 resp.raise_for_status()
             except httpx.HTTPStatusError as e:
                 raise NetworkException(resp.status_code, str(resp.status_code))
-            real_data = self._process_response(
-                resp, await self._get_resp_text(resp), raw=raw
+            return self._process_response(
+                resp, await self._get_resp_content(resp), raw=raw, event=event
             )
-            return real_data
         elif settings.http_client == settings.HTTPClient.AIOHTTP:
+            if event is not None:
+                config["trace_request_ctx"] = event
+            if proxy is not None:
+                # aiohttp 的连接按代理区分，同一会话中每个代理有各自的连接
+                config["proxy"] = proxy
             session = get_aiohttp_session()
             async with session.request(**config) as resp:
+                report_pool_stats(session)
+                if event is not None:
+                    event.status = resp.status
                 try:
                     resp.raise_for_status()
                 except aiohttp.ClientResponseError as e:
                     raise NetworkException(e.status, e.message)
-                real_data = self._process_response(
-                    resp, await self._get_resp_text(resp), raw=raw
+                return self._process_response(
+                    resp, await self._get_resp_content(resp), raw=raw, event=event
                 )
-                return real_data
+
+    def _new_event(self, client: str) -> RequestEvent:
+        return RequestEvent(
+            endpoint=endpoint_of(self.url),
+            method=self.method,
+            comment=self.comment,
+            client=client,
+            attempt=current_attempt.get(),
+        )
 
     def _process_response(
         self,
         resp: Union[httpx.Response, aiohttp.ClientResponse],
-        resp_text: str,
+        resp_content: Union[bytes, str],
         raw: bool = False,
+        event: Union[RequestEvent, None] = None,
     ) -> Union[int, str, dict]:
         """
         处理接口的响应数据
@@ -579,14 +967,12 @@ class Api:
         if content_length and int(content_length) == 0:
             return None
 
-        if "callback" in self.params:
-            # JSONP 请求
-            resp_data: dict = json.loads(
-                re.match("^.*?({.*}).*$", resp_text, re.S).group(1)
-            )
-        else:
-            # JSON
-            resp_data: dict = json.loads(resp_text)
+        # JSONP 请求带有 callback 参数
+        resp_data: dict = decode_json(resp_content, jsonp="callback" in self.params)
+        if event is not None:
+            event.bytes = len(resp_content)
+            if isinstance(resp_data, dict):
+                event.code = resp_data.get("code")
 
         if raw:
             return resp_data
@@ -638,6 +1024,44 @@ class Api:
         return cls(credential=credential, **api)
 
 
+async def _single_flight(
+    key: tuple, send: Callable[[], Coroutine[Any, Any, Any]]
+) -> Any:
+    """
+    合并同一事件循环中相同的并发请求：第一个请求实际发送，其余请求等待同一个任务的结果。
+
+    共享任务不会因为某个等待者被取消而取消，异常会传递给所有等待者。
+    所有等待者得到的是同一个结果对象，调用方不能修改，需要修改时请先 copy.deepcopy。
+
+    Args:
+        key  (tuple)                                 : 请求键，见 Api._get_request_key
+
+        send (Callable[[], Coroutine[Any, Any, Any]]): 实际发送请求的函数
+
+    Returns:
+        Any: 请求结果
+    """
+    loop = asyncio.get_running_loop()
+    inflight = __inflight_requests.setdefault(loop, {})
+    task = inflight.get(key)
+    leader = task is None
+    if leader:
+        task = loop.create_task(send())
+        inflight[key] = task
+
+        def done(task: asyncio.Task) -> None:
+            if inflight.get(key) is task:
+                del inflight[key]
+            if not inflight and __inflight_requests.get(loop) is inflight:
+                del __inflight_requests[loop]
+            # 所有等待者都被取消时，避免出现 "Task exception was never retrieved"
+            if not task.cancelled():
+                task.exception()
+
+        task.add_done_callback(done)
+    return await asyncio.shield(task)
+
+
 async def check_valid(credential: Credential) -> bool:
     """
     检查 cookies 是否有效
@@ -772,6 +1196,162 @@ async def get_mixin_key() -> str:
     return le[:32]
 
 
+def _load_bootstrap_cache() -> None:
+    """
+    从 settings.bootstrap_cache 读取上次保存的 wbi_mixin_key 与 buvid3，每个文件只读取一次
+    """
+    global __bootstrap_cache_loaded, wbi_mixin_key, wbi_mixin_key_expires, buvid3
+    path = settings.bootstrap_cache
+    if not path or __bootstrap_cache_loaded == path:
+        return
+    __bootstrap_cache_loaded = path
+    try:
+        with open(path, encoding="utf8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if wbi_mixin_key == "" and data.get("wbi_mixin_key_expires", 0) > time.time():
+        wbi_mixin_key = data.get("wbi_mixin_key", "")
+        wbi_mixin_key_expires = data["wbi_mixin_key_expires"]
+    if buvid3 == "":
+        buvid3 = data.get("buvid3", "")
+
+
+def _save_bootstrap_cache() -> None:
+    """
+    将 wbi_mixin_key 与 buvid3 保存到 settings.bootstrap_cache，新进程启动时可以直接使用
+    """
+    path = settings.bootstrap_cache
+    if not path:
+        return
+    data = {
+        "wbi_mixin_key": wbi_mixin_key,
+        "wbi_mixin_key_expires": wbi_mixin_key_expires,
+        "buvid3": buvid3,
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump(data, f)
+        # 先写临时文件再替换，避免多个进程同时写入时读到不完整的文件
+        os.replace(tmp, path)
+    except OSError as e:
+        settings.logger.warning("保存 %s 失败：%s", path, e)
+
+
+def _wbi_mixin_key_valid() -> bool:
+    return wbi_mixin_key != "" and time.time() < wbi_mixin_key_expires
+
+
+def _set_wbi_mixin_key(key: str) -> None:
+    global wbi_mixin_key, wbi_mixin_key_expires
+    wbi_mixin_key = key
+    wbi_mixin_key_expires = time.time() + settings.wbi_mixin_key_ttl
+    _save_bootstrap_cache()
+
+
+def _set_buvid3(value: str) -> None:
+    global buvid3
+    buvid3 = value
+    _save_bootstrap_cache()
+
+
+async def _refresh_wbi_mixin_key() -> str:
+    key = await get_mixin_key()
+    _set_wbi_mixin_key(key)
+    return key
+
+
+async def _refresh_buvid3() -> str:
+    resp = await get_spi_buvid()
+    _set_buvid3(resp["b_3"])
+    await active_buvid(resp["b_3"], resp["b_4"])
+    return resp["b_3"]
+
+
+async def _assign_buvid3(credential: Credential) -> None:
+    """
+    为凭据池中没有 buvid3 的凭据单独获取并激活 buvid3。同一凭据并发的请求只会获取一次。
+    """
+
+    async def fetch() -> str:
+        resp = await get_spi_buvid()
+        await active_buvid(resp["b_3"], resp["b_4"])
+        return resp["b_3"]
+
+    value = await _single_flight(("buvid3", id(credential)), fetch)
+    if credential.buvid3 is None:
+        credential.buvid3 = value
+
+
+def _assign_buvid3_sync(credential: Credential) -> None:
+    """
+    同步为凭据池中没有 buvid3 的凭据单独获取 buvid3
+    """
+    with __buvid3_lock:
+        if credential.buvid3 is None:
+            credential.buvid3 = get_spi_buvid_sync()["b_3"]
+
+
+async def _get_wbi_mixin_key() -> str:
+    """
+    获取 wbi_mixin_key，为空或过期时重新获取。同一事件循环中并发的请求只会获取一次。
+
+    Returns:
+        str: 混合密钥
+    """
+    _load_bootstrap_cache()
+    if _wbi_mixin_key_valid():
+        return wbi_mixin_key
+    return await _single_flight(("wbi_mixin_key",), _refresh_wbi_mixin_key)
+
+
+def _get_wbi_mixin_key_sync() -> str:
+    """
+    同步获取 wbi_mixin_key，为空或过期时重新获取。多个线程同时请求时只会获取一次。
+
+    Returns:
+        str: 混合密钥
+    """
+    _load_bootstrap_cache()
+    if not _wbi_mixin_key_valid():
+        with __wbi_mixin_key_lock:
+            if not _wbi_mixin_key_valid():
+                _set_wbi_mixin_key(get_mixin_key_sync())
+    return wbi_mixin_key
+
+
+async def _get_buvid3() -> str:
+    """
+    获取 buvid3，为空时通过 spi 接口获取并激活。同一事件循环中并发的请求只会获取一次。
+
+    Returns:
+        str: buvid3
+    """
+    _load_bootstrap_cache()
+    if buvid3 != "":
+        return buvid3
+    return await _single_flight(("buvid3",), _refresh_buvid3)
+
+
+def _get_buvid3_sync() -> str:
+    """
+    同步获取 buvid3，为空时通过 spi 接口获取。多个线程同时请求时只会获取一次。
+
+    Returns:
+        str: buvid3
+    """
+    _load_bootstrap_cache()
+    if buvid3 == "":
+        with __buvid3_lock:
+            if buvid3 == "":
+                _set_buvid3(get_spi_buvid_sync()["b_3"])
+    return buvid3
+
+
 def enc_wbi(params: dict, mixin_key: str):
     """
     更新请求参数
@@ -838,21 +1418,22 @@ def get_httpx_sync_session() -> httpx.Client:
     """
     获取当前模块的 httpx.Client 对象，用于自定义请求
 
+    代理或连接池设置改变时会创建新的会话，旧会话在 settings.timeout 秒后关闭。
+
     Returns:
         httpx.Client
     """
     global __httpx_sync_session
-    global last_proxy
 
-    if __httpx_sync_session is None or last_proxy != settings.proxy:
-        if settings.proxy != "":
-            last_proxy = settings.proxy
-            proxies = {"all://": settings.proxy}
-            session = httpx.Client(proxies=proxies)  # type: ignore
-        else:
-            last_proxy = ""
-            session = httpx.Client()
+    key = session_key("httpx")
+    session = __httpx_sync_session
+    if session is None or __session_keys.get(session) not in (None, key):
+        if session is not None:
+            close_later(session)
+            del __session_keys[session]
+        session = create_httpx_client()
         __httpx_sync_session = session
+        __session_keys[session] = key
 
     return __httpx_sync_session
 
@@ -861,6 +1442,8 @@ def set_httpx_sync_session(session: httpx.Client) -> None:
     """
     用户手动设置 Session
 
+    手动设置的会话不会因为代理或连接池设置改变而被替换。
+
     Args:
         session (httpx.Client):  httpx.Client 实例。
     """
@@ -872,21 +1455,21 @@ def get_session() -> httpx.AsyncClient:
     """
     获取当前模块的 httpx.AsyncClient 对象，用于自定义请求
 
+    代理或连接池设置改变时会创建新的会话，旧会话在 settings.timeout 秒后关闭。
+
     Returns:
         httpx.AsyncClient
     """
-    global __httpx_session_pool, last_proxy
     loop = asyncio.get_event_loop()
+    key = session_key("httpx")
     session = __httpx_session_pool.get(loop, None)
-    if session is None or last_proxy != settings.proxy:
-        if settings.proxy != "":
-            last_proxy = settings.proxy
-            proxies = {"all://": settings.proxy}
-            session = httpx.AsyncClient(proxies=proxies)  # type: ignore
-        else:
-            last_proxy = ""
-            session = httpx.AsyncClient()
+    if session is None or __session_keys.get(session) not in (None, key):
+        if session is not None:
+            close_later(session)
+            del __session_keys[session]
+        session = create_httpx_async_client()
         __httpx_session_pool[loop] = session
+        __session_keys[session] = key
 
     return session
 
@@ -895,6 +1478,8 @@ def set_session(session: httpx.AsyncClient) -> None:
     """
     用户手动设置 Session
 
+    手动设置的会话不会因为代理或连接池设置改变而被替换。
+
     Args:
         session (httpx.AsyncClient):  httpx.AsyncClient 实例。
     """
@@ -906,16 +1491,21 @@ def get_aiohttp_session() -> aiohttp.ClientSession:
     """
     获取当前模块的 aiohttp.ClientSession 对象，用于自定义请求
 
+    连接池设置改变时会创建新的会话，旧会话在 settings.timeout 秒后关闭。
+
     Returns:
         aiohttp.ClientSession
     """
     loop = asyncio.get_event_loop()
+    key = session_key("aiohttp")
     session = __aiohttp_session_pool.get(loop, None)
-    if session is None:
-        session = aiohttp.ClientSession(
-            loop=loop, connector=aiohttp.TCPConnector(), trust_env=True
-        )
+    if session is None or __session_keys.get(session) not in (None, key):
+        if session is not None:
+            close_later(session)
+            del __session_keys[session]
+        session = create_aiohttp_session(loop)
         __aiohttp_session_pool[loop] = session
+        __session_keys[session] = key
 
     return session
 
@@ -924,6 +1514,8 @@ def set_aiohttp_session(session: aiohttp.ClientSession) -> None:
     """
     用户手动设置 Session
 
+    手动设置的会话不会因为连接池设置改变而被替换。
+
     Args:
         session (aiohttp.ClientSession):  aiohttp.ClientSession 实例。
     """
@@ -931,6 +1523,73 @@ def set_aiohttp_session(session: aiohttp.ClientSession) -> None:
     __aiohttp_session_pool[loop] = session
 
 
+def _get_proxy_session(
+    proxy: str, sync: bool = False
+) -> Union[httpx.AsyncClient, httpx.Client]:
+    """
+    获取通过指定代理发送请求的 httpx 会话，每个代理使用单独的连接池。
+
+    代理池的代理列表变化后，关闭当前事件循环中已不在代理池里的代理的会话。
+
+    Args:
+        proxy (str)           : 代理地址
+
+        sync  (bool, optional): 是否为同步会话. Defaults to False.
+
+    Returns:
+        httpx.AsyncClient | httpx.Client
+    """
+    owner = None if sync else asyncio.get_event_loop()
+    pool = get_proxy_pool()
+    if __proxy_sessions_version.get(owner) != pool.version:
+        __proxy_sessions_version[owner] = pool.version
+        active = set(pool.proxies())
+        for session_owner, session_proxy in list(__proxy_sessions):
+            if session_owner is owner and session_proxy not in active:
+                close_later(__proxy_sessions.pop((session_owner, session_proxy)))
+    key = session_key("httpx", proxy)
+    session = __proxy_sessions.get((owner, proxy))
+    if session is None or __session_keys.get(session) != key:
+        if session is not None:
+            close_later(session)
+            __session_keys.pop(session, None)
+        session = (
+            create_httpx_client(proxy) if sync else create_httpx_async_client(proxy)
+        )
+        __proxy_sessions[(owner, proxy)] = session
+        __session_keys[session] = key
+    return session
+
+
+def get_pool_stats() -> List[dict]:
+    """
+    获取当前模块所有会话的连接池使用情况
+
+    Returns:
+        List[dict]: 每个会话的 client、in_use、idle、queued、limit，见 session_factory.pool_stats。读取出错的会话会被跳过
+    """
+    sessions = [
+        (session, None)
+        for session in list(__httpx_session_pool.values())
+        + list(__aiohttp_session_pool.values())
+    ]
+    if __httpx_sync_session is not None:
+        sessions.append((__httpx_sync_session, None))
+    for (_, proxy), session in list(__proxy_sessions.items()):
+        sessions.append((session, proxy))
+    stats = []
+    for session, proxy in sessions:
+        try:
+            stat = pool_stats(session)
+        except Exception as e:
+            settings.logger.warning("读取连接池使用情况出错：%s", e)
+            continue
+        if proxy is not None:
+            stat["proxy"] = proxy
+        stats.append(stat)
+    return stats
+
+
 def to_form_urlencoded(data: dict) -> str:
     temp = []
     for [k, v] in data.items():
@@ -939,11 +1598,32 @@ def to_form_urlencoded(data: dict) -> str:
     return "&".join(temp)
 
 
+async def _close_sessions() -> None:
+    """
+    关闭当前事件循环中由模块创建或手动设置的会话。
+    """
+    loop = asyncio.get_running_loop()
+    s0 = __aiohttp_session_pool.pop(loop, None)
+    if s0 is not None:
+        await s0.close()
+    s1 = __httpx_session_pool.pop(loop, None)
+    if s1 is not None:
+        await s1.aclose()
+    for owner, proxy in list(__proxy_sessions):
+        if owner is loop:
+            await __proxy_sessions.pop((owner, proxy)).aclose()
+
+
 @atexit.register
 def __clean() -> None:
     """
     程序退出清理操作。
     """
+    # 同步的代理会话不属于任何事件循环，直接关闭
+    for owner, proxy in list(__proxy_sessions):
+        if owner is None:
+            __proxy_sessions.pop((owner, proxy)).close()
+
     try:
         loop = asyncio.get_event_loop()
     except RuntimeError:
@@ -956,6 +1636,9 @@ def __clean() -> None:
         s1 = __httpx_session_pool.get(loop, None)
         if s1 is not None:
             await s1.aclose()
+        for owner, proxy in list(__proxy_sessions):
+            if owner is loop:
+                await __proxy_sessions.pop((owner, proxy)).aclose()
 
     if loop.is_closed():
         loop.run_until_complete(__clean_task())
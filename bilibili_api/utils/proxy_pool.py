@@ -0,0 +1,242 @@
+"""
+bilibili_api.utils.proxy_pool
+
+代理池，按权重与健康状况为每个请求选择出口代理。
+"""
+
+import time
+import random
+import asyncio
+import threading
+from typing import Dict, List, Tuple, Union, Iterable, Optional
+
+import httpx
+import aiohttp
+
+from .. import settings
+from .rate_limit import is_risk_control
+
+ProxyEntry = Union[str, Tuple[str, float]]
+
+# 成功率的下限，避免连续失败的代理永远选不到、无法恢复
+MIN_SUCCESS = 0.05
+
+
+def is_proxy_failure(error: BaseException) -> bool:
+    """
+    判断异常是否应计为代理的失败：连接错误、超时，或出口 IP 被风控（-412 / -352 / HTTP 412）
+    """
+    if is_risk_control(error):
+        return True
+    return isinstance(
+        error, (httpx.TransportError, aiohttp.ClientConnectionError, asyncio.TimeoutError)
+    )
+
+
+class _ProxyState:
+    """
+    单个代理的健康状况
+    """
+
+    __slots__ = (
+        "url",
+        "weight",
+        "success",
+        "latency",
+        "requests",
+        "failures",
+        "consecutive",
+        "down_until",
+    )
+
+    def __init__(self, url: str, weight: float) -> None:
+        self.url = url
+        self.weight = weight
+        # 成功率与延迟均为指数加权移动平均
+        self.success = 1.0
+        self.latency = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive = 0
+        self.down_until = 0.0
+
+    def score(self) -> float:
+        return self.weight * max(self.success, MIN_SUCCESS) / (1.0 + self.latency)
+
+    def state(self, now: float) -> dict:
+        return {
+            "proxy": self.url,
+            "weight": self.weight,
+            "score": self.score(),
+            "success": self.success,
+            "latency": self.latency,
+            "requests": self.requests,
+            "failures": self.failures,
+            "down": max(0.0, self.down_until - now),
+        }
+
+
+class ProxyPool:
+    """
+    代理池。
+
+    按 `权重 × 成功率 / (1 + 平均延迟)` 随机选择代理，成功率与延迟根据实际请求结果被动更新。
+    连续失败 `max_failures` 次的代理暂停使用 `cooldown` 秒，期满后重新参与选择。
+    """
+
+    def __init__(
+        self,
+        proxies: Iterable[ProxyEntry] = (),
+        max_failures: int = 3,
+        cooldown: float = 30.0,
+        alpha: float = 0.2,
+    ) -> None:
+        """
+        Args:
+            proxies      (Iterable[str | Tuple[str, float]], optional): 代理地址，或 (代理地址, 权重). Defaults to ().
+
+            max_failures (int, optional)  : 连续失败多少次后暂停使用. Defaults to 3.
+
+            cooldown     (float, optional): 暂停使用的秒数. Defaults to 30.0.
+
+            alpha        (float, optional): 成功率与延迟的平滑系数，越大越看重最近的请求. Defaults to 0.2.
+        """
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self.__lock = threading.Lock()
+        self.__proxies: Dict[str, _ProxyState] = {}
+        # 代理列表每次变化时加一，用于关闭已移除代理的会话
+        self.version = 0
+        self.set_proxies(proxies)
+
+    def set_proxies(self, proxies: Iterable[ProxyEntry]) -> None:
+        """
+        设置代理列表。仍在列表中的代理保留其健康状况。
+
+        Args:
+            proxies (Iterable[str | Tuple[str, float]]): 代理地址，或 (代理地址, 权重)
+        """
+        entries = [(p, 1.0) if isinstance(p, str) else (p[0], float(p[1])) for p in proxies]
+        with self.__lock:
+            old = self.__proxies
+            self.__proxies = {}
+            for url, weight in entries:
+                proxy = old.get(url) or _ProxyState(url, weight)
+                proxy.weight = weight
+                self.__proxies[url] = proxy
+            self.version += 1
+
+    def proxies(self) -> List[str]:
+        """
+        获取所有代理地址
+
+        Returns:
+            List[str]: 代理地址
+        """
+        return list(self.__proxies)
+
+    def select(self) -> Optional[str]:
+        """
+        选择一个代理。所有代理都在暂停中时返回最早恢复的代理。
+
+        Returns:
+            str | None: 代理地址，代理池为空时为 None
+        """
+        now = time.monotonic()
+        with self.__lock:
+            proxies = list(self.__proxies.values())
+            if not proxies:
+                return None
+            candidates = [p for p in proxies if p.down_until <= now]
+            if not candidates:
+                proxy = min(proxies, key=lambda p: p.down_until)
+            elif len(candidates) == 1:
+                proxy = candidates[0]
+            else:
+                proxy = random.choices(
+                    candidates, weights=[p.score() for p in candidates]
+                )[0]
+            proxy.requests += 1
+            return proxy.url
+
+    def report(
+        self, proxy: str, elapsed: float, error: Union[BaseException, None] = None
+    ) -> None:
+        """
+        报告通过代理发送的请求结果，Api 发送请求后会自动调用。
+
+        Args:
+            proxy   (str)                          : 代理地址
+
+            elapsed (float)                        : 请求耗时（秒）
+
+            error   (BaseException | None, optional): 请求失败时的异常. Defaults to None.
+        """
+        now = time.monotonic()
+        alpha = self.alpha
+        with self.__lock:
+            state = self.__proxies.get(proxy)
+            if state is None:
+                return
+            if error is not None and is_proxy_failure(error):
+                state.failures += 1
+                state.consecutive += 1
+                state.success *= 1 - alpha
+                if state.consecutive >= self.max_failures:
+                    state.consecutive = 0
+                    state.down_until = now + self.cooldown
+                    settings.logger.warning(
+                        "代理 %s 连续失败，暂停使用 %.0f 秒", proxy, self.cooldown
+                    )
+                return
+            # 收到响应即视为代理可用，即使接口返回了错误
+            state.consecutive = 0
+            state.success = state.success * (1 - alpha) + alpha
+            state.latency = state.latency * (1 - alpha) + elapsed * alpha
+
+    def state(self) -> List[dict]:
+        """
+        获取各代理的状态
+
+        Returns:
+            List[dict]: 每个代理的 proxy、weight、score（当前选择权重）、success（成功率）、
+            latency（平均延迟）、requests、failures、down（剩余暂停秒数）
+        """
+        now = time.monotonic()
+        with self.__lock:
+            return [proxy.state(now) for proxy in self.__proxies.values()]
+
+
+__proxy_pool = ProxyPool()
+__proxy_pool_source: Tuple = ()
+
+
+def get_proxy_pool() -> ProxyPool:
+    """
+    获取进程内共享的代理池，代理列表与 settings.proxy_pool 保持一致。
+
+    Returns:
+        ProxyPool: 代理池
+    """
+    global __proxy_pool_source
+    source = tuple(settings.proxy_pool)
+    max_failures, cooldown = settings.proxy_pool_health
+    pool = __proxy_pool
+    if source != __proxy_pool_source:
+        pool.set_proxies(source)
+        __proxy_pool_source = source
+    pool.max_failures, pool.cooldown = max_failures, cooldown
+    return pool
+
+
+def select_proxy() -> Optional[str]:
+    """
+    为 Api 请求选择代理，未设置 settings.proxy_pool 时返回 None（使用 settings.proxy）
+
+    Returns:
+        str | None: 代理地址
+    """
+    if not settings.proxy_pool:
+        return None
+    return get_proxy_pool().select()
@@ -0,0 +1,350 @@
+"""
+bilibili_api.utils.rate_limit
+
+请求限速：按主机、接口分组与凭据分别维护令牌桶，遇到风控（-412 / -352）时自适应退避。
+"""
+
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from urllib.parse import urlsplit
+from typing import Dict, List, Tuple, Union, Optional
+
+from .. import settings
+from .credential import Credential
+from ..exceptions import ArgsException
+
+# 风控返回的 code
+RISK_CONTROL_CODES = (-412, -352)
+
+# 风控时速率最多降低到设置值的比例
+MIN_RATE_FACTOR = 1 / 16
+
+
+def _check_rate(rate: float) -> None:
+    # 速率为 0 时永远等不到令牌，计算等待时间也会除以 0
+    if not rate > 0:
+        raise ArgsException(f"请求速率必须大于 0，当前为 {rate}")
+
+
+class TokenBucket:
+    """
+    令牌桶。速率会在遇到风控时减半并暂停一段时间，之后每次成功请求逐步恢复。
+    """
+
+    __slots__ = (
+        "rate",
+        "burst",
+        "tokens",
+        "updated",
+        "factor",
+        "penalty",
+        "paused_until",
+    )
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """
+        Args:
+            rate  (float): 每秒生成的令牌数
+
+            burst (int)  : 桶容量，即允许的突发请求数
+        """
+        _check_rate(rate)
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.factor = 1.0
+        self.penalty = 0
+        self.paused_until = 0.0
+
+    def configure(self, rate: float, burst: int) -> None:
+        """
+        更新速率与容量（settings 可能在运行时被修改）
+        """
+        _check_rate(rate)
+        self.rate = rate
+        self.burst = burst
+        if self.tokens > burst:
+            self.tokens = float(burst)
+
+    def wait_time(self, now: float) -> float:
+        """
+        获取还需等待多久才有可用的令牌，为 0 时可立即请求
+        """
+        rate = self.rate * self.factor
+        # 暂停期间不生成令牌
+        start = max(self.updated, self.paused_until)
+        if now > start:
+            self.tokens = min(self.burst, self.tokens + (now - start) * rate)
+        self.updated = now
+        if self.paused_until > now:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / rate
+
+    def take(self) -> None:
+        """
+        消耗一个令牌
+        """
+        self.tokens -= 1
+
+    def penalize(self, now: float, base: float, cap: float) -> float:
+        """
+        遇到风控：速率减半，并暂停一段带有随机抖动的指数退避时间
+
+        Returns:
+            float: 暂停的秒数
+        """
+        self.penalty += 1
+        backoff = min(cap, base * 2 ** (self.penalty - 1))
+        delay = backoff / 2 + random.uniform(0, backoff / 2)
+        self.paused_until = max(self.paused_until, now + delay)
+        self.factor = max(MIN_RATE_FACTOR, self.factor / 2)
+        self.tokens = 0.0
+        return delay
+
+    def reward(self) -> None:
+        """
+        请求成功：逐步恢复速率
+        """
+        if self.penalty:
+            self.penalty -= 1
+        if self.factor < 1:
+            self.factor = min(1.0, self.factor * 1.25)
+
+    def state(self, now: float) -> dict:
+        wait = self.wait_time(now)
+        return {
+            "rate": self.rate * self.factor,
+            "configured_rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 3),
+            "penalty": self.penalty,
+            "paused_for": max(0.0, self.paused_until - now),
+            "wait": wait,
+        }
+
+
+def _credential_label(credential: Union[Credential, None]) -> Optional[str]:
+    """
+    凭据在限速器中的标识，未登录时为 None（不单独限速）。不直接使用 SESSDATA 以免泄露。
+    """
+    if credential is None:
+        return None
+    if credential.dedeuserid:
+        return str(credential.dedeuserid)
+    if credential.sessdata:
+        return "sessdata:" + hashlib.sha1(credential.sessdata.encode()).hexdigest()[:8]
+    return None
+
+
+class RateLimiter:
+    """
+    请求限速器。
+
+    每个请求需要同时从以下令牌桶中各取得一个令牌：
+
+    - 请求的主机，速率见 settings.rate_limit_host
+    - 匹配的接口分组（URL 前缀最长匹配），见 settings.rate_limit_groups
+    - 已登录的凭据，速率见 settings.rate_limit_credential
+    """
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__hosts: Dict[str, TokenBucket] = {}
+        self.__groups: Dict[str, TokenBucket] = {}
+        self.__credentials: Dict[str, TokenBucket] = {}
+        self.throttled = 0
+        self.waited = 0.0
+        self.risk_controlled = 0
+
+    @staticmethod
+    def __bucket(
+        pool: Dict[str, TokenBucket], key: str, config: Tuple[float, int]
+    ) -> TokenBucket:
+        rate, burst = config
+        bucket = pool.get(key)
+        if bucket is None:
+            bucket = pool[key] = TokenBucket(rate, burst)
+        elif bucket.rate != rate or bucket.burst != burst:
+            bucket.configure(rate, burst)
+        return bucket
+
+    def _buckets(
+        self, url: str, credential: Union[Credential, None]
+    ) -> List[TokenBucket]:
+        """
+        获取请求涉及的令牌桶，需要在持有锁时调用
+        """
+        buckets = []
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        if settings.rate_limit_host is not None:
+            buckets.append(self.__bucket(self.__hosts, host, settings.rate_limit_host))
+        if settings.rate_limit_groups:
+            target = host + parts.path
+            group = max(
+                (prefix for prefix in settings.rate_limit_groups if target.startswith(prefix)),
+                key=len,
+                default=None,
+            )
+            if group is not None:
+                buckets.append(
+                    self.__bucket(self.__groups, group, settings.rate_limit_groups[group])
+                )
+        label = _credential_label(credential)
+        if label is not None and settings.rate_limit_credential is not None:
+            buckets.append(
+                self.__bucket(self.__credentials, label, settings.rate_limit_credential)
+            )
+        return buckets
+
+    def _try_acquire(
+        self, url: str, credential: Union[Credential, None], waiting: bool = False
+    ) -> float:
+        """
+        尝试取得令牌，成功时返回 0，否则返回需要等待的秒数
+
+        waiting 为 True 表示本次请求已经等待过，不再计入 throttled
+        """
+        with self.__lock:
+            buckets = self._buckets(url, credential)
+            now = time.monotonic()
+            wait = max((bucket.wait_time(now) for bucket in buckets), default=0.0)
+            if wait <= 0:
+                for bucket in buckets:
+                    bucket.take()
+                return 0.0
+            if not waiting:
+                self.throttled += 1
+            self.waited += wait
+            return wait
+
+    async def acquire(
+        self, url: str, credential: Union[Credential, None] = None
+    ) -> None:
+        """
+        等待直到可以发送请求。未开启 settings.rate_limit 时立即返回。
+
+        Args:
+            url        (str)                       : 请求地址
+
+            credential (Credential | None, optional): 凭据类. Defaults to None.
+        """
+        if not settings.rate_limit:
+            return
+        waiting = False
+        while True:
+            wait = self._try_acquire(url, credential, waiting)
+            if wait <= 0:
+                return
+            waiting = True
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, url: str, credential: Union[Credential, None] = None) -> None:
+        """
+        同步等待直到可以发送请求。未开启 settings.rate_limit 时立即返回。
+
+        Args:
+            url        (str)                       : 请求地址
+
+            credential (Credential | None, optional): 凭据类. Defaults to None.
+        """
+        if not settings.rate_limit:
+            return
+        waiting = False
+        while True:
+            wait = self._try_acquire(url, credential, waiting)
+            if wait <= 0:
+                return
+            waiting = True
+            time.sleep(wait)
+
+    def report(
+        self, url: str, credential: Union[Credential, None], risk_control: bool
+    ) -> None:
+        """
+        报告请求结果。遇到风控时请求涉及的令牌桶降速并退避，成功时逐步恢复。
+
+        Args:
+            url          (str)              : 请求地址
+
+            credential   (Credential | None): 凭据类
+
+            risk_control (bool)             : 是否遇到风控
+        """
+        if not settings.rate_limit:
+            return
+        base, cap = settings.rate_limit_backoff
+        with self.__lock:
+            buckets = self._buckets(url, credential)
+            if risk_control:
+                self.risk_controlled += 1
+                now = time.monotonic()
+                delay = max(
+                    (bucket.penalize(now, base, cap) for bucket in buckets), default=0.0
+                )
+                if settings.request_log:
+                    settings.logger.info("触发风控，%.2f 秒内降低请求速率：%s", delay, url)
+            else:
+                for bucket in buckets:
+                    bucket.reward()
+
+    def state(self) -> dict:
+        """
+        获取限速器当前状态，用于监控
+
+        Returns:
+            dict: hosts / groups / credentials 中各令牌桶的速率、令牌数、退避等级与剩余暂停时间，
+            以及 throttled（需要等待的请求数）、waited（累计等待秒数）、risk_controlled（风控次数）
+        """
+        with self.__lock:
+            now = time.monotonic()
+            return {
+                "enabled": settings.rate_limit,
+                "hosts": {k: v.state(now) for k, v in self.__hosts.items()},
+                "groups": {k: v.state(now) for k, v in self.__groups.items()},
+                "credentials": {k: v.state(now) for k, v in self.__credentials.items()},
+                "throttled": self.throttled,
+                "waited": self.waited,
+                "risk_controlled": self.risk_controlled,
+            }
+
+    def reset(self) -> None:
+        """
+        清空所有令牌桶与统计数据
+        """
+        with self.__lock:
+            self.__hosts.clear()
+            self.__groups.clear()
+            self.__credentials.clear()
+            self.throttled = 0
+            self.waited = 0.0
+            self.risk_controlled = 0
+
+
+__rate_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    获取进程内共享的请求限速器
+
+    Returns:
+        RateLimiter: 请求限速器
+    """
+    return __rate_limiter
+
+
+def is_risk_control(error: Exception) -> bool:
+    """
+    判断异常是否由风控导致（接口返回 -412 / -352，或 HTTP 状态码 412）
+    """
+    code = getattr(error, "code", None)
+    if code in RISK_CONTROL_CODES:
+        return True
+    return getattr(error, "status", None) == 412
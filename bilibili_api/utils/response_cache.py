@@ -0,0 +1,181 @@
+"""
+bilibili_api.utils.response_cache
+
+Api 请求结果的进程内缓存（TTL + LRU）。
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple, Union
+
+from .. import settings
+from .credential import Credential
+
+# wbi 签名时添加的参数（wts 每次请求都会变化），不参与缓存键的计算
+IGNORED_PARAMS = ("wts", "w_rid", "web_location")
+
+# 缓存未命中时 ResponseCache.get 的返回值，用于与结果本身为 None 的情况区分
+MISSING = object()
+
+
+def credential_identity(credential: Union[Credential, None]) -> Tuple[str, str]:
+    """
+    凭据的身份标识，不同登录状态的请求结果不能互相复用。
+
+    Args:
+        credential (Credential | None): 凭据类
+
+    Returns:
+        Tuple[str, str]: (DedeUserID, SESSDATA)，未登录时均为空字符串
+    """
+    if credential is None:
+        return ("", "")
+    return (credential.dedeuserid or "", credential.sessdata or "")
+
+
+def make_request_key(
+    url: str,
+    method: str,
+    params: dict,
+    credential: Union[Credential, None],
+    raw: bool = False,
+) -> Tuple:
+    """
+    生成请求的缓存键。
+
+    参数按名称排序，值统一转为字符串（与实际发送的请求一致），并去掉 wbi 签名参数。
+
+    Args:
+        url        (str)              : 请求地址
+
+        method     (str)              : 请求方法
+
+        params     (dict)             : 请求参数
+
+        credential (Credential | None): 凭据类
+
+        raw        (bool, optional)   : 是否为原始返回数据. Defaults to False.
+
+    Returns:
+        Tuple: 可哈希的缓存键
+    """
+    items = tuple(
+        sorted(
+            (str(key), str(value))
+            for key, value in params.items()
+            if key not in IGNORED_PARAMS
+        )
+    )
+    return (method.upper(), url, items, credential_identity(credential), raw)
+
+
+class ResponseCache:
+    """
+    带有过期时间与容量上限的请求结果缓存。
+
+    结果直接保存，命中时返回同一个对象而不复制，调用方不能修改返回的结果，需要修改时请先 copy.deepcopy。
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """
+        Args:
+            maxsize (int, optional): 最多缓存的结果数量，超出时淘汰最久未使用的结果. Defaults to 1024.
+        """
+        self.maxsize = maxsize
+        self.__entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Any:
+        """
+        获取缓存的结果。
+
+        Args:
+            key (Tuple): 缓存键
+
+        Returns:
+            Any: 缓存的结果，未命中或已过期时返回 MISSING
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.__entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self.__entries.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def set(self, key: Tuple, value: Any, ttl: float) -> None:
+        """
+        缓存结果。
+
+        Args:
+            key   (Tuple): 缓存键
+
+            value (Any)  : 结果
+
+            ttl   (float): 有效期（秒）
+        """
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + ttl, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        清空缓存与统计数据。
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = self.misses = self.expirations = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        获取缓存统计数据。
+
+        Returns:
+            dict: hits, misses, hit_rate, expirations, evictions, size, maxsize
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "size": len(self.__entries),
+            "maxsize": self.maxsize,
+        }
+
+
+__response_cache = ResponseCache(settings.response_cache_size)
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    获取进程内共享的请求结果缓存，容量与 settings.response_cache_size 保持一致。
+
+    Returns:
+        ResponseCache: 请求结果缓存
+    """
+    cache = __response_cache
+    if cache.maxsize != settings.response_cache_size:
+        cache.maxsize = settings.response_cache_size
+    return cache
@@ -0,0 +1,334 @@
+"""
+bilibili_api.utils.retry
+
+请求重试策略：带随机抖动的指数退避、可重试错误判断、进程内重试预算与按主机熔断。
+"""
+
+import json
+import time
+import random
+import asyncio
+import threading
+from urllib.parse import urlsplit
+from typing import Dict, Union
+
+import httpx
+import aiohttp
+
+from .. import settings
+from ..exceptions import NetworkException, CircuitOpenException
+
+# 重复发送没有副作用的请求方法
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+# 连接阶段的错误，此时请求尚未发出，任何方法都可以重试
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, aiohttp.ClientConnectorError)
+
+
+class RetryBudget:
+    """
+    进程内重试预算，避免上游故障时重试把请求量放大数倍。
+
+    每次首次请求存入 ratio 个令牌，另外每秒固定存入 min_per_second 个，每次重试消耗一个，
+    余额最多为 cap。余额不足时不再重试。
+    """
+
+    def __init__(self, ratio: float, min_per_second: float, cap: float = 20) -> None:
+        """
+        Args:
+            ratio          (float)          : 每次首次请求可换取的重试次数
+
+            min_per_second (float)          : 每秒至少允许的重试次数
+
+            cap            (float, optional): 最多累积的重试次数. Defaults to 20.
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.cap = cap
+        self.balance = float(cap)
+        self.updated = time.monotonic()
+        self.rejected = 0
+        self.__lock = threading.Lock()
+
+    def configure(self, ratio: float, min_per_second: float) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+
+    def __refill(self, amount: float) -> None:
+        now = time.monotonic()
+        amount += (now - self.updated) * self.min_per_second
+        self.updated = now
+        self.balance = min(self.cap, self.balance + amount)
+
+    def deposit(self) -> None:
+        """
+        记录一次首次请求
+        """
+        with self.__lock:
+            self.__refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        申请一次重试
+
+        Returns:
+            bool: 预算是否充足
+        """
+        with self.__lock:
+            self.__refill(0)
+            if self.balance >= 1:
+                self.balance -= 1
+                return True
+            self.rejected += 1
+            return False
+
+
+class CircuitBreaker:
+    """
+    单个主机的熔断器。
+
+    连续 threshold 次请求因网络错误、超时或 5xx 失败后熔断，reset_timeout 秒内直接失败；
+    之后放行一个探测请求，成功则恢复，失败则再次熔断。探测请求被取消或 reset_timeout 秒内
+    没有结果时再放行一个。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.status = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = 0.0
+        self.trips = 0
+        self.__lock = threading.Lock()
+
+    def before_request(self, reset_timeout: float) -> None:
+        """
+        请求前检查，熔断时抛出 CircuitOpenException
+        """
+        with self.__lock:
+            if self.status == self.CLOSED:
+                return
+            now = time.monotonic()
+            if self.status == self.HALF_OPEN:
+                # 探测请求迟迟没有结果时不能一直拒绝请求
+                remaining = self.probe_at + reset_timeout - now
+            else:
+                remaining = self.opened_at + reset_timeout - now
+            if remaining <= 0:
+                # 放行一个探测请求
+                self.status = self.HALF_OPEN
+                self.probe_at = now
+                return
+            raise CircuitOpenException(self.host, remaining)
+
+    def release(self) -> None:
+        """
+        请求被取消，没有得到结果。如果是探测请求，下一个请求将作为新的探测请求放行
+        """
+        with self.__lock:
+            if self.status == self.HALF_OPEN:
+                self.status = self.OPEN
+                self.probe_at = 0.0
+
+    def record_success(self) -> None:
+        with self.__lock:
+            self.status = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self, threshold: int) -> None:
+        with self.__lock:
+            self.failures += 1
+            if self.status == self.HALF_OPEN or (
+                self.status == self.CLOSED and self.failures >= threshold
+            ):
+                self.status = self.OPEN
+                self.opened_at = time.monotonic()
+                self.trips += 1
+                if settings.request_log:
+                    settings.logger.info("%s 连续 %d 次请求失败，已熔断", self.host, self.failures)
+
+    def state(self) -> dict:
+        return {"status": self.status, "failures": self.failures, "trips": self.trips}
+
+
+class RetryPolicy:
+    """
+    请求重试策略，可继承后通过 set_retry_policy 替换。
+
+    默认策略：
+
+    - 可重试的错误：网络连接错误、超时、HTTP 5xx、返回内容无法解析为 JSON。
+      POST 等非幂等请求可能已被服务器处理，只在连接失败（请求尚未发出）时重试
+    - 第 n 次重试前等待 `min(max, base * 2 ** (n - 1))` 秒乘以 0.5 ~ 1 的随机系数，见 settings.retry_backoff
+    - 可选的进程内重试预算，见 settings.retry_budget
+    - 可选的按主机熔断，见 settings.circuit_breaker
+    """
+
+    def __init__(self) -> None:
+        self.budget = RetryBudget(*settings.retry_budget) if settings.retry_budget else None  # pylint: disable=not-an-iterable
+        self.__breakers: Dict[str, CircuitBreaker] = {}
+        self.__lock = threading.Lock()
+
+    def is_retryable(self, error: BaseException, method: str = "GET") -> bool:
+        """
+        判断错误是否可以重试
+
+        Args:
+            error  (BaseException) : 请求时抛出的异常
+
+            method (str, optional): 请求方法. Defaults to "GET".
+
+        Returns:
+            bool: 是否可以重试
+        """
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return isinstance(error, CONNECT_ERRORS)
+        if isinstance(error, json.decoder.JSONDecodeError):
+            return True
+        return self.is_upstream_failure(error)
+
+    def is_upstream_failure(self, error: BaseException) -> bool:
+        """
+        判断错误是否说明上游不可用（计入熔断）：网络连接错误、超时与 HTTP 5xx
+
+        Args:
+            error (BaseException): 请求时抛出的异常
+
+        Returns:
+            bool: 是否说明上游不可用
+        """
+        if isinstance(error, NetworkException):
+            return error.status >= 500
+        return isinstance(
+            error,
+            (
+                asyncio.TimeoutError,
+                TimeoutError,
+                aiohttp.ClientConnectionError,
+                aiohttp.ClientPayloadError,
+                httpx.TransportError,
+            ),
+        )
+
+    def delay(self, attempt: int) -> float:
+        """
+        获取第 attempt 次重试前的等待时间
+
+        Args:
+            attempt (int): 第几次重试，从 1 开始
+
+        Returns:
+            float: 等待秒数
+        """
+        base, cap = settings.retry_backoff
+        backoff = min(cap, base * 2 ** (attempt - 1))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def allow_retry(self) -> bool:
+        """
+        申请一次重试，重试预算不足时返回 False
+        """
+        if not settings.retry_budget:
+            return True
+        if self.budget is None:
+            self.budget = RetryBudget(*settings.retry_budget)  # pylint: disable=not-an-iterable
+        else:
+            self.budget.configure(*settings.retry_budget)  # pylint: disable=not-an-iterable
+        return self.budget.withdraw()
+
+    def on_request(self) -> None:
+        """
+        记录一次首次请求，用于计算重试预算
+        """
+        if settings.retry_budget and self.budget is not None:
+            self.budget.deposit()
+
+    def breaker(self, url: str) -> Union[CircuitBreaker, None]:
+        """
+        获取地址所属主机的熔断器，未开启熔断或无法解析主机时返回 None
+        """
+        if not settings.circuit_breaker or not url:
+            return None
+        host = urlsplit(url).hostname
+        if not host:
+            return None
+        with self.__lock:
+            breaker = self.__breakers.get(host)
+            if breaker is None:
+                breaker = self.__breakers[host] = CircuitBreaker(host)
+            return breaker
+
+    def before_attempt(self, url: str) -> None:
+        """
+        每次请求前调用，主机已熔断时抛出 CircuitOpenException
+        """
+        breaker = self.breaker(url)
+        if breaker is not None:
+            breaker.before_request(settings.circuit_breaker[1])  # pylint: disable=unsubscriptable-object
+
+    def record(self, url: str, error: Union[BaseException, None]) -> None:
+        """
+        每次请求后调用，记录请求结果
+
+        Args:
+            url   (str)                 : 请求地址
+
+            error (BaseException | None): 请求抛出的异常，成功时为 None
+        """
+        breaker = self.breaker(url)
+        if breaker is None:
+            return
+        if error is not None and (
+            not isinstance(error, Exception) or isinstance(error, asyncio.CancelledError)
+        ):
+            # 请求被取消或中断，结果未知
+            breaker.release()
+        elif error is not None and self.is_upstream_failure(error):
+            breaker.record_failure(settings.circuit_breaker[0])  # pylint: disable=unsubscriptable-object
+        elif not isinstance(error, CircuitOpenException):
+            breaker.record_success()
+
+    def state(self) -> dict:
+        """
+        获取重试预算与各主机熔断器的状态，用于监控
+
+        Returns:
+            dict: budget（余额与被拒绝的重试次数）与 breakers
+        """
+        budget = None
+        if self.budget is not None:
+            budget = {"balance": self.budget.balance, "rejected": self.budget.rejected}
+        with self.__lock:
+            breakers = {host: b.state() for host, b in self.__breakers.items()}
+        return {"budget": budget, "breakers": breakers}
+
+
+__retry_policy: Union[RetryPolicy, None] = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    获取当前使用的重试策略
+
+    Returns:
+        RetryPolicy: 重试策略
+    """
+    global __retry_policy
+    if __retry_policy is None:
+        __retry_policy = RetryPolicy()
+    return __retry_policy
+
+
+def set_retry_policy(policy: RetryPolicy) -> None:
+    """
+    替换重试策略
+
+    Args:
+        policy (RetryPolicy): 重试策略
+    """
+    global __retry_policy
+    __retry_policy = policy
@@ -0,0 +1,243 @@
+"""
+bilibili_api.utils.session_factory
+
+按 settings 中的连接池设置创建 httpx / aiohttp 会话，并统计连接池使用情况。
+"""
+
+import asyncio
+import threading
+import importlib.util
+from typing import Any, Dict, Tuple, Union, Callable, Optional
+
+import httpx
+import aiohttp
+
+from .. import settings
+
+Session = Union[httpx.Client, httpx.AsyncClient, aiohttp.ClientSession]
+
+
+def session_key(client: str, proxy: Union[str, None] = None) -> Tuple:
+    """
+    会话相关设置的快照，与已有会话创建时的快照不同时需要重新创建会话
+
+    Args:
+        client (str): "httpx" 或 "aiohttp"。aiohttp 的代理在每次请求时设置，因此不包含代理
+
+        proxy (str | None, optional): 会话使用的代理，None 为 settings.proxy. Defaults to None.
+
+    Returns:
+        Tuple: 设置快照
+    """
+    pool = (
+        settings.pool_max_connections,
+        settings.pool_max_connections_per_host,
+        settings.pool_max_keepalive_connections,
+        settings.pool_keepalive_expiry,
+        settings.dns_cache_ttl,
+    )
+    if client == "httpx":
+        return pool + (settings.proxy if proxy is None else proxy, settings.http2)
+    return pool
+
+
+def _http2_enabled() -> bool:
+    if not settings.http2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        settings.logger.warning("未安装 h2，无法使用 HTTP/2，请执行 pip install httpx[http2]")
+        return False
+    return True
+
+
+def _httpx_options(proxy: Union[str, None] = None) -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "limits": httpx.Limits(
+            max_connections=settings.pool_max_connections or None,
+            max_keepalive_connections=settings.pool_max_keepalive_connections,
+            keepalive_expiry=settings.pool_keepalive_expiry,
+        ),
+        "http2": _http2_enabled(),
+    }
+    if proxy is None:
+        proxy = settings.proxy
+    if proxy != "":
+        options["proxy"] = proxy
+    return options
+
+
+def create_httpx_client(proxy: Union[str, None] = None) -> httpx.Client:
+    """
+    创建同步 httpx 会话
+
+    Args:
+        proxy (str | None, optional): 代理，None 为 settings.proxy. Defaults to None.
+
+    Returns:
+        httpx.Client
+    """
+    return httpx.Client(**_httpx_options(proxy))
+
+
+def create_httpx_async_client(proxy: Union[str, None] = None) -> httpx.AsyncClient:
+    """
+    创建异步 httpx 会话
+
+    Args:
+        proxy (str | None, optional): 代理，None 为 settings.proxy. Defaults to None.
+
+    Returns:
+        httpx.AsyncClient
+    """
+    return httpx.AsyncClient(**_httpx_options(proxy))
+
+
+def _trace_callback(name: str):
+    async def callback(session, context, params) -> None:
+        # 请求时通过 trace_request_ctx 传入 RequestEvent，未传入时不记录
+        event = context.trace_request_ctx
+        if event is not None:
+            event.mark(name)
+
+    return callback
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    """
+    记录 DNS 解析、建立连接与收到响应头的时间点，见 instrumentation.RequestEvent
+    """
+    config = aiohttp.TraceConfig()
+    config.on_dns_resolvehost_start.append(_trace_callback("dns_start"))
+    config.on_dns_resolvehost_end.append(_trace_callback("dns_end"))
+    config.on_connection_create_start.append(_trace_callback("connect_start"))
+    config.on_connection_create_end.append(_trace_callback("connect_end"))
+    config.on_request_headers_sent.append(_trace_callback("request_start"))
+    config.on_request_end.append(_trace_callback("headers_received"))
+    return config
+
+
+def create_aiohttp_session(loop: asyncio.AbstractEventLoop) -> aiohttp.ClientSession:
+    """
+    创建 aiohttp 会话
+
+    Args:
+        loop (asyncio.AbstractEventLoop): 会话所属的事件循环
+
+    Returns:
+        aiohttp.ClientSession
+    """
+    connector = aiohttp.TCPConnector(
+        limit=settings.pool_max_connections,
+        limit_per_host=settings.pool_max_connections_per_host,
+        keepalive_timeout=settings.pool_keepalive_expiry,
+        use_dns_cache=settings.dns_cache_ttl != 0,
+        ttl_dns_cache=settings.dns_cache_ttl,
+        loop=loop,
+    )
+    return aiohttp.ClientSession(
+        loop=loop,
+        connector=connector,
+        trust_env=True,
+        trace_configs=[_trace_config()],
+    )
+
+
+def close_later(session: Session) -> None:
+    """
+    关闭被替换的会话。为了不打断仍在进行的请求，等待 settings.timeout 秒后再关闭
+
+    Args:
+        session (httpx.Client | httpx.AsyncClient | aiohttp.ClientSession): 被替换的会话
+    """
+    delay = settings.timeout
+    if isinstance(session, httpx.Client):
+        timer = threading.Timer(delay, session.close)
+        timer.daemon = True
+        timer.start()
+        return
+
+    async def close() -> None:
+        await asyncio.sleep(delay)
+        if isinstance(session, httpx.AsyncClient):
+            await session.aclose()
+        else:
+            await session.close()
+
+    try:
+        asyncio.get_running_loop().create_task(close())
+    except RuntimeError:
+        # 不在事件循环中，无法关闭异步会话，交给垃圾回收
+        pass
+
+
+def _read_stat(read: Callable[[], Any]) -> Optional[Any]:
+    # 连接池统计依赖 httpx / httpcore / aiohttp 的私有属性，版本变化后读取不到时返回 None
+    try:
+        return read()
+    except Exception:
+        return None
+
+
+def pool_stats(session: Session) -> Dict[str, Any]:
+    """
+    统计会话连接池的使用情况
+
+    Args:
+        session (httpx.Client | httpx.AsyncClient | aiohttp.ClientSession): 会话
+
+    Returns:
+        dict: client（httpx / aiohttp）、in_use（使用中的连接数）、idle（空闲连接数）、
+        queued（等待连接的请求数）、limit（连接数上限，0 为不限制），读取不到的统计为 None
+    """
+    if isinstance(session, aiohttp.ClientSession):
+        connector = getattr(session, "connector", None)
+        acquired = getattr(connector, "_acquired", None)
+        conns = getattr(connector, "_conns", None)
+        waiters = getattr(connector, "_waiters", None)
+        return {
+            "client": "aiohttp",
+            "in_use": _read_stat(lambda: len(acquired)),
+            "idle": _read_stat(lambda: sum(len(c) for c in conns.values())),
+            "queued": _read_stat(lambda: sum(len(w) for w in waiters.values())),
+            "limit": getattr(connector, "limit", None),
+        }
+    transports = [getattr(session, "_transport", None)] + list(
+        getattr(session, "_mounts", {}).values()
+    )
+    # 自定义的传输层没有连接池
+    pools = [getattr(t, "_pool", None) for t in transports]
+    pools = [pool for pool in pools if pool is not None]
+    connections = _read_stat(
+        lambda: [
+            c.is_idle() for pool in pools for c in getattr(pool, "connections", None)
+        ]
+    )
+    return {
+        "client": "httpx",
+        "in_use": None if connections is None else connections.count(False),
+        "idle": None if connections is None else connections.count(True),
+        "queued": _read_stat(
+            lambda: sum(
+                1
+                for pool in pools
+                for r in getattr(pool, "_requests", None)
+                if r.is_queued()
+            )
+        ),
+        "limit": settings.pool_max_connections,
+    }
+
+
+def report_pool_stats(session: Session) -> None:
+    """
+    设置了 settings.pool_metrics_hook 时，将会话连接池的使用情况传给它
+    """
+    hook = settings.pool_metrics_hook
+    if not callable(hook):
+        return
+    try:
+        # pylint 只能推断出 settings 中的默认值 None
+        hook(pool_stats(session))  # pylint: disable=not-callable
+    except Exception as e:
+        settings.logger.warning("pool_metrics_hook 出错：%s", e)
+
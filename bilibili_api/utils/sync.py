@@ -4,11 +4,19 @@ bilibili_api.utils.sync
 同步执行异步函数
 """
 
+import atexit
 import asyncio
-from typing import Any, TypeVar, Coroutine
+import threading
+from typing import Any, Union, TypeVar, Coroutine
+
+from .. import settings
 
 T = TypeVar("T")
 
+__background_loop: Union[asyncio.AbstractEventLoop, None] = None
+__background_thread: Union[threading.Thread, None] = None
+__background_lock = threading.Lock()
+
 
 def __ensure_event_loop() -> None:
     try:
@@ -18,16 +26,87 @@ def __ensure_event_loop() -> None:
         asyncio.set_event_loop(asyncio.new_event_loop())
 
 
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    获取后台事件循环，首次调用时在守护线程中启动。
+
+    开启 settings.sync_background_loop 后，sync() 与各 *_sync 方法都在这个事件循环中执行，
+    共用它的会话（连接池）。
+
+    Returns:
+        asyncio.AbstractEventLoop: 后台事件循环
+    """
+    global __background_loop, __background_thread
+    with __background_lock:
+        if __background_loop is None or __background_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(
+                target=run, name="bilibili_api-background-loop", daemon=True
+            )
+            thread.start()
+            ready.wait()
+            __background_loop = loop
+            __background_thread = thread
+    return __background_loop
+
+
+def run_in_background(coroutine: Coroutine[Any, Any, T]) -> T:
+    """
+    在后台事件循环中执行异步函数，并在当前线程等待结果。可以在多个线程中同时调用。
+
+    Args:
+        coroutine (Coroutine): 异步函数
+
+    Returns:
+        该异步函数的返回值
+    """
+    loop = get_background_loop()
+    if threading.current_thread() is __background_thread:
+        coroutine.close()
+        raise RuntimeError("不能在后台事件循环中同步等待异步函数，请直接 await。")
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+@atexit.register
+def __stop_background_loop() -> None:
+    """
+    程序退出时关闭后台事件循环中的会话并停止事件循环。
+    """
+    loop = __background_loop
+    if loop is None or loop.is_closed() or not loop.is_running():
+        return
+    from .network import _close_sessions
+
+    try:
+        asyncio.run_coroutine_threadsafe(_close_sessions(), loop).result(timeout=5)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+    if __background_thread is not None:
+        __background_thread.join(timeout=5)
+
+
 def sync(coroutine: Coroutine[Any, Any, T]) -> T:
     """
     同步执行异步函数，使用可参考 [同步执行异步代码](https://nemo2011.github.io/bilibili-api/#/sync-executor)
 
+    开启 settings.sync_background_loop 时在后台事件循环中执行，可以在多个线程中同时调用。
+
     Args:
         coroutine (Coroutine): 异步函数
 
     Returns:
         该异步函数的返回值
     """
+    if settings.sync_background_loop:
+        return run_in_background(coroutine)
     __ensure_event_loop()
     loop = asyncio.get_event_loop()
     return loop.run_until_complete(coroutine)
@@ -6,134 +6,287 @@ bilibili_api.utils.utils
 
 import json
 import os
+import sys
+import pickle
 import random
-from typing import List, TypeVar
+import hashlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple, TypeVar, Union
 from ..exceptions import StatementException
 
 
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "api"))
+
+
+def _user_cache_dir() -> str:
+    """
+    当前用户的缓存目录，可以通过环境变量 BILIBILI_API_CACHE_DIR 指定
+    """
+    path = os.environ.get("BILIBILI_API_CACHE_DIR")
+    if path:
+        return path
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "bilibili_api")
+
+
+# API 注册表的 pickle 缓存所在目录，不写入可能只读的安装目录
+API_CACHE_DIR = _user_cache_dir()
+
+_api_registry: Union[Dict[str, dict], None] = None
+
+
+def _api_fingerprint() -> Tuple[List[str], str]:
+    """
+    data/api 下所有 json 文件的名称，以及由名称、大小和修改时间生成的指纹。
+
+    升级版本或修改 json 文件后指纹都会变化，缓存随之失效。
+    """
+    names = []
+    digest = hashlib.md5()
+    with os.scandir(API_DIR) as it:
+        entries = sorted(
+            (entry for entry in it if entry.name.endswith(".json")),
+            key=lambda entry: entry.name,
+        )
+    for entry in entries:
+        stat = entry.stat()
+        names.append(entry.name)
+        digest.update(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return names, digest.hexdigest()
+
+
+def _api_cache_prefix() -> str:
+    """
+    缓存文件名的前缀。缓存目录可能被多个安装位置与解释器共用，按两者区分
+    """
+    install = hashlib.md5(API_DIR.encode()).hexdigest()[:8]
+    return f"registry-{sys.implementation.cache_tag}-{install}-"
+
+
+def _load_api_registry() -> Dict[str, dict]:
+    """
+    读取所有 API 信息。优先读取 API_CACHE_DIR 中的 pickle 缓存，
+    不存在或已过期时解析 json 并尝试写入新的缓存，无法写入时仅在内存中保存。
+    """
+    names, fingerprint = _api_fingerprint()
+    prefix = _api_cache_prefix()
+    cache_dir = API_CACHE_DIR
+    cache_path = os.path.join(cache_dir, f"{prefix}{fingerprint}.pickle")
+    try:
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        pass
+
+    registry = {}
+    for name in names:
+        with open(os.path.join(API_DIR, name), encoding="utf8") as f:
+            registry[name[:-5].lower()] = json.load(f)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for old in os.listdir(cache_dir):
+            if old.startswith(prefix) and old.endswith(".pickle"):
+                os.remove(os.path.join(cache_dir, old))
+        # 先写入临时文件再替换，避免多个进程同时写入时读到不完整的缓存
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(registry, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        pass
+    return registry
+
+
+def get_api_registry() -> Dict[str, dict]:
+    """
+    获取进程内共享的 API 注册表，首次调用时加载。
+
+    Returns:
+        Dict[str, dict], 键为 data/api 下的文件名（不含后缀名），值为该文件的内容。
+    """
+    global _api_registry
+    if _api_registry is None:
+        _api_registry = _load_api_registry()
+    return _api_registry
+
+
 def get_api(field: str, *args) -> dict:
     """
     获取 API。
 
+    返回的字典在进程内共享，请勿修改。
+
     Args:
         field (str): API 所属分类，即 data/api 下的文件名（不含后缀名）
 
     Returns:
         dict, 该 API 的内容。
     """
-    path = os.path.abspath(
-        os.path.join(
-            os.path.dirname(__file__), "..", "data", "api", f"{field.lower()}.json"
-        )
-    )
-    if os.path.exists(path):
-        with open(path, encoding="utf8") as f:
-            data = json.load(f)
-            for arg in args:
-                data = data[arg]
-            return data
-    else:
+    data = get_api_registry().get(field.lower())
+    if data is None:
         return {}
+    for arg in args:
+        data = data[arg]
+    return data
+
+
+CRCPOLYNOMIAL = 0xEDB88320
+
+
+def _make_crc_table() -> List[int]:
+    table = []
+    for i in range(256):
+        crcreg = i
+        for _ in range(8):
+            if (crcreg & 1) != 0:
+                crcreg = CRCPOLYNOMIAL ^ (crcreg >> 1)
+            else:
+                crcreg >>= 1
+        table.append(crcreg)
+    return table
+
+
+CRC_TABLE = _make_crc_table()
+
+# 十进制数字按十六进制展开后，判断是否存在大于 9 的位所用的掩码
+_NIBBLE_8 = int("8" * 32, 16)
+_NIBBLE_4 = int("4" * 32, 16)
+_NIBBLE_2 = int("2" * 32, 16)
+
+
+def _crc32_state(text: str) -> int:
+    """
+    CRC32 寄存器在处理完 text 后的值（未取反）。
+    """
+    crcstart = 0xFFFFFFFF
+    for char in text:
+        crcstart = (crcstart >> 8) ^ CRC_TABLE[(crcstart ^ ord(char)) & 0xFF]
+    return crcstart
+
+
+@lru_cache(maxsize=None)
+def _crc32_uid_basis(
+    length: int,
+) -> Tuple[int, List[Tuple[int, int, int]], List[int]]:
+    """
+    为长度为 length 的十进制 UID 预先计算 CRC32 的线性方程组。
+
+    CRC32 在 GF(2) 上是仿射的：把 UID 的每一位数字看作 4 个比特（即按十六进制展开），
+    则 CRC32 寄存器 = const ^ 各比特对应列向量的异或。这里对列向量做消元，
+    得到 (const, 带组合记录的基, 零空间基)，之后每次求解只需常数次异或。
+
+    Returns:
+        Tuple[int, List[Tuple[int, int, int]], List[int]]: 全为 0 时的寄存器值、(主元位, 向量, 组合) 列表、零空间基
+    """
+    zeros = "0" * length
+    const = _crc32_state(zeros)
+    basis: List[Tuple[int, int, int]] = []
+    null_space: List[int] = []
+    for pos in range(length):
+        for bit in range(4):
+            digits = zeros[:pos] + chr(0x30 ^ (1 << bit)) + zeros[pos + 1 :]
+            vec = _crc32_state(digits) ^ const
+            combo = 1 << (4 * (length - 1 - pos) + bit)
+            for pivot, b_vec, b_combo in basis:
+                if vec >> pivot & 1:
+                    vec ^= b_vec
+                    combo ^= b_combo
+            if vec == 0:
+                null_space.append(combo)
+                continue
+            pivot = vec.bit_length() - 1
+            # 保持基为简化行阶梯形，求解时按任意顺序消元均可
+            for i, (b_pivot, b_vec, b_combo) in enumerate(basis):
+                if b_vec >> pivot & 1:
+                    basis[i] = (b_pivot, b_vec ^ vec, b_combo ^ combo)
+            basis.append((pivot, vec, combo))
+    return const, basis, null_space
+
+
+def _crack_uid_candidates(crc32: str, max_digits: int = 10) -> List[int]:
+    """
+    求出所有位数不超过 max_digits 且 CRC32 摘要等于 crc32 的 UID，从小到大排列。
+    """
+    target = int(crc32, 16) ^ 0xFFFFFFFF
+    result = []
+    for length in range(1, max_digits + 1):
+        const, basis, null_space = _crc32_uid_basis(length)
+        rest = target ^ const
+        solution = 0
+        for pivot, vec, combo in basis:
+            if rest >> pivot & 1:
+                rest ^= vec
+                solution ^= combo
+        if rest != 0:
+            continue
+        lead_shift = 4 * (length - 1)
+        # 按格雷码顺序遍历零空间，每个候选只需一次异或
+        candidate = solution
+        for i in range(1 << len(null_space)):
+            if i:
+                candidate ^= null_space[(i & -i).bit_length() - 1]
+            if candidate & _NIBBLE_8 & (
+                (candidate & _NIBBLE_4) << 1 | (candidate & _NIBBLE_2) << 2
+            ):
+                # 存在大于 9 的“数字”
+                continue
+            if candidate >> lead_shift == 0 and length > 1:
+                # 首位为 0
+                continue
+            result.append(int("%x" % candidate))
+    result.sort()
+    return result
 
 
-def crack_uid(crc32: str):
+def crack_uid(crc32: str, max_digits: int = 10):
     """
     弹幕中的 CRC32 ID 转换成用户 UID。
 
     警告，破解后的 UID 不一定准确，有存在误差，仅供参考。
 
-    代码翻译自：https://github.com/esterTion/BiliBili_crc2mid。
+    通过在 GF(2) 上求解线性方程组直接得到结果，无需穷举。位数不超过 8 位的 UID 唯一对应一个结果，
+    更长的 UID 需要检查 16^(位数 - 8) 个候选，因此 max_digits 不宜超过 12。
 
     Args:
         crc32 (str):  crc32 计算摘要后的 UID。
 
+        max_digits (int, optional): UID 的最大位数。Defaults to 10.
+
     Returns:
-        int, 真实用户 UID，不一定准确。
-    """
-    __CRCPOLYNOMIAL = 0xEDB88320
-    __crctable = [None] * 256
-    __index = [None] * 4
-
-    def __create_table():
-        for i in range(256):
-            crcreg = i
-            for j in range(8):
-                if (crcreg & 1) != 0:
-                    crcreg = __CRCPOLYNOMIAL ^ (crcreg >> 1)
-                else:
-                    crcreg >>= 1
-            __crctable[i] = crcreg
-
-    __create_table()
-
-    def __crc32(input_):
-        if type(input_) != str:
-            input_ = str(input_)
-        crcstart = 0xFFFFFFFF
-        len_ = len(input_)
-        for i in range(len_):
-            index = (crcstart ^ ord(input_[i])) & 0xFF
-            crcstart = (crcstart >> 8) ^ __crctable[index]
-        return crcstart
-
-    def __crc32lastindex(input_):
-        if type(input_) != str:
-            input_ = str(input_)
-        crcstart = 0xFFFFFFFF
-        len_ = len(input_)
-        index = None
-        for i in range(len_):
-            index = (crcstart ^ ord(input_[i])) & 0xFF
-            crcstart = (crcstart >> 8) ^ __crctable[index]
-        return index
-
-    def __getcrcindex(t):
-        for i in range(256):
-            if __crctable[i] >> 24 == t:
-                return i
+        str, 真实用户 UID，不一定准确，存在多个结果时取最小者。找不到时返回 -1。
+    """
+    candidates = _crack_uid_candidates(crc32, max_digits)
+    if not candidates:
         return -1
+    return str(candidates[0])
 
-    def __deepCheck(i, index):
-        tc = 0x00
-        str_ = ""
-        hash_ = __crc32(i)
-        tc = hash_ & 0xFF ^ index[2]
-        if not (57 >= tc >= 48):
-            return [0]
-        str_ += str(tc - 48)
-        hash_ = __crctable[index[2]] ^ (hash_ >> 8)
-
-        tc = hash_ & 0xFF ^ index[1]
-        if not (57 >= tc >= 48):
-            return [0]
-        str_ += str(tc - 48)
-        hash_ = __crctable[index[1]] ^ (hash_ >> 8)
-
-        tc = hash_ & 0xFF ^ index[0]
-        if not (57 >= tc >= 48):
-            return [0]
-        str_ += str(tc - 48)
-        hash_ = __crctable[index[0]] ^ (hash_ >> 8)
-
-        return [1, str_]
-
-    ht = int(crc32, 16) ^ 0xFFFFFFFF
-    i = 3
-    while i >= 0:
-        __index[3 - i] = __getcrcindex(ht >> (i * 8))
-        # pylint: disable=invalid-sequence-index
-        snum = __crctable[__index[3 - i]]
-        ht ^= snum >> ((3 - i) * 8)
-        i -= 1
-    for i in range(10000000):
-        lastindex = __crc32lastindex(i)
-        if lastindex == __index[3]:
-            deepCheckData = __deepCheck(i, __index)
-            if deepCheckData[0]:
-                break
-    if i == 10000000:
-        return -1
-    return str(i) + deepCheckData[1]
+
+def crack_uids(crc32s: Iterable[str], max_digits: int = 10) -> List[Union[str, int]]:
+    """
+    批量将弹幕中的 CRC32 ID 转换成用户 UID，重复的 CRC32 ID 只计算一次。
+
+    Args:
+        crc32s (Iterable[str]): crc32 计算摘要后的 UID 列表。
+
+        max_digits (int, optional): UID 的最大位数。Defaults to 10.
+
+    Returns:
+        List[str | int], 与输入一一对应的 UID，找不到时为 -1。
+    """
+    cache: Dict[str, Union[str, int]] = {}
+    result = []
+    for crc32 in crc32s:
+        uid = cache.get(crc32)
+        if uid is None:
+            uid = cache[crc32] = crack_uid(crc32, max_digits)
+        result.append(uid)
+    return result
 
 
 def join(seperator: str, array: list):
@@ -4,24 +4,27 @@ bilibili_api.utils.varint
 变长数字字节相关。
 """
 
-from typing import Tuple
+from typing import Tuple, Union
 
 
-def read_varint(stream: bytes) -> Tuple[int, int]:
+def read_varint(stream: bytes, offset: int = 0) -> Tuple[int, int]:
     """
     读取 varint。
 
     Args:
         stream (bytes): 字节流。
 
+        offset (int, optional): 起始位置，传入后无需再对字节流切片。Defaults to 0.
+
     Returns:
         Tuple[int, int]，真实值和占用长度。
     """
     value = 0
-    position = 0
+    position = offset
     shift = 0
+    length = len(stream)
     while True:
-        if position >= len(stream):
+        if position >= length:
             break
         byte = stream[position]
         value += (byte & 0b01111111) << shift
@@ -29,4 +32,31 @@ def read_varint(stream: bytes) -> Tuple[int, int]:
             break
         position += 1
         shift += 7
-    return value, position + 1
+    return value, position - offset + 1
+
+
+def read_varint_at(stream: Union[bytes, memoryview], pos: int) -> Tuple[int, int]:
+    """
+    从指定位置读取 varint，单字节时走快速路径。
+
+    Args:
+        stream (bytes | memoryview): 字节流。
+
+        pos (int): 起始位置。
+
+    Returns:
+        Tuple[int, int]，真实值和读取后的新位置。
+    """
+    byte = stream[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    value = byte & 0x7F
+    shift = 7
+    pos += 1
+    while True:
+        byte = stream[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
@@ -17,7 +17,7 @@ from enum import Enum
 from inspect import isfunction
 from functools import cmp_to_key
 from dataclasses import dataclass
-from typing import Any, List, Union, Optional
+from typing import Any, List, Union, Optional, AsyncGenerator
 
 import httpx
 import aiohttp
@@ -27,8 +27,12 @@ from .utils.aid_bvid_transformer import bvid2aid, aid2bvid
 from .utils.utils import get_api
 from .utils.AsyncEvent import AsyncEvent
 from .utils.credential import Credential
-from .utils.BytesReader import BytesReader
-from .utils.danmaku import Danmaku, SpecialDanmaku
+from .utils.danmaku import Danmaku, DanmakuBatch, SpecialDanmaku
+from .utils.danmaku_protobuf import (
+    decode_danmaku_view,
+    iter_danmaku_segments,
+    decode_special_danmakus,
+)
 from .utils.network import get_aiohttp_session, Api, get_session
 from .exceptions import (
     ArgsException,
@@ -648,183 +652,7 @@ class Video:
         except Exception as e:
             raise NetworkException(-1, str(e))
 
-        resp_data = resp.read()
-        json_data = {}
-        reader = BytesReader(resp_data)
-
-        # 解析二进制数据流
-
-        def read_dm_seg(stream: bytes):
-            reader_ = BytesReader(stream)
-            data = {}
-            while not reader_.has_end():
-                t = reader_.varint() >> 3
-                if t == 1:
-                    data["page_size"] = reader_.varint()
-                elif t == 2:
-                    data["total"] = reader_.varint()
-                else:
-                    continue
-            return data
-
-        def read_flag(stream: bytes):
-            reader_ = BytesReader(stream)
-            data = {}
-            while not reader_.has_end():
-                t = reader_.varint() >> 3
-                if t == 1:
-                    data["rec_flag"] = reader_.varint()
-                elif t == 2:
-                    data["rec_text"] = reader_.string()
-                elif t == 3:
-                    data["rec_switch"] = reader_.varint()
-                else:
-                    continue
-            return data
-
-        def read_command_danmakus(stream: bytes):
-            reader_ = BytesReader(stream)
-            data = {}
-            while not reader_.has_end():
-                t = reader_.varint() >> 3
-                if t == 1:
-                    data["id"] = reader_.varint()
-                elif t == 2:
-                    data["oid"] = reader_.varint()
-                elif t == 3:
-                    data["mid"] = reader_.varint()
-                elif t == 4:
-                    data["commend"] = reader_.string()
-                elif t == 5:
-                    data["content"] = reader_.string()
-                elif t == 6:
-                    data["progress"] = reader_.varint()
-                elif t == 7:
-                    data["ctime"] = reader_.string()
-                elif t == 8:
-                    data["mtime"] = reader_.string()
-                elif t == 9:
-                    data["extra"] = json.loads(reader_.string())
-
-                elif t == 10:
-                    data["id_str"] = reader_.string()
-                else:
-                    continue
-            return data
-
-        def read_settings(stream: bytes):
-            reader_ = BytesReader(stream)
-            data = {}
-            while not reader_.has_end():
-                t = reader_.varint() >> 3
-
-                if t == 1:
-                    data["dm_switch"] = reader_.bool()
-                elif t == 2:
-                    data["ai_switch"] = reader_.bool()
-                elif t == 3:
-                    data["ai_level"] = reader_.varint()
-                elif t == 4:
-                    data["enable_top"] = reader_.bool()
-                elif t == 5:
-                    data["enable_scroll"] = reader_.bool()
-                elif t == 6:
-                    data["enable_bottom"] = reader_.bool()
-                elif t == 7:
-                    data["enable_color"] = reader_.bool()
-                elif t == 8:
-                    data["enable_special"] = reader_.bool()
-                elif t == 9:
-                    data["prevent_shade"] = reader_.bool()
-                elif t == 10:
-                    data["dmask"] = reader_.bool()
-                elif t == 11:
-                    data["opacity"] = reader_.float(True)
-                elif t == 12:
-                    data["dm_area"] = reader_.varint()
-                elif t == 13:
-                    data["speed_plus"] = reader_.float(True)
-                elif t == 14:
-                    data["font_size"] = reader_.float(True)
-                elif t == 15:
-                    data["screen_sync"] = reader_.bool()
-                elif t == 16:
-                    data["speed_sync"] = reader_.bool()
-                elif t == 17:
-                    data["font_family"] = reader_.string()
-                elif t == 18:
-                    data["bold"] = reader_.bool()
-                elif t == 19:
-                    data["font_border"] = reader_.varint()
-                elif t == 20:
-                    data["draw_type"] = reader_.string()
-                else:
-                    continue
-            return data
-
-        def read_image_danmakus(string: bytes):
-            image_list = []
-            reader_ = BytesReader(string)
-            while not reader_.has_end():
-                type_ = reader_.varint() >> 3
-                if type_ == 1:
-                    details_dict: dict[Any, Any] = {"texts": []}
-                    img_details = reader_.bytes_string()
-                    reader_details = BytesReader(img_details)
-                    while not reader_details.has_end():
-                        type_details = reader_details.varint() >> 3
-                        if type_details == 1:
-                            details_dict["texts"].append(reader_details.string())
-                        elif type_details == 2:
-                            details_dict["image"] = reader_details.string()
-                        elif type_details == 3:
-                            id_string = reader_details.bytes_string()
-                            id_reader = BytesReader(id_string)
-                            while not id_reader.has_end():
-                                type_id = id_reader.varint() >> 3
-                                if type_id == 2:
-                                    details_dict["id"] = id_reader.varint()
-                                else:
-                                    raise ResponseException("解析响应数据错误")
-                    image_list.append(details_dict)
-                else:
-                    raise ResponseException("解析响应数据错误")
-            return image_list
-
-        while not reader.has_end():
-            type_ = reader.varint() >> 3
-
-            if type_ == 1:
-                json_data["state"] = reader.varint()
-            elif type_ == 2:
-                json_data["text"] = reader.string()
-            elif type_ == 3:
-                json_data["text_side"] = reader.string()
-            elif type_ == 4:
-                json_data["dm_seg"] = read_dm_seg(reader.bytes_string())
-            elif type_ == 5:
-                json_data["flag"] = read_flag(reader.bytes_string())
-            elif type_ == 6:
-                if "special_dms" not in json_data:
-                    json_data["special_dms"] = []
-                json_data["special_dms"].append(reader.string())
-            elif type_ == 7:
-                json_data["check_box"] = reader.bool()
-            elif type_ == 8:
-                json_data["count"] = reader.varint()
-            elif type_ == 9:
-                if "command_dms" not in json_data:
-                    json_data["command_dms"] = []
-                json_data["command_dms"].append(
-                    read_command_danmakus(reader.bytes_string())
-                )
-            elif type_ == 10:
-                json_data["dm_setting"] = read_settings(reader.bytes_string())
-            elif type_ == 12:
-                json_data["image_dms"] = read_image_danmakus(reader.bytes_string())
-            else:
-                continue
-        return json_data
+        return decode_danmaku_view(resp.read())
 
     async def get_danmakus(
         self,
@@ -833,6 +661,7 @@ class Video:
         cid: Union[int, None] = None,
         from_seg: Union[int, None] = None,
         to_seg: Union[int, None] = None,
+        concurrency: int = 1,
     ) -> List[Danmaku]:
         """
         获取弹幕。
@@ -848,6 +677,8 @@ class Video:
 
             to_seg (int, optional): 到第几段结束(0 开始编号，None 为到最后一段，包含编号的段，一段 6 分钟). Defaults to None.
 
+            concurrency (int, optional): 同时获取的最大段数，结果仍按段的顺序排列. Defaults to 1.
+
             注意：
             - 1. 段数可以使用 `get_danmaku_view()["dm_seg"]["total"]` 查询。
             - 2. `from_seg` 和 `to_seg` 仅对 `date == None` 的时候有效果。
@@ -856,6 +687,55 @@ class Video:
         Returns:
             List[Danmaku]: Danmaku 类的列表。
         """
+        danmakus = []
+        async for seg_danmakus in self.iter_danmakus(
+            page_index=page_index,
+            date=date,
+            cid=cid,
+            from_seg=from_seg,
+            to_seg=to_seg,
+            concurrency=concurrency,
+            batch=True,
+        ):
+            danmakus.extend(seg_danmakus)
+        return danmakus
+
+    async def iter_danmakus(
+        self,
+        page_index: int = 0,
+        date: Union[datetime.date, None] = None,
+        cid: Union[int, None] = None,
+        from_seg: Union[int, None] = None,
+        to_seg: Union[int, None] = None,
+        concurrency: int = 1,
+        batch: bool = False,
+        columnar: bool = False,
+    ) -> AsyncGenerator[Union[Danmaku, List[Danmaku], DanmakuBatch], None]:
+        """
+        逐段获取弹幕，每解析完一段就产出，不会在内存中保留整个视频的弹幕。
+
+        参数与 `get_danmakus` 相同。
+
+        Args:
+            page_index (int, optional): 分 P 号，从 0 开始。Defaults to None
+
+            date       (datetime.Date | None, optional): 指定日期后为获取历史弹幕，精确到年月日。Defaults to None.
+
+            cid        (int | None, optional): 分 P 的 ID。Defaults to None
+
+            from_seg (int, optional): 从第几段开始(0 开始编号，None 为从第一段开始，一段 6 分钟). Defaults to None.
+
+            to_seg (int, optional): 到第几段结束(0 开始编号，None 为到最后一段，包含编号的段，一段 6 分钟). Defaults to None.
+
+            concurrency (int, optional): 同时获取的最大段数，结果仍按段的顺序产出. Defaults to 1.
+
+            batch (bool, optional): 是否按段产出弹幕列表，否则逐条产出弹幕. Defaults to False.
+
+            columnar (bool, optional): 是否将每段解析为按列存储的 DanmakuBatch 并按段产出，此时忽略 batch. Defaults to False.
+
+        Returns:
+            AsyncGenerator[Danmaku | List[Danmaku] | DanmakuBatch, None]: 弹幕、每段的弹幕列表或 DanmakuBatch。
+        """
         if date is not None:
             self.credential.raise_for_no_sessdata()
 
@@ -865,7 +745,6 @@ class Video:
 
             cid = await self.__get_cid_by_index(page_index)
 
-        session = get_session()
         aid = self.get_aid()
         params: dict[str, Any] = {"oid": cid, "type": 1, "pid": aid}
         if date is not None:
@@ -873,7 +752,8 @@ class Video:
             api = API["danmaku"]["get_history_danmaku"]
             params["date"] = date.strftime("%Y-%m-%d")
             params["type"] = 1
-            from_seg = to_seg = 0
+            # 仅当获取当前弹幕时需要 segment_index 参数
+            segments = [None]
         else:
             api = API["danmaku"]["get_danmaku"]
             if from_seg == None:
@@ -881,116 +761,21 @@ class Video:
             if to_seg == None:
                 view = await self.get_danmaku_view(cid=cid)
                 to_seg = view["dm_seg"]["total"] - 1
+            segments = range(from_seg, to_seg + 1)
 
-        danmakus = []
-
-        for seg in range(from_seg, to_seg + 1):
-            if date is None:
-                # 仅当获取当前弹幕时需要该参数
-                params["segment_index"] = seg + 1
-
-            config = {}
-            config["url"] = api["url"]
-            config["params"] = params
-            config["headers"] = {
-                "Referer": "https://www.bilibili.com",
-                "User-Agent": "Mozilla/5.0",
-            }
-            config["cookies"] = self.credential.get_cookies()
-
-            try:
-                req = await session.get(**config)
-            except Exception as e:
-                raise NetworkException(-1, str(e))
-
-            if "content-type" not in req.headers.keys():
-                break
-            else:
-                content_type = req.headers["content-type"]
-                if content_type != "application/octet-stream":
-                    raise ResponseException("返回数据类型错误：")
-
-            # 解析二进制流数据
-            data = req.read()
-            if data == b"\x10\x01":
-                # 视频弹幕被关闭
-                raise DanmakuClosedException()
-
-            reader = BytesReader(data)
-            while not reader.has_end():
-                type_ = reader.varint() >> 3
-                if type_ != 1:
-                    if type_ == 4:
-                        reader.bytes_string()
-                        # 什么鬼？我用 protoc 解析出乱码！
-                    elif type_ == 5:
-                        # 大会员专属颜色
-                        reader.varint()
-                        reader.varint()
-                        reader.varint()
-                        reader.bytes_string()
-                    elif type_ == 13:
-                        # ???
-                        continue
-                    else:
-                        raise ResponseException("解析响应数据错误")
-
-                dm = Danmaku("")
-                dm_pack_data = reader.bytes_string()
-                dm_reader = BytesReader(dm_pack_data)
-
-                while not dm_reader.has_end():
-                    data_type = dm_reader.varint() >> 3
-
-                    if data_type == 1:
-                        dm.id_ = dm_reader.varint()
-                    elif data_type == 2:
-                        dm.dm_time = dm_reader.varint() / 1000
-                    elif data_type == 3:
-                        dm.mode = dm_reader.varint()
-                    elif data_type == 4:
-                        dm.font_size = dm_reader.varint()
-                    elif data_type == 5:
-                        color = dm_reader.varint()
-                        if color != 60001:
-                            color = hex(color)[2:]
-                        else:
-                            color = "special"
-                        dm.color = color
-                    elif data_type == 6:
-                        dm.crc32_id = dm_reader.string()
-                    elif data_type == 7:
-                        dm.text = dm_reader.string()
-                    elif data_type == 8:
-                        dm.send_time = dm_reader.varint()
-                    elif data_type == 9:
-                        dm.weight = dm_reader.varint()
-                    elif data_type == 10:
-                        dm.action = str(dm_reader.string())
-                    elif data_type == 11:
-                        dm.pool = dm_reader.varint()
-                    elif data_type == 12:
-                        dm.id_str = dm_reader.string()
-                    elif data_type == 13:
-                        dm.attr = dm_reader.varint()
-                    elif data_type == 14:
-                        dm.uid = dm_reader.varint()
-                    elif data_type == 15:
-                        dm_reader.varint()
-                    elif data_type == 20:
-                        dm_reader.bytes_string()
-                    elif data_type == 21:
-                        dm_reader.bytes_string()
-                    elif data_type == 22:
-                        dm_reader.bytes_string()
-                    elif data_type == 25:
-                        dm_reader.varint()
-                    elif data_type == 26:
-                        dm_reader.varint()
-                    else:
-                        break
-                danmakus.append(dm)
-        return danmakus
+        seg_iter = iter_danmaku_segments(
+            api["url"], params, segments, self.credential, concurrency, columnar
+        )
+        try:
+            async for _, seg_danmakus in seg_iter:
+                if batch or columnar:
+                    yield seg_danmakus
+                else:
+                    for dm in seg_danmakus:
+                        yield dm
+        finally:
+            # 提前结束迭代时及时取消尚未完成的请求
+            await seg_iter.aclose()
 
     async def get_special_dms(
         self, page_index: int = 0, cid: Union[int, None] = None
@@ -1020,39 +805,7 @@ class Video:
             sess = httpx.AsyncClient()
         dm_content = await sess.get(special_dms, cookies=self.credential.get_cookies())
         dm_content.raise_for_status()
-        reader = BytesReader(dm_content.content)
-        dms: List[SpecialDanmaku] = []
-        while not reader.has_end():
-            spec_dm = SpecialDanmaku("")
-            type_ = reader.varint() >> 3
-            if type_ == 1:
-                reader_ = BytesReader(reader.bytes_string())
-                while not reader_.has_end():
-                    type__ = reader_.varint() >> 3
-                    if type__ == 1:
-                        spec_dm.id_ = reader_.varint()
-                    elif type__ == 3:
-                        spec_dm.mode = reader_.varint()
-                    elif type__ == 4:
-                        reader_.varint()
-                    elif type__ == 5:
-                        reader_.varint()
-                    elif type__ == 6:
-                        reader_.string()
-                    elif type__ == 7:
-                        spec_dm.content = reader_.string()
-                    elif type__ == 8:
-                        reader_.varint()
-                    elif type__ == 11:
-                        spec_dm.pool = reader_.varint()
-                    elif type__ == 12:
-                        spec_dm.id_str = reader_.string()
-                    else:
-                        continue
-            else:
-                continue
-            dms.append(spec_dm)
-        return dms
+        return decode_special_danmakus(dm_content.content)
 
     async def get_history_danmaku_index(
         self,
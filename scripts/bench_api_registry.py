@@ -0,0 +1,119 @@
+"""
+API 注册表启动基准测试
+
+Usage:
+    python scripts/bench_api_registry.py
+
+对比旧的 get_api（每次调用都打开并解析 data/api 下的 json 文件）与进程内注册表：
+    - 导入 bilibili_api 时各模块调用 get_api 的总耗时（冷启动无缓存 / 有 pickle 缓存）
+    - 之后每次调用 get_api（例如 Api.from_file）的耗时
+    - 在子进程中 `import bilibili_api` 的总耗时
+"""
+
+import os
+import re
+import sys
+import json
+import glob
+import time
+import statistics
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+from bilibili_api.utils import utils
+
+RUNS = 20
+
+
+def legacy_get_api(field: str, *args) -> dict:
+    path = os.path.join(utils.API_DIR, f"{field.lower()}.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf8") as f:
+            data = json.load(f)
+            for arg in args:
+                data = data[arg]
+            return data
+    else:
+        return {}
+
+
+def import_time_fields():
+    # 导入时模块级别的 get_api 调用
+    fields = []
+    pattern = re.compile(r'^_?API\w* = (?:utils\.)?get_api\("([\w-]+)"\)', re.M)
+    for path in glob.glob(os.path.join(ROOT, "bilibili_api", "**", "*.py"), recursive=True):
+        with open(path, encoding="utf8") as f:
+            fields += pattern.findall(f.read())
+    return fields
+
+
+def clear_cache():
+    prefix = utils._api_cache_prefix()
+    for path in glob.glob(os.path.join(utils.API_CACHE_DIR, prefix + "*.pickle")):
+        os.remove(path)
+
+
+def legacy_load(fields):
+    start = time.perf_counter()
+    for field in fields:
+        legacy_get_api(field)
+    return time.perf_counter() - start
+
+
+def registry_load():
+    utils._api_registry = None
+    start = time.perf_counter()
+    utils.get_api_registry()
+    return time.perf_counter() - start
+
+
+def import_in_subprocess():
+    code = (
+        "import time; s = time.perf_counter(); import bilibili_api; "
+        "print(time.perf_counter() - s)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout)
+
+
+def main():
+    fields = import_time_fields()
+    legacy = min(legacy_load(fields) for _ in range(RUNS))
+    cold = []
+    for _ in range(RUNS):
+        clear_cache()
+        cold.append(registry_load())
+    warm = min(registry_load() for _ in range(RUNS))
+
+    print(f"get_api calls at import: {len(fields)}")
+    print(f"{'legacy (json per call)':>28}: {legacy * 1000:8.2f} ms")
+    print(f"{'registry, no cache':>28}: {min(cold) * 1000:8.2f} ms")
+    print(f"{'registry, pickle cache':>28}: {warm * 1000:8.2f} ms")
+
+    number = 2000
+    start = time.perf_counter()
+    for _ in range(number):
+        legacy_get_api("user", "info", "info")
+    per_legacy = (time.perf_counter() - start) / number
+    start = time.perf_counter()
+    for _ in range(number):
+        utils.get_api("user", "info", "info")
+    per_registry = (time.perf_counter() - start) / number
+    print(f"{'get_api per call, legacy':>28}: {per_legacy * 1e6:8.2f} us")
+    print(f"{'get_api per call, registry':>28}: {per_registry * 1e6:8.2f} us")
+
+    utils.get_api_registry()
+    times = [import_in_subprocess() for _ in range(5)]
+    print(f"{'import bilibili_api (median)':>28}: {statistics.median(times) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Api 构造与请求准备的基准测试
+
+Usage:
+    python scripts/bench_api_request.py
+
+测量不发送网络请求的部分：构造 Api 并更新参数、清理参数（_prepare_params_data）、
+生成请求配置（_prepare_request / _prepare_request_sync），即每个请求在进入 HTTP 客户端之前的开销。
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bilibili_api import Credential, settings
+from bilibili_api.utils.network import Api, get_api
+
+NUMBER = 20000
+
+API = get_api("video")
+INFO = API["info"]["info"]
+LIKE = API["operate"]["like"]
+CREDENTIAL = Credential(sessdata="sessdata", bili_jct="bili_jct", buvid3="buvid3")
+
+
+def construct_get():
+    return Api(**INFO, credential=CREDENTIAL).update_params(aid=170001, bvid=None)
+
+
+def construct_post():
+    return Api(**LIKE, credential=CREDENTIAL).update_data(
+        aid=170001, bvid=None, like=True
+    )
+
+
+def prepare_get_sync():
+    api = construct_get()
+    api._prepare_params_data()
+    return api._prepare_request_sync()
+
+
+def prepare_post_sync():
+    api = construct_post()
+    api._prepare_params_data()
+    return api._prepare_request_sync()
+
+
+async def prepare_get():
+    api = construct_get()
+    api._prepare_params_data()
+    return await api._prepare_request()
+
+
+async def prepare_post():
+    api = construct_post()
+    api._prepare_params_data()
+    return await api._prepare_request()
+
+
+def timeit(func):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(NUMBER):
+            func()
+        best = min(best, (time.perf_counter() - start) / NUMBER)
+    return best
+
+
+def timeit_async(func):
+    async def run():
+        for _ in range(NUMBER):
+            await func()
+
+    loop = asyncio.new_event_loop()
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        loop.run_until_complete(run())
+        best = min(best, (time.perf_counter() - start) / NUMBER)
+    loop.close()
+    return best
+
+
+def main():
+    rows = [
+        ("construct GET", timeit(construct_get)),
+        ("construct POST", timeit(construct_post)),
+        ("prepare GET sync", timeit(prepare_get_sync)),
+        ("prepare POST sync", timeit(prepare_post_sync)),
+    ]
+    for client in (settings.HTTPClient.HTTPX, settings.HTTPClient.AIOHTTP):
+        settings.http_client = client
+        rows.append((f"prepare GET {client.value}", timeit_async(prepare_get)))
+        rows.append((f"prepare POST {client.value}", timeit_async(prepare_post)))
+    settings.http_client = settings.HTTPClient.HTTPX
+    print(f"{'case':>22} {'us per call':>12}")
+    for name, seconds in rows:
+        print(f"{name:>22} {seconds * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+danmaku2ass 文本宽度、转义与样式片段缓存基准测试
+
+Usage:
+    python scripts/bench_danmaku2ass_cache.py
+
+按 Zipf 分布从常见弹幕（“哈哈哈”“233”“前方高能”……）与大量只出现一次的弹幕中抽样，
+构造接近真实视频的弹幕集合，分别在关闭缓存（旧实现）与开启缓存时生成 ASS，
+用 cProfile 统计 CalculateLength 与 WriteComment 的累计耗时，并检查两者输出一致。
+"""
+
+import io
+import os
+import sys
+import math
+import time
+import random
+import pstats
+import cProfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bilibili_api.utils import danmaku2ass
+
+COMMON = [
+    "哈哈哈",
+    "233",
+    "前方高能",
+    "awsl",
+    "？？？",
+    "哈哈哈哈哈哈",
+    "2333333",
+    "泪目",
+    "来了",
+    "打卡",
+    "好耶",
+    "下次一定",
+    "名场面",
+    "草",
+    "{空降} 12:34",
+]
+COUNT = 30000
+LENGTH = 1800
+REPEAT = 5
+
+
+def legacy_write_comment(
+    f,
+    c,
+    row,
+    width,
+    height,
+    bottomReserved,
+    fontsize,
+    duration_marquee,
+    duration_still,
+    styleid,
+):
+    text = danmaku2ass.ASSEscape(c[3])
+    styles = []
+    if c[4] == 1:
+        styles.append(
+            "\\an8\\pos(%(halfwidth)d, %(row)d)" % {"halfwidth": width / 2, "row": row}
+        )
+        duration = duration_still
+    elif c[4] == 2:
+        styles.append(
+            "\\an2\\pos(%(halfwidth)d, %(row)d)"
+            % {
+                "halfwidth": width / 2,
+                "row": danmaku2ass.ConvertType2(row, height, bottomReserved),
+            }
+        )
+        duration = duration_still
+    elif c[4] == 3:
+        styles.append(
+            "\\move(%(neglen)d, %(row)d, %(width)d, %(row)d)"
+            % {"width": width, "row": row, "neglen": -math.ceil(c[8])}
+        )
+        duration = duration_marquee
+    else:
+        styles.append(
+            "\\move(%(width)d, %(row)d, %(neglen)d, %(row)d)"
+            % {"width": width, "row": row, "neglen": -math.ceil(c[8])}
+        )
+        duration = duration_marquee
+    if not (-1 < c[6] - fontsize < 1):
+        styles.append("\\fs%.0f" % c[6])
+    if c[5] != 0xFFFFFF:
+        styles.append("\\c&H%s&" % danmaku2ass.ConvertColor(c[5]))
+        if c[5] == 0x000000:
+            styles.append("\\3c&HFFFFFF&")
+    f.write(
+        "Dialogue: 2,%(start)s,%(end)s,%(styleid)s,,0000,0000,0000,,{%(styles)s}%(text)s\n"
+        % {
+            "start": danmaku2ass.ConvertTimestamp(c[0]),
+            "end": danmaku2ass.ConvertTimestamp(c[0] + duration),
+            "styles": "".join(styles),
+            "text": text,
+            "styleid": styleid,
+        }
+    )
+
+
+CACHED = {
+    "WriteComment": danmaku2ass.WriteComment,
+    "ASSEscape": danmaku2ass.ASSEscape,
+    "CalculateLength": danmaku2ass.CalculateLength,
+}
+LEGACY = {
+    "WriteComment": legacy_write_comment,
+    "ASSEscape": danmaku2ass.ASSEscape.__wrapped__,
+    "CalculateLength": danmaku2ass.CalculateLength.__wrapped__,
+}
+
+
+def make_corpus():
+    random.seed(0)
+    vocab = COMMON + ["只出现一次的弹幕 %d 号" % i for i in range(COUNT // 3)]
+    weights = [1 / (k + 1) for k in range(len(COMMON))] + [0.001] * (COUNT // 3)
+    corpus = []
+    for i in range(COUNT):
+        corpus.append(
+            (
+                random.uniform(0, LENGTH),
+                random.choices(vocab, weights)[0],
+                random.choice((0, 0, 0, 0, 1, 2)),
+                random.choice((0xFFFFFF,) * 8 + (0xFE0302, 0x00CD00, 0x000000)),
+                random.choice((25, 25, 25, 18, 36)),
+            )
+        )
+    return corpus
+
+
+def run(corpus):
+    # 与 ReadCommentsBilibili 相同的方式构造评论，再生成 ASS
+    comments = []
+    for i, (dm_time, text, mode, color, size) in enumerate(corpus):
+        comments.append(
+            (
+                dm_time,
+                0,
+                i,
+                text,
+                mode,
+                color,
+                size,
+                (text.count("\n") + 1) * size,
+                danmaku2ass.CalculateLength(text) * size,
+            )
+        )
+    comments.sort()
+    random.seed(0)
+    f = io.StringIO()
+    danmaku2ass.ProcessComments(
+        comments, f, 1920, 1080, 0, "sans-serif", 25, 1.0, 7, 5, [], False, None
+    )
+    return f.getvalue()
+
+
+def bench(impl, corpus):
+    for name, func in impl.items():
+        setattr(danmaku2ass, name, func)
+    for func in (
+        CACHED["ASSEscape"],
+        CACHED["CalculateLength"],
+        danmaku2ass.GetStyleFragment,
+        danmaku2ass.GetDialogueFormat,
+    ):
+        func.cache_clear()
+    try:
+        # 取多次运行中最快的一次，减少机器抖动的影响
+        elapsed = float("inf")
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            output = run(corpus)
+            elapsed = min(elapsed, time.perf_counter() - start)
+
+        profiler = cProfile.Profile()
+        profiler.runcall(run, corpus)
+        stats = pstats.Stats(profiler).stats
+        cumtime = {}
+        for (_, _, func_name), (_, _, _, ct, _) in stats.items():
+            if func_name in ("CalculateLength", "WriteComment", "legacy_write_comment"):
+                key = "WriteComment" if "write" in func_name.lower() else func_name
+                cumtime[key] = cumtime.get(key, 0) + ct
+        return elapsed, cumtime, output
+    finally:
+        for name, func in CACHED.items():
+            setattr(danmaku2ass, name, func)
+
+
+def main():
+    corpus = make_corpus()
+    print(f"{COUNT} comments, {len(set(c[1] for c in corpus))} distinct texts")
+    print(
+        f"{'impl':>8} {'total (s)':>10} {'CalculateLength (s)':>20} {'WriteComment (s)':>17}"
+    )
+    outputs = []
+    for name, impl in (("legacy", LEGACY), ("cached", CACHED)):
+        elapsed, cumtime, output = bench(impl, corpus)
+        outputs.append(output)
+        print(
+            f"{name:>8} {elapsed:>10.3f} {cumtime['CalculateLength']:>20.3f} {cumtime['WriteComment']:>17.3f}"
+        )
+    assert outputs[0] == outputs[1], "两种实现的输出不一致"
+    print("ASSEscape cache:", danmaku2ass.ASSEscape.cache_info())
+    print("style cache:", danmaku2ass.GetStyleFragment.cache_info())
+
+
+if __name__ == "__main__":
+    main()
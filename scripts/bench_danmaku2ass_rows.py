@@ -0,0 +1,174 @@
+"""
+danmaku2ass 弹幕行分配基准测试
+
+Usage:
+    python scripts/bench_danmaku2ass_rows.py
+
+对比旧的逐像素行表（每个像素行一个槽位，逐行扫描）与按区间存储的 CommentRows，
+分别在 1080 与 2160 高度下运行 ProcessComments，并检查两者输出的 ASS 完全一致。
+"""
+
+import io
+import os
+import sys
+import math
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bilibili_api.utils import danmaku2ass
+
+TEXTS = ["哈哈哈", "233", "前方高能", "awsl", "这是一条比较长的弹幕，用来测试行分配的速度", "第一行\n第二行"]
+
+
+def legacy_test_free_rows(
+    rows, c, row, width, height, bottomReserved, duration_marquee, duration_still
+):
+    res = 0
+    rowmax = height - bottomReserved
+    targetRow = None
+    if c[4] in (1, 2):
+        while row < rowmax and res < c[7]:
+            if targetRow != rows[c[4]][row]:
+                targetRow = rows[c[4]][row]
+                if targetRow and targetRow[0] + duration_still > c[0]:
+                    break
+            row += 1
+            res += 1
+    else:
+        try:
+            thresholdTime = c[0] - duration_marquee * (1 - width / (c[8] + width))
+        except ZeroDivisionError:
+            thresholdTime = c[0] - duration_marquee
+        while row < rowmax and res < c[7]:
+            if targetRow != rows[c[4]][row]:
+                targetRow = rows[c[4]][row]
+                try:
+                    if targetRow and (
+                        targetRow[0] > thresholdTime
+                        or targetRow[0]
+                        + targetRow[8] * duration_marquee / (targetRow[8] + width)
+                        > c[0]
+                    ):
+                        break
+                except ZeroDivisionError:
+                    pass
+            row += 1
+            res += 1
+    return res
+
+
+def legacy_find_alternative_row(rows, c, height, bottomReserved):
+    res = 0
+    for row in range(height - bottomReserved - math.ceil(c[7])):
+        if not rows[c[4]][row]:
+            return row
+        elif rows[c[4]][row][0] < rows[c[4]][res][0]:
+            res = row
+    return res
+
+
+def legacy_mark_comment_row(rows, c, row):
+    try:
+        for i in range(row, row + math.ceil(c[7])):
+            rows[c[4]][i] = c
+    except IndexError:
+        pass
+
+
+def legacy_process(comments, f, width, height, fontsize, duration):
+    """
+    旧实现的行分配：逐像素行表，被占用时每次只前进一行。
+    """
+    styleid = "Danmaku2ASS_%04x" % random.randint(0, 0xFFFF)
+    danmaku2ass.WriteASSHead(f, width, height, "sans-serif", fontsize, 1.0, styleid)
+    rows = [[None] * (height + 1) for i in range(4)]
+    for i in comments:
+        row = 0
+        rowmax = height - i[7]
+        while row <= rowmax:
+            freerows = legacy_test_free_rows(
+                rows, i, row, width, height, 0, duration, duration
+            )
+            if freerows >= i[7]:
+                legacy_mark_comment_row(rows, i, row)
+                danmaku2ass.WriteComment(
+                    f, i, row, width, height, 0, fontsize, duration, duration, styleid
+                )
+                break
+            else:
+                row += freerows or 1
+        else:
+            row = legacy_find_alternative_row(rows, i, height, 0)
+            legacy_mark_comment_row(rows, i, row)
+            danmaku2ass.WriteComment(
+                f, i, row, width, height, 0, fontsize, duration, duration, styleid
+            )
+
+
+def new_process(comments, f, width, height, fontsize, duration):
+    danmaku2ass.ProcessComments(
+        comments,
+        f,
+        width,
+        height,
+        0,
+        "sans-serif",
+        fontsize,
+        1.0,
+        duration,
+        duration,
+        [],
+        False,
+        None,
+    )
+
+
+def make_comments(count, length, fontsize):
+    comments = []
+    for i in range(count):
+        text = random.choice(TEXTS)
+        size = random.choice((25, 25, 25, 18, 36)) * fontsize / 25.0
+        comments.append(
+            (
+                random.uniform(0, length),
+                0,
+                i,
+                text,
+                random.choice((0, 0, 0, 0, 1, 2, 3)),
+                0xFFFFFF,
+                size,
+                (text.count("\n") + 1) * size,
+                danmaku2ass.CalculateLength(text) * size,
+            )
+        )
+    comments.sort(key=lambda x: (x[0], x[2]))
+    return comments
+
+
+def bench(func, comments, width, height, fontsize):
+    random.seed(0)
+    f = io.StringIO()
+    start = time.perf_counter()
+    func(comments, f, width, height, fontsize, 5.0)
+    return time.perf_counter() - start, f.getvalue()
+
+
+def main():
+    print(f"{'height':>7} {'count':>7} {'legacy (s)':>11} {'new (s)':>9} {'speedup':>8}")
+    for width, height in ((1920, 1080), (3840, 2160)):
+        fontsize = height / 1080 * 36
+        for count in (5000, 20000):
+            random.seed(count)
+            comments = make_comments(count, 600, fontsize)
+            legacy, legacy_out = bench(legacy_process, comments, width, height, fontsize)
+            new, new_out = bench(new_process, comments, width, height, fontsize)
+            assert legacy_out == new_out, "两种实现的输出不一致"
+            print(
+                f"{height:>7} {count:>7} {legacy:>11.3f} {new:>9.3f} {legacy / new:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
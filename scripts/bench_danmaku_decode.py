@@ -0,0 +1,121 @@
+"""
+弹幕分段 protobuf 解析基准测试
+
+Usage:
+    python scripts/bench_danmaku_decode.py
+
+构造若干 MB 的 DmSegMobileReply 数据，对比旧的切片式解析（每次读取 varint 都复制剩余数据）
+与 bilibili_api.utils.danmaku_protobuf 的偏移量解析，观察耗时是否随数据量线性增长。
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bilibili_api.utils.varint import read_varint
+from bilibili_api.utils.danmaku_protobuf import decode_danmaku_segment
+
+TEXTS = ["哈哈哈", "233", "前方高能", "awsl", "这是一条比较长的弹幕，用来测试字符串解码的速度"]
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def encode_field(field: int, value) -> bytes:
+    if isinstance(value, int):
+        return encode_varint(field << 3) + encode_varint(value)
+    if isinstance(value, str):
+        value = value.encode("utf8")
+    return encode_varint(field << 3 | 2) + encode_varint(len(value)) + value
+
+
+def make_elem(i: int) -> bytes:
+    return b"".join(
+        [
+            encode_field(1, 10**15 + i),
+            encode_field(2, random.randint(0, 3600_000)),
+            encode_field(3, 1),
+            encode_field(4, 25),
+            encode_field(5, 0xFFFFFF),
+            encode_field(6, "%08x" % random.getrandbits(32)),
+            encode_field(7, random.choice(TEXTS)),
+            encode_field(8, 1700000000 + i),
+            encode_field(9, 10),
+            encode_field(11, 0),
+            encode_field(12, str(10**15 + i)),
+            encode_field(13, 0),
+        ]
+    )
+
+
+def make_segment(size: int) -> bytes:
+    out = bytearray()
+    i = 0
+    while len(out) < size:
+        out += encode_field(1, make_elem(i))
+        i += 1
+    return bytes(out)
+
+
+def legacy_decode(data: bytes) -> int:
+    """
+    旧实现的解析方式：每次读取 varint 都对剩余字节流切片。
+    """
+    count = 0
+    offset = 0
+    while offset < len(data):
+        tag, l = read_varint(data[offset:])
+        offset += l
+        length, l = read_varint(data[offset:])
+        offset += l
+        elem = data[offset : offset + length]
+        offset += length
+        pos = 0
+        while pos < len(elem):
+            t, l = read_varint(elem[pos:])
+            pos += l
+            if t & 7 == 0:
+                _, l = read_varint(elem[pos:])
+                pos += l
+            else:
+                n, l = read_varint(elem[pos:])
+                pos += l
+                elem[pos : pos + n].decode("utf8", "ignore")
+                pos += n
+        count += 1
+    return count
+
+
+def bench(func, data: bytes) -> float:
+    start = time.perf_counter()
+    func(data)
+    return time.perf_counter() - start
+
+
+def main():
+    random.seed(0)
+    print(f"{'size':>8} {'count':>8} {'legacy (s)':>12} {'new (s)':>10} {'new us/KB':>10}")
+    for mb in (0.25, 0.5, 1, 2, 4):
+        data = make_segment(int(mb * 1024 * 1024))
+        count = len(decode_danmaku_segment(data))
+        legacy = bench(legacy_decode, data) if mb <= 1 else float("nan")
+        new = bench(decode_danmaku_segment, data)
+        print(
+            f"{mb:>6}MB {count:>8} {legacy:>12.3f} {new:>10.3f} {new * 1e6 / (len(data) / 1024):>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Danmaku 对象内存与构造速度基准测试
+
+Usage:
+    python scripts/bench_danmaku_objects.py
+
+对比旧的 Danmaku（普通对象，先创建 Danmaku("") 再逐个字段赋值）与
+使用 __slots__ 和 Danmaku.from_dict 的新实现。
+"""
+
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bilibili_api.utils.danmaku import Danmaku, DmMode, DmFontSize
+
+COUNT = 200_000
+
+FIELDS = {
+    "id_": 1000000000000000,
+    "dm_time": 12.345,
+    "mode": 1,
+    "font_size": 25,
+    "color": 0xFFFFFF,
+    "crc32_id": "58abadcc",
+    "text": "前方高能",
+    "send_time": 1700000000,
+    "weight": 10,
+    "pool": 0,
+    "id_str": "1000000000000000",
+    "attr": 0,
+}
+
+
+class LegacyDanmaku:
+    """
+    旧实现：带 __dict__ 的普通对象，构造时即规范化枚举。
+    """
+
+    def __init__(
+        self,
+        text,
+        dm_time=0.0,
+        send_time=time.time(),
+        crc32_id="",
+        color="ffffff",
+        weight=-1,
+        id_=-1,
+        id_str="",
+        action="",
+        mode=DmMode.FLY,
+        font_size=DmFontSize.NORMAL,
+        is_sub=False,
+        pool=0,
+        attr=-1,
+        uid=-1,
+    ):
+        self.text = text
+        self.dm_time = dm_time
+        self.send_time = send_time
+        self.crc32_id = crc32_id
+        self.color = color
+        self.weight = weight
+        self.id_ = id_
+        self.id_str = id_str
+        self.action = action
+        self.mode = mode.value if isinstance(mode, DmMode) else mode
+        self.font_size = (
+            font_size.value if isinstance(font_size, DmFontSize) else font_size
+        )
+        self.is_sub = is_sub
+        self.pool = pool
+        self.attr = attr
+        self.uid = uid
+
+
+def build_legacy():
+    # 旧解析器的做法：先创建空弹幕，再逐个字段赋值
+    dm = LegacyDanmaku("")
+    for key, value in FIELDS.items():
+        if key == "color":
+            value = hex(value)[2:]
+        setattr(dm, key, value)
+    return dm
+
+
+def build_new():
+    return Danmaku.from_dict(FIELDS)
+
+
+def measure(builder):
+    # 取多次运行中最快的一次，减少机器抖动的影响
+    number = COUNT // 4
+    rate = number / min(timeit.repeat(builder, number=number, repeat=5))
+
+    tracemalloc.start()
+    objs = [builder() for _ in range(COUNT)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return rate, size / COUNT
+
+
+def main():
+    print(f"{'impl':>8} {'objects/s':>12} {'bytes/object':>14}")
+    for name, builder in (("legacy", build_legacy), ("slots", build_new)):
+        rate, per_obj = measure(builder)
+        print(f"{name:>8} {rate:>12,.0f} {per_obj:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
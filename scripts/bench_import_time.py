@@ -0,0 +1,95 @@
+"""
+bilibili_api 冷启动导入耗时回归测试
+
+Usage:
+    python scripts/bench_import_time.py [--runs N] [--max-ms MS]
+
+在子进程中运行 `python -X importtime -c "import bilibili_api"`，统计 bilibili_api 的累计导入耗时
+（取中位数）与耗时最多的模块，并检查导入后没有加载子模块和较重的依赖（PIL、bs4、apscheduler 等）。
+存在不应加载的模块或耗时超过 --max-ms 时以非零状态码退出，可用于 CI。
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# import bilibili_api 之后不应出现在 sys.modules 中的模块
+MUST_BE_LAZY = [
+    "PIL",
+    "bs4",
+    "lxml",
+    "yaml",
+    "qrcode",
+    "apscheduler",
+    "bilibili_api.video",
+    "bilibili_api.live",
+    "bilibili_api.article",
+    "bilibili_api.dynamic",
+    "bilibili_api.session",
+    "bilibili_api.login",
+    "bilibili_api.video_uploader",
+    "bilibili_api.interactive_video",
+    "bilibili_api.utils.picture",
+    "bilibili_api.utils.parse_link",
+]
+
+
+def run_once():
+    code = (
+        "import sys, json, bilibili_api; "
+        f"print(json.dumps([m for m in {MUST_BE_LAZY!r} if m in sys.modules]))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules, json.loads(proc.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    totals = []
+    loaded = []
+    modules = {}
+    for _ in range(args.runs):
+        modules, loaded = run_once()
+        totals.append(modules["bilibili_api"] / 1000)
+    median = statistics.median(totals)
+
+    print(f"import bilibili_api: median {median:.1f} ms over {args.runs} runs")
+    print("slowest modules (cumulative, last run):")
+    top = sorted(modules.items(), key=lambda item: item[1], reverse=True)[1:11]
+    for name, us in top:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print("eagerly imported (should be lazy):", ", ".join(loaded))
+        failed = True
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"median {median:.1f} ms exceeds budget {args.max_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+接口响应 JSON 解码基准测试
+
+Usage:
+    python scripts/bench_json_decode.py [response.json ...]
+
+对比旧的 Api._process_response 解码方式（bytes -> str 后用 json.loads，JSONP 用正则提取）
+与 bilibili_api.utils.json_decoder.decode_json（直接解码 bytes，线性去掉 JSONP 包裹，
+使用已安装的 orjson / ujson）。
+
+可以传入抓取到的响应文件；不传入时按评论页、动态列表与 DASH playurl 的结构生成大体积的响应。
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bilibili_api import settings
+from bilibili_api.utils import json_decoder
+
+NUMBER = 50
+
+
+def make_comments(count=400):
+    random.seed(0)
+
+    def reply(i, depth=0):
+        return {
+            "rpid": 100000000000 + i,
+            "oid": 170001,
+            "mid": random.randint(1, 10**9),
+            "ctime": 1700000000 + i,
+            "like": random.randint(0, 10000),
+            "member": {
+                "uname": f"用户{i}",
+                "avatar": f"https://i0.hdslb.com/bfs/face/{i:040x}.jpg",
+                "level_info": {"current_level": random.randint(0, 6)},
+                "vip": {"vipType": random.randint(0, 2), "vipStatus": 1},
+            },
+            "content": {
+                "message": "这是一条评论，" * random.randint(1, 20) + "\\n[doge]",
+                "emote": {"[doge]": {"url": "https://i0.hdslb.com/bfs/emote/doge.png"}},
+            },
+            "replies": [reply(i * 10 + k, depth + 1) for k in range(3)] if depth == 0 else None,
+        }
+
+    return {"code": 0, "message": "0", "ttl": 1, "data": {"replies": [reply(i) for i in range(count)]}}
+
+
+def make_dynamics(count=200):
+    random.seed(1)
+    items = []
+    for i in range(count):
+        items.append(
+            {
+                "id_str": str(900000000000000000 + i),
+                "type": "DYNAMIC_TYPE_AV",
+                "modules": {
+                    "module_author": {"mid": random.randint(1, 10**9), "name": f"UP主{i}", "pub_ts": 1700000000 + i},
+                    "module_dynamic": {
+                        "desc": {"text": "动态内容 " * random.randint(5, 50)},
+                        "major": {
+                            "archive": {
+                                "aid": str(random.randint(1, 10**9)),
+                                "bvid": "BV1" + "".join(random.choices("abcdefghijkmnopqrstuvwxyz123456789", k=9)),
+                                "title": f"视频标题 {i}",
+                                "cover": f"https://i0.hdslb.com/bfs/archive/{i:040x}.jpg",
+                                "stat": {"play": str(random.randint(0, 10**7)), "danmaku": str(random.randint(0, 10**5))},
+                            }
+                        },
+                    },
+                    "module_stat": {"comment": {"count": i}, "forward": {"count": i}, "like": {"count": i}},
+                },
+            }
+        )
+    return {"code": 0, "message": "0", "data": {"has_more": True, "items": items}}
+
+
+def make_playurl(streams=40):
+    random.seed(2)
+
+    def stream(i, kind):
+        return {
+            "id": 16 + i,
+            "baseUrl": f"https://upos-sz-mirrorcos.bilivideo.com/upgcxcode/{kind}/{i}.m4s?e=" + "x" * 300,
+            "backupUrl": [f"https://upos-hz-mirrorakam.akamaized.net/{kind}/{i}.m4s?e=" + "y" * 300] * 2,
+            "bandwidth": random.randint(10**5, 10**7),
+            "mimeType": f"{kind}/mp4",
+            "codecs": "avc1.640032",
+            "width": 1920,
+            "height": 1080,
+            "frameRate": "29.970",
+            "segment_base": {"initialization": "0-1004", "index_range": "1005-4000"},
+            "codecid": 7,
+        }
+
+    return {
+        "code": 0,
+        "message": "0",
+        "data": {
+            "quality": 80,
+            "dash": {
+                "duration": 600,
+                "video": [stream(i, "video") for i in range(streams)],
+                "audio": [stream(i, "audio") for i in range(streams // 4)],
+            },
+        },
+    }
+
+
+def legacy_decode(content, jsonp=False):
+    text = content.decode("utf-8")
+    if jsonp:
+        return json.loads(re.match("^.*?({.*}).*$", text, re.S).group(1))
+    return json.loads(text)
+
+
+def timeit(func, *args):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(NUMBER):
+            func(*args)
+        best = min(best, (time.perf_counter() - start) / NUMBER)
+    return best
+
+
+def payloads():
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            with open(path, "rb") as f:
+                yield os.path.basename(path), f.read()
+        return
+    for name, data in (
+        ("comments", make_comments()),
+        ("dynamics", make_dynamics()),
+        ("playurl", make_playurl()),
+    ):
+        yield name, json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def main():
+    backends = [b for b in json_decoder.AUTO_BACKENDS if json_decoder._load_backend(b)]
+    header = f"{'payload':>15} {'size':>9} {'legacy':>10}" + "".join(f"{b:>10}" for b in backends)
+    print(header + "   (ms per decode, JSON / JSONP)")
+    for name, content in payloads():
+        jsonp = b"__jp0(" + content + b")"
+        expected = legacy_decode(content)
+        for wrapped, is_jsonp in ((content, False), (jsonp, True)):
+            row = f"{name + (' jsonp' if is_jsonp else ''):>15} {len(wrapped) // 1024:>7}KB"
+            row += f" {timeit(legacy_decode, wrapped, is_jsonp) * 1000:>10.2f}"
+            for backend in backends:
+                settings.json_decoder = backend
+                assert json_decoder.decode_json(wrapped, is_jsonp) == expected
+                row += f"{timeit(json_decoder.decode_json, wrapped, is_jsonp) * 1000:>10.2f}"
+            print(row)
+    settings.json_decoder = "auto"
+
+
+if __name__ == "__main__":
+    main()
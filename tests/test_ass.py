@@ -1,5 +1,7 @@
 # bilibili_api.ass
 
+import io
+
 from bilibili_api import ass, video
 
 from .common import get_credential
@@ -17,5 +19,23 @@ async def test_b_ass_danmakus_xml():
     return await ass.make_ass_file_danmakus_xml(v, page=0, out="danmakus_xml.ass")
 
 
+async def test_ba_ass_danmakus_stream():
+    danmakus = await v.get_danmakus(0)
+    out = io.StringIO()
+    ass.export_ass_from_danmakus(danmakus, out, (1920, 1080))
+    assert out.getvalue().startswith("[Script Info]")
+    return out.getvalue()[:100]
+
+
+async def test_bb_ass_render_many():
+    danmakus = await v.get_danmakus(0)
+    results = await ass.render_many(
+        [ass.AssJob(danmakus=danmakus), ass.AssJob()], workers=2
+    )
+    assert results[0].success and results[0].content.startswith("[Script Info]")
+    assert not results[1].success, "缺少弹幕的任务应该失败"
+    return [(r.index, r.elapsed) for r in results]
+
+
 async def test_c_ass_subtitle():
     return await ass.make_ass_file_subtitle(v, lan_name="中文（中国）", out="subtitle.ass", credential=get_credential())
@@ -0,0 +1,53 @@
+# bilibili_api.utils.credential_pool
+# 离线测试，不发送请求
+
+from bilibili_api.exceptions import ResponseCodeException
+from bilibili_api.utils.credential import Credential
+from bilibili_api.utils.credential_pool import CredentialPool
+
+RISK_CONTROL = ResponseCodeException(-412, "请求被拦截")
+
+
+def credential(uid: int) -> Credential:
+    return Credential(sessdata=f"s{uid}", bili_jct=f"j{uid}", dedeuserid=str(uid))
+
+
+async def test_a_empty_pool_is_truthy():
+    pool = CredentialPool()
+    assert len(pool) == 0
+    # 空的凭据池也是传入的凭据，不能因为 __len__ 被当成未传入
+    assert bool(pool) and (pool or None) is pool
+    pool.add(credential(1))
+    assert len(pool) == 1 and bool(pool)
+
+
+async def test_b_members_by_identity():
+    a, b = credential(1), credential(2)
+    pool = CredentialPool([a, b, a])
+    assert len(pool) == 2 and list(pool) == [a, b]
+    assert pool.owns(a) and pool.owns(b)
+    # 字段相同的另一个对象不是池中的凭据
+    copy = credential(1)
+    assert not pool.owns(copy)
+    pool.report(copy, RISK_CONTROL)
+    assert [s["limited"] for s in pool.state()] == [0, 0]
+
+    pool.report(a, RISK_CONTROL)
+    assert [s["limited"] for s in pool.state()] == [1, 0]
+    assert pool.select() is b, "被风控的凭据应暂停使用"
+
+    # 替换凭据后，新凭据不继承旧凭据的状态
+    pool.remove(a)
+    assert not pool.owns(a)
+    c = credential(3)
+    pool.add(c)
+    state = {s["credential"]: s for s in pool.state()}
+    assert set(state) == {"2", "3"}
+    assert state["3"]["limited"] == 0 and state["3"]["paused"] == 0
+    pool.report(a, RISK_CONTROL)
+    assert [s["limited"] for s in pool.state()] == [0, 0]
+
+    pool.report(c, RISK_CONTROL)
+    pool.restore(c)
+    assert {pool.select() for _ in range(4)} == {b, c}
+    return pool.state()
@@ -0,0 +1,78 @@
+# bilibili_api.utils.danmaku
+# 离线测试
+
+import time
+
+from bilibili_api.utils.danmaku import Danmaku, DmMode, DmFontSize, SPECIAL_COLOR
+
+ATTRIBUTES = (
+    "text",
+    "dm_time",
+    "send_time",
+    "crc32_id",
+    "color",
+    "weight",
+    "id_",
+    "id_str",
+    "action",
+    "mode",
+    "font_size",
+    "is_sub",
+    "pool",
+    "attr",
+    "uid",
+)
+
+
+def assert_same(a: Danmaku, b: Danmaku, skip=()):
+    for name in ATTRIBUTES:
+        if name not in skip:
+            assert getattr(a, name) == getattr(b, name), name
+
+
+async def test_a_from_dict_matches_init():
+    fields = {
+        "text": "弹幕",
+        "dm_time": 12.5,
+        "send_time": 1700000000,
+        "crc32_id": "9ab2c3d4",
+        "color": 0xFE0302,
+        "weight": 10,
+        "id_": 10**15,
+        "id_str": str(10**15),
+        "action": "act",
+        "mode": 5,
+        "font_size": 18,
+        "is_sub": True,
+        "pool": 1,
+        "attr": 4,
+        "uid": 2,
+    }
+    assert_same(Danmaku.from_dict(fields), Danmaku(**fields))
+    # 枚举与字符串颜色
+    fields.update(mode=DmMode.TOP, font_size=DmFontSize.SMALL, color="fe0302")
+    assert_same(Danmaku.from_dict(fields), Danmaku(**fields))
+
+
+async def test_b_defaults():
+    before = time.time()
+    by_dict = Danmaku.from_dict({})
+    by_init = Danmaku("")
+    after = time.time()
+    assert_same(by_dict, by_init, skip=("send_time",))
+    # send_time 未指定时取创建时的时间，而不是模块导入时的时间
+    for dm in (by_dict, by_init):
+        assert before <= dm.send_time <= after
+    assert Danmaku("", send_time=None).send_time >= by_init.send_time
+    assert (by_init.mode, by_init.font_size, by_init.color) == (1, 25, "ffffff")
+
+
+async def test_c_lazy_properties():
+    dm = Danmaku("", color=0x00FF00, mode=DmMode.BOTTOM, font_size=DmFontSize.BIG)
+    assert (dm.color, dm.mode, dm.font_size) == ("ff00", 4, 36)
+    assert int(dm.color, 16) == 0x00FF00
+    assert Danmaku("", color=SPECIAL_COLOR).color == "special"
+    dm.color = 0xFFFFFF
+    dm.mode = DmMode.REVERSE
+    assert (dm.color, dm.mode) == ("ffffff", 6)
+    assert 'p="0.0,6,36,16777215,' in dm.to_xml()
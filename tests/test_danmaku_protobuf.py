@@ -0,0 +1,219 @@
+# bilibili_api.utils.danmaku_protobuf
+# 离线测试，使用手工构造的 protobuf 字节
+
+import struct
+from typing import Optional
+
+from bilibili_api.utils.BytesReader import BytesReader
+from bilibili_api.utils.danmaku import Danmaku
+from bilibili_api.utils.varint import read_varint, read_varint_at
+from bilibili_api.utils.danmaku_protobuf import (
+    decode_danmaku_view,
+    decode_danmaku_segment,
+    decode_danmaku_segment_batch,
+)
+from bilibili_api.exceptions import ResponseException
+
+FIELDS = (
+    "id_",
+    "dm_time",
+    "mode",
+    "font_size",
+    "color",
+    "crc32_id",
+    "text",
+    "send_time",
+    "weight",
+    "action",
+    "pool",
+    "id_str",
+    "attr",
+    "uid",
+)
+
+
+def encode_varint(value: int) -> bytes:
+    if value < 0:
+        value += 1 << 64
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def encode_field(field: int, value) -> bytes:
+    if isinstance(value, int):
+        return encode_varint(field << 3) + encode_varint(value)
+    if isinstance(value, str):
+        value = value.encode("utf8")
+    return encode_varint(field << 3 | 2) + encode_varint(len(value)) + value
+
+
+def make_elem(i: int, extra: Optional[dict] = None) -> bytes:
+    fields = {
+        1: 10**15 + i,
+        2: 61234 + i,
+        3: 1,
+        4: 25,
+        5: 0xFE0302,
+        6: "9ab2c3d4",
+        7: f"第 {i} 条弹幕",
+        8: 1700000000 + i,
+        9: 10,
+        10: "",
+        11: 0,
+        12: str(10**15 + i),
+        13: 1,
+        14: 0,
+    }
+    fields.update(extra or {})
+    return b"".join(encode_field(k, v) for k, v in fields.items())
+
+
+def make_segment(*elems: bytes) -> bytes:
+    return b"".join(encode_field(1, elem) for elem in elems)
+
+
+def legacy_decode(data: bytes) -> list:
+    """
+    旧版 Video.get_danmakus 的解析逻辑，用作对照
+    """
+    danmakus = []
+    reader = BytesReader(data)
+    while not reader.has_end():
+        reader.varint()
+        dm = Danmaku("", send_time=0)
+        dm_reader = BytesReader(reader.bytes_string())
+        while not dm_reader.has_end():
+            data_type = dm_reader.varint() >> 3
+            if data_type == 1:
+                dm.id_ = dm_reader.varint()
+            elif data_type == 2:
+                dm.dm_time = dm_reader.varint() / 1000
+            elif data_type == 3:
+                dm.mode = dm_reader.varint()
+            elif data_type == 4:
+                dm.font_size = dm_reader.varint()
+            elif data_type == 5:
+                color = dm_reader.varint()
+                dm.color = "special" if color == 60001 else hex(color)[2:]
+            elif data_type == 6:
+                dm.crc32_id = dm_reader.string()
+            elif data_type == 7:
+                dm.text = dm_reader.string()
+            elif data_type == 8:
+                dm.send_time = dm_reader.varint()
+            elif data_type == 9:
+                dm.weight = dm_reader.varint()
+            elif data_type == 10:
+                dm.action = str(dm_reader.string())
+            elif data_type == 11:
+                dm.pool = dm_reader.varint()
+            elif data_type == 12:
+                dm.id_str = dm_reader.string()
+            elif data_type == 13:
+                dm.attr = dm_reader.varint()
+            elif data_type == 14:
+                dm.uid = dm_reader.varint()
+            else:
+                break
+        danmakus.append(dm)
+    return danmakus
+
+
+async def test_a_read_varint():
+    cases = [(0, b"\x00"), (1, b"\x01"), (127, b"\x7f"), (300, b"\xac\x02")]
+    cases.append((2**63, encode_varint(2**63)))
+    for value, data in cases:
+        stream = b"\xff" + data + b"\x01"
+        assert read_varint_at(stream, 1) == (value, 1 + len(data))
+        assert read_varint_at(memoryview(stream), 1) == (value, 1 + len(data))
+        assert read_varint(stream, 1) == (value, len(data))
+    assert len(encode_varint(2**63)) == 10
+
+
+async def test_b_same_as_legacy_decoder():
+    data = make_segment(
+        make_elem(0), make_elem(1, {5: 60001}), make_elem(2, {7: "a" * 300})
+    )
+    new = decode_danmaku_segment(data)
+    old = legacy_decode(data)
+    assert len(new) == len(old) == 3
+    for a, b in zip(new, old):
+        for name in FIELDS:
+            assert getattr(a, name) == getattr(b, name), name
+    assert new[1].color == "special" and new[0].color == "fe0302"
+    assert new[2].text == "a" * 300
+    return [dm.text[:10] for dm in new]
+
+
+async def test_c_skip_unknown_fields():
+    unknown = (
+        encode_field(15, 2**40)
+        + encode_field(20, "unknown")
+        + encode_varint(30 << 3 | 5)
+        + struct.pack("<f", 1.5)
+        + encode_varint(31 << 3 | 1)
+        + struct.pack("<d", 2.5)
+    )
+    # 类型与字段表不符的已知字段（text 以 varint 编码）也应被跳过
+    mismatched = encode_field(7, 12345)
+    data = (
+        encode_field(4, "segment level field")
+        + make_segment(unknown + make_elem(0) + mismatched + unknown)
+        + encode_field(2, 1)
+    )
+    (dm,) = decode_danmaku_segment(data)
+    (expected,) = decode_danmaku_segment(make_segment(make_elem(0)))
+    for name in FIELDS:
+        assert getattr(dm, name) == getattr(expected, name), name
+
+
+async def test_d_truncated_buffer():
+    data = make_segment(make_elem(0), make_elem(1))
+    for cut in (len(data) - 1, len(data) - 20, 2, 1):
+        try:
+            decode_danmaku_segment(data[:cut])
+        except ResponseException:
+            pass
+        else:
+            raise AssertionError(f"截断到 {cut} 字节时应报错")
+    # 截断在多字节 varint 的中间
+    try:
+        decode_danmaku_segment(b"\x0a\x05" + b"\x08\xff\xff\xff\xff")
+    except ResponseException:
+        pass
+    else:
+        raise AssertionError("varint 不完整时应报错")
+    try:
+        decode_danmaku_view(encode_field(4, encode_field(2, 3))[:-1])
+    except ResponseException:
+        pass
+    else:
+        raise AssertionError("截断的 DmWebViewReply 应报错")
+    assert decode_danmaku_segment(b"") == []
+
+
+async def test_e_signed_fields():
+    # int32 / int64 字段的负数编码为 10 字节的 varint
+    data = make_segment(
+        make_elem(0, {13: -1, 9: -5, 11: -2, 14: -1}),
+        make_elem(1, {13: 2**31 - 1, 3: -(2**31)}),
+        make_elem(2),
+    )
+    danmakus = decode_danmaku_segment(data)
+    batch = decode_danmaku_segment_batch(data)
+    assert len(batch) == len(danmakus) == 3
+    assert (danmakus[0].attr, danmakus[0].weight, danmakus[0].pool) == (-1, -5, -2)
+    assert danmakus[0].uid == -1
+    assert danmakus[1].attr == 2**31 - 1 and danmakus[1].mode == -(2**31)
+    for a, b in zip(danmakus, batch):
+        for name in FIELDS:
+            assert getattr(a, name) == getattr(b, name), name
+    assert list(batch.attr) == [-1, 2**31 - 1, 1]
+
@@ -0,0 +1,98 @@
+# bilibili_api.utils.json_decoder
+# 离线测试
+
+import json
+import math
+import importlib.util
+
+from bilibili_api import settings
+from bilibili_api.utils.retry import RetryPolicy
+from bilibili_api.utils.json_decoder import decode_json, strip_jsonp, get_json_decoder
+
+BACKENDS = ["auto", "json"] + [
+    name for name in ("orjson", "ujson") if importlib.util.find_spec(name)
+]
+
+
+def use_decoder(option):
+    previous = settings.json_decoder
+    settings.json_decoder = option
+    return previous
+
+
+async def test_a_strip_jsonp():
+    assert strip_jsonp(b'jQuery123_456({"code":0,"data":{}});') == b'{"code":0,"data":{}}'
+    assert strip_jsonp('callback({"a":[{"b":1}]})\n') == '{"a":[{"b":1}]}'
+    # 找不到完整的对象时原样返回
+    for data in (b"callback()", "[1, 2]", b"}{", ""):
+        assert strip_jsonp(data) == data
+
+
+async def test_b_decode_jsonp():
+    expected = {"code": 0, "data": {"text": "弹幕", "list": [1, 2]}}
+    body = "cb(" + json.dumps(expected, ensure_ascii=False) + ");"
+    for option in BACKENDS:
+        previous = use_decoder(option)
+        try:
+            assert decode_json(body.encode("utf8"), jsonp=True) == expected, option
+            assert decode_json(body, jsonp=True) == expected, option
+        finally:
+            settings.json_decoder = previous
+    return BACKENDS
+
+
+async def test_c_fallback_to_json():
+    calls = []
+
+    def strict(data):
+        calls.append(data)
+        raise ValueError("unsupported")
+
+    previous = use_decoder(strict)
+    try:
+        assert get_json_decoder() is strict
+        result = decode_json(b'{"a": NaN, "b": 18446744073709551616}')
+        assert math.isnan(result["a"]) and result["b"] == 2**64
+        assert len(calls) == 1
+    finally:
+        settings.json_decoder = previous
+
+    # orjson / ujson 不支持的内容同样交给 json
+    for option in BACKENDS:
+        previous = use_decoder(option)
+        try:
+            result = decode_json(b'{"a": NaN, "b": 18446744073709551616}')
+            assert math.isnan(result["a"]) and result["b"] == 2**64, option
+        finally:
+            settings.json_decoder = previous
+
+    # 未安装的 JSON 库改用 json
+    previous = use_decoder("not_a_json_library")
+    try:
+        assert get_json_decoder() is json.loads
+        assert decode_json(b'{"code": 0}') == {"code": 0}
+    finally:
+        settings.json_decoder = previous
+
+
+async def test_d_errors():
+    policy = RetryPolicy()
+    for option in BACKENDS:
+        previous = use_decoder(option)
+        try:
+            for data in (b"<html>502 Bad Gateway</html>", b'{"code": 0', b"\xff\xfe", b""):
+                try:
+                    decode_json(data)
+                except json.JSONDecodeError as e:
+                    # 解码失败可以重试
+                    assert policy.is_retryable(e), option
+                else:
+                    raise AssertionError(f"{option} 解码 {data!r} 时应报错")
+            try:
+                decode_json(b"callback(oops)", jsonp=True)
+            except json.JSONDecodeError:
+                pass
+            else:
+                raise AssertionError("无法解析的 JSONP 应报错")
+        finally:
+            settings.json_decoder = previous
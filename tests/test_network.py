@@ -0,0 +1,150 @@
+# bilibili_api.utils.network
+# 离线测试，不发送请求
+
+import json
+import dataclasses
+
+from bilibili_api.utils.credential import Credential
+from bilibili_api.utils.utils import get_api
+from bilibili_api.utils.network import Api, HEADERS
+
+FIELDS = (
+    "url",
+    "method",
+    "comment",
+    "wbi",
+    "verify",
+    "no_csrf",
+    "json_body",
+    "ignore_code",
+    "data",
+    "params",
+    "files",
+    "headers",
+    "credential",
+    "cache_ttl",
+)
+
+CREDENTIAL = Credential(sessdata="sessdata", bili_jct="bili_jct", buvid3="buvid3")
+
+
+def iter_apis(node):
+    if isinstance(node, dict):
+        if isinstance(node.get("url"), str) and "method" in node:
+            # 个别接口信息带有 Api 不接受的字段，这些接口不通过 Api(**info) 构造
+            if set(node) <= set(FIELDS):
+                yield node
+            return
+        for value in node.values():
+            yield from iter_apis(value)
+
+
+def legacy_fields(info: dict) -> dict:
+    """
+    改为预编译接口描述之前 Api.__post_init__ 的结果，用作对照
+    """
+    return {
+        "method": info["method"].upper(),
+        "data": {k: "" for k in info.get("data", {})},
+        "params": {k: "" for k in info.get("params", {})},
+        "files": {k: "" for k in info.get("files", {})},
+        "headers": {k: "" for k in info.get("headers", {})},
+        "original_data": dict(info.get("data", {})),
+        "original_params": dict(info.get("params", {})),
+    }
+
+
+async def test_a_dataclass():
+    info = get_api("video")["info"]["info"]
+    assert tuple(f.name for f in dataclasses.fields(Api)) == FIELDS
+    a = Api(**info, credential=CREDENTIAL)
+    b = Api(**info, credential=CREDENTIAL)
+    assert a == b
+    assert a.update_params(bvid="BV1xx411c7mD") != b
+    assert repr(a).startswith("Api(url=") and "BV1xx411c7mD" in repr(a)
+    c = dataclasses.replace(a, comment="replaced")
+    assert c.comment == "replaced" and c.url == a.url and c.credential is CREDENTIAL
+    api = Api(url="https://example.com", method="get")
+    assert api.method == "GET" and isinstance(api.credential, Credential)
+
+
+async def test_b_same_as_legacy_construction():
+    count = 0
+    for module in ("video", "user", "live", "dynamic", "comment", "login"):
+        for info in iter_apis(get_api(module)):
+            # 同一接口多次构造，第二次使用缓存的接口描述
+            for _ in range(2):
+                api = Api(**info)
+                expected = legacy_fields(info)
+                assert api.method == expected["method"], info["url"]
+                for name in ("data", "params", "files", "headers"):
+                    assert getattr(api, name) == expected[name], (info["url"], name)
+                assert dict(api.original_data) == expected["original_data"]
+                assert dict(api.original_params) == expected["original_params"]
+                count += 1
+    # 修改一个对象的参数不影响之后构造的对象
+    info = get_api("video")["info"]["info"]
+    Api(**info).params["aid"] = 1
+    assert Api(**info).params["aid"] == ""
+    return count
+
+
+async def test_c_prepare_request():
+    info = get_api("video")["info"]["info"]
+    api = Api(**info, credential=CREDENTIAL).update_params(aid=170001, bvid=None)
+    api._prepare_params_data()
+    config = api._prepare_request_sync()
+    assert config["params"] == {"aid": 170001}
+    assert config["cookies"] == CREDENTIAL.get_cookies()
+    assert config["headers"] == HEADERS and config["method"] == "GET"
+
+    like = get_api("video")["operate"]["like"]
+    api = Api(**like, credential=CREDENTIAL).update_data(aid=170001, like=True)
+    api._prepare_params_data()
+    config = api._prepare_request_sync()
+    assert config["data"]["like"] == 1 and config["data"]["csrf"] == "bili_jct"
+    assert config["method"] == "POST" and config["params"] == {}
+
+    api = Api(
+        url="https://api.bilibili.com/x/example",
+        method="POST",
+        json_body=True,
+        credential=CREDENTIAL,
+    ).update_data(a=1)
+    config = api._prepare_request_sync()
+    assert json.loads(config["data"]) == {"a": 1}
+    assert config["headers"]["Content-Type"] == "application/json"
+    assert "Content-Type" not in HEADERS, "不能修改共享的 HEADERS"
+
+
+async def test_d_cookies_view():
+    credential = Credential(sessdata="a", bili_jct="b", buvid3="c")
+    view = credential.get_cookies_view()
+    assert credential.get_cookies_view() is view
+    assert credential.get_cookies() == view and credential.get_cookies() is not view
+
+    credential.sessdata = "d"
+    assert credential.get_cookies_view()["SESSDATA"] == "d"
+    credential.dedeuserid = "1"
+    assert credential.get_cookies_view()["DedeUserID"] == "1"
+    credential.sid = "e"
+    assert credential.get_cookies_view()["sid"] == "e"
+    credential.buvid3 = None
+    assert credential.get_cookies_view()["buvid3"] is None
+    assert view["SESSDATA"] == "a", "已经取得的字典不应被修改"
+
+
+async def test_e_result_invalidation():
+    info = get_api("video")["info"]["info"]
+    api = Api(**info, credential=CREDENTIAL)
+    api._Api__store_result({"title": "a"})
+    assert api._Api__cached_result() == {"title": "a"}
+    # 直接赋值请求字段后，暂存的结果失效
+    api.params = {"aid": 2}
+    assert api._Api__cached_result() is None
+    api._Api__store_result({"title": "b"})
+    api.credential = Credential()
+    assert api._Api__cached_result() is None
+    api._Api__store_result({"title": "c"})
+    api.comment = "注释不影响结果"
+    assert api._Api__cached_result() == {"title": "c"}
@@ -0,0 +1,32 @@
+# bilibili_api.utils.rate_limit
+# 离线测试，不发送请求
+
+import asyncio
+
+from bilibili_api import settings
+from bilibili_api.utils.rate_limit import RateLimiter
+
+URL = "https://api.bilibili.com/x/web-interface/view"
+
+
+def configure(rate_limit_host):
+    previous = (settings.rate_limit, settings.rate_limit_host)
+    settings.rate_limit = True
+    settings.rate_limit_host = rate_limit_host
+    return previous
+
+
+async def test_a_throttled_once_per_request():
+    # 速率较低时，一次等待可能需要多次尝试才能取得令牌
+    previous = configure((20.0, 1))
+    limiter = RateLimiter()
+    try:
+        await asyncio.gather(*(limiter.acquire(URL) for _ in range(4)))
+        state = limiter.state()
+        assert state["throttled"] == 3, "每个需要等待的请求只应计数一次"
+        assert state["waited"] > 0
+        limiter.acquire_sync(URL)
+        assert limiter.state()["throttled"] == 4
+    finally:
+        settings.rate_limit, settings.rate_limit_host = previous
+    return state
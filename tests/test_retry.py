@@ -0,0 +1,185 @@
+# bilibili_api.utils.retry
+# 离线测试，不发送请求
+
+import time
+
+import httpx
+
+from bilibili_api import settings
+from bilibili_api.exceptions import CircuitOpenException
+from bilibili_api.utils.network import retry, retry_sync
+from bilibili_api.utils.retry import (
+    RetryBudget,
+    RetryPolicy,
+    CircuitBreaker,
+    get_retry_policy,
+    set_retry_policy,
+)
+
+URL = "https://api.bilibili.com/x/web-interface/view"
+
+
+class FakeApi:
+    """
+    模拟 Api，按顺序抛出 errors 中的异常，之后返回成功
+    """
+
+    def __init__(self, method: str, *errors: Exception) -> None:
+        self.url = URL
+        self.method = method
+        self.errors = list(errors)
+        self.calls = 0
+
+    def send(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+    @retry(times=3)
+    async def request(self):
+        return self.send()
+
+    @retry_sync(times=3)
+    def request_sync(self):
+        return self.send()
+
+
+def use_settings(**kwargs):
+    previous = {name: getattr(settings, name) for name in kwargs}
+    for name, value in kwargs.items():
+        setattr(settings, name, value)
+    return previous
+
+
+async def test_a_defaults():
+    assert settings.retry_budget is None and settings.circuit_breaker is None
+    policy = RetryPolicy()
+    assert policy.budget is None and policy.breaker(URL) is None
+    assert all(policy.allow_retry() for _ in range(100))
+
+
+async def test_b_circuit_breaker_cycle():
+    breaker = CircuitBreaker("api.bilibili.com")
+    breaker.record_failure(2)
+    breaker.before_request(0.05)
+    breaker.record_failure(2)
+    assert breaker.status == CircuitBreaker.OPEN and breaker.trips == 1
+    try:
+        breaker.before_request(0.05)
+    except CircuitOpenException:
+        pass
+    else:
+        raise AssertionError("熔断期间应拒绝请求")
+
+    # 熔断时间过后放行一个探测请求，其余请求继续被拒绝
+    time.sleep(0.06)
+    breaker.before_request(0.05)
+    assert breaker.status == CircuitBreaker.HALF_OPEN
+    try:
+        breaker.before_request(0.05)
+    except CircuitOpenException:
+        pass
+    else:
+        raise AssertionError("探测请求没有结果前应拒绝其他请求")
+
+    # 探测失败则再次熔断
+    breaker.record_failure(2)
+    assert breaker.status == CircuitBreaker.OPEN and breaker.trips == 2
+
+    # 探测被取消时放行下一个请求作为新的探测
+    time.sleep(0.06)
+    breaker.before_request(0.05)
+    breaker.release()
+    breaker.before_request(0.05)
+    assert breaker.status == CircuitBreaker.HALF_OPEN
+
+    breaker.record_success()
+    assert breaker.status == CircuitBreaker.CLOSED and breaker.failures == 0
+    breaker.before_request(0.05)
+    return breaker.state()
+
+
+async def test_c_circuit_breaker_policy():
+    previous = use_settings(circuit_breaker=(2, 0.05))
+    try:
+        policy = RetryPolicy()
+        for _ in range(2):
+            policy.before_attempt(URL)
+            policy.record(URL, httpx.ConnectError("connection refused"))
+        try:
+            policy.before_attempt(URL)
+        except CircuitOpenException as e:
+            policy.record(URL, e)
+        else:
+            raise AssertionError("连续失败后应熔断")
+        # 熔断时间过后探测请求成功，恢复正常
+        time.sleep(0.06)
+        policy.before_attempt(URL)
+        policy.record(URL, None)
+        state = policy.state()["breakers"]["api.bilibili.com"]
+        assert state == {"status": "closed", "failures": 0, "trips": 1}
+    finally:
+        settings.circuit_breaker = previous["circuit_breaker"]
+    return state
+
+
+async def test_d_retry_budget():
+    budget = RetryBudget(0.5, 0, cap=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw() and budget.rejected == 1
+    budget.deposit()
+    assert not budget.withdraw(), "两次首次请求才换得一次重试"
+    budget.deposit()
+    assert budget.withdraw()
+    assert budget.rejected == 2
+
+    previous = use_settings(retry_budget=(0, 0), retry_backoff=(0, 0))
+    policy = get_retry_policy()
+    set_retry_policy(RetryPolicy())
+    try:
+        get_retry_policy().budget.balance = 1
+        api = FakeApi("GET", *(httpx.ReadTimeout("timeout") for _ in range(3)))
+        try:
+            await api.request()
+        except httpx.ReadTimeout:
+            pass
+        else:
+            raise AssertionError("预算不足时应直接抛出异常")
+        assert api.calls == 2, "预算只够重试一次"
+        assert get_retry_policy().state()["budget"]["rejected"] == 1
+    finally:
+        set_retry_policy(policy)
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+async def test_e_post_retry():
+    policy = RetryPolicy()
+    assert policy.is_retryable(httpx.ReadTimeout("timeout"), "GET")
+    assert not policy.is_retryable(httpx.ReadTimeout("timeout"), "POST")
+    assert policy.is_retryable(httpx.ConnectError("refused"), "post")
+    assert policy.is_retryable(httpx.ConnectTimeout("timeout"), "POST")
+
+    previous = use_settings(retry_backoff=(0, 0))
+    try:
+        api = FakeApi("POST", httpx.ConnectError("refused"))
+        assert await api.request() == "ok" and api.calls == 2
+        api = FakeApi("POST", httpx.ConnectError("refused"))
+        assert api.request_sync() == "ok" and api.calls == 2
+
+        # 请求可能已经发出，POST 不能重试
+        for error in (httpx.ReadTimeout("timeout"), httpx.RemoteProtocolError("eof")):
+            api = FakeApi("POST", error)
+            try:
+                await api.request()
+            except type(error):
+                pass
+            else:
+                raise AssertionError("POST 只应在连接失败时重试")
+            assert api.calls == 1
+
+        api = FakeApi("GET", httpx.ReadTimeout("timeout"))
+        assert await api.request() == "ok" and api.calls == 2
+    finally:
+        settings.retry_backoff = previous["retry_backoff"]
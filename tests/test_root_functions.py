@@ -1,9 +1,106 @@
 # bilibili_api.__init__
 
-from bilibili_api import parse_link, get_real_url
+import asyncio
+
+import httpx
+
+import bilibili_api
+from bilibili_api import (
+    video,
+    settings,
+    ProxyPool,
+    parse_link,
+    gather_apis,
+    get_real_url,
+    CredentialPool,
+    add_request_hook,
+    get_rate_limiter,
+    remove_request_hook,
+    get_request_metrics,
+    get_response_cache,
+)
+
+from bilibili_api.exceptions import ResponseCodeException
 
 from .common import get_credential
 
+# 改为按需导入之前 `from bilibili_api import *` 导出的名称
+PREVIOUS_EXPORTS = (
+    "ApiException",
+    "ArgsException",
+    "BILIBILI_API_VERSION",
+    "Credential",
+    "CredentialNoBiliJctException",
+    "CredentialNoBuvid3Exception",
+    "CredentialNoDedeUserIDException",
+    "CredentialNoSessdataException",
+    "Danmaku",
+    "DanmakuClosedException",
+    "DmFontSize",
+    "DmMode",
+    "DynamicExceedImagesException",
+    "HEADERS",
+    "LiveException",
+    "LoginError",
+    "NetworkException",
+    "Picture",
+    "ResourceType",
+    "ResponseCodeException",
+    "ResponseException",
+    "SpecialDanmaku",
+    "VideoUploadException",
+    "aid2bvid",
+    "app",
+    "article",
+    "article_category",
+    "ass",
+    "audio",
+    "audio_uploader",
+    "bangumi",
+    "black_room",
+    "bvid2aid",
+    "channel_series",
+    "cheese",
+    "client",
+    "comment",
+    "creative_center",
+    "dynamic",
+    "emoji",
+    "favorite_list",
+    "festival",
+    "game",
+    "get_aiohttp_session",
+    "get_real_url",
+    "get_session",
+    "homepage",
+    "hot",
+    "interactive_video",
+    "live",
+    "live_area",
+    "login",
+    "login_func",
+    "manga",
+    "music",
+    "note",
+    "parse_link",
+    "rank",
+    "search",
+    "session",
+    "set_aiohttp_session",
+    "set_session",
+    "settings",
+    "show",
+    "sync",
+    "topic",
+    "user",
+    "video",
+    "video_tag",
+    "video_uploader",
+    "video_zone",
+    "vote",
+    "watchroom",
+)
+
 parse_link_urls = [
     "av82054919",
     "AV82054919",
@@ -63,3 +160,142 @@ async def test_a_parse_link():
 
 async def test_b_get_real_url():
     return await get_real_url("https://b23.tv/mx00St")
+
+
+async def test_c_response_cache():
+    settings.response_cache = True
+    cache = get_response_cache()
+    cache.clear()
+    try:
+        v = video.Video("BV1XJ41157tQ")
+        first = await v.get_info()
+        second = await v.get_info()
+        assert first == second
+        assert cache.stats()["hits"] == 1, "第二次请求应命中缓存"
+        return cache.stats()
+    finally:
+        settings.response_cache = False
+
+
+async def test_d_request_coalescing():
+    # 请求回调只在实际发送请求时调用，用于统计发送次数
+    events = []
+    settings.request_coalescing = True
+    add_request_hook(events.append)
+    try:
+        v = video.Video("BV1XJ41157tQ")
+        results = await asyncio.gather(*(v.get_info() for _ in range(20)))
+    finally:
+        remove_request_hook(events.append)
+        settings.request_coalescing = False
+    assert all(r == results[0] for r in results)
+    sends = [e for e in events if e.endpoint == "api.bilibili.com/x/web-interface/view"]
+    assert len(sends) == 1, "相同的并发请求应只发送一次"
+    return len(results)
+
+
+async def test_e_rate_limit():
+    settings.rate_limit = True
+    limiter = get_rate_limiter()
+    limiter.reset()
+    try:
+        v = video.Video("BV1XJ41157tQ")
+        await asyncio.gather(*(v.get_info() for _ in range(15)))
+        state = limiter.state()
+        assert "api.bilibili.com" in state["hosts"]
+        assert state["throttled"] > 0, "超过突发请求数后应等待"
+        return state
+    finally:
+        settings.rate_limit = False
+
+
+async def test_f_gather_apis():
+    bvids = ["BV1XJ41157tQ", "BV1uv411q7Mv", "BV1xx411c7mD"] * 4
+    results = [
+        r
+        async for r in gather_apis(
+            (video.Video(bvid).get_info() for bvid in bvids), concurrency=3, ordered=True
+        )
+    ]
+    assert [r.index for r in results] == list(range(len(bvids)))
+    assert all(r.success for r in results)
+    return [r.elapsed for r in results]
+
+
+async def test_g_request_metrics():
+    events = []
+    settings.request_metrics = True
+    add_request_hook(events.append)
+    try:
+        await video.Video("BV1XJ41157tQ").get_info()
+    finally:
+        remove_request_hook(events.append)
+        settings.request_metrics = False
+    event = events[-1]
+    assert event.success and event.code == 0 and event.bytes > 0
+    assert "api.bilibili.com/x/web-interface" in get_request_metrics().to_prometheus()
+    return [(e.endpoint, e.elapsed, e.ttfb) for e in events]
+
+
+async def test_h_credential_pool():
+    pool = CredentialPool(anonymous=2)
+    bvids = ["BV1XJ41157tQ", "BV1uv411q7Mv"]
+    for bvid in bvids:
+        await video.Video(bvid, credential=pool).get_info()
+    state = pool.state()
+    assert [s["requests"] for s in state] == [1, 1]
+    buvids = {c.buvid3 for c in pool}
+    assert len(buvids) == 2 and None not in buvids
+    return state
+
+
+async def test_i_proxy_pool():
+    # 只测试健康状况的变化，不发送请求
+    a, b = "http://127.0.0.1:8001", "http://127.0.0.1:8002"
+    pool = ProxyPool([a, (b, 2.0)], max_failures=2, cooldown=60.0)
+    assert pool.proxies() == [a, b]
+    assert {pool.select() for _ in range(50)} == {a, b}
+
+    error = httpx.ConnectError("connection refused")
+    pool.report(a, 0.1, error)
+    pool.report(a, 0.1)
+    pool.report(a, 0.1, error)
+    assert pool.state()[0]["down"] == 0, "成功请求后应重新计算连续失败次数"
+
+    # 接口返回的普通错误说明代理可用，风控则计为代理失败
+    pool.report(a, 0.1, ResponseCodeException(-404, "啥都木有"))
+    pool.report(a, 0.1, ResponseCodeException(-412, "请求被拦截"))
+    pool.report(a, 0.1, error)
+    state = {s["proxy"]: s for s in pool.state()}
+    assert state[a]["down"] > 0 and state[a]["failures"] == 4
+    assert state[a]["score"] < state[b]["score"]
+    assert {pool.select() for _ in range(50)} == {b}
+
+    pool.report(b, 0.1, error)
+    pool.report(b, 0.1, error)
+    assert pool.select() == a, "全部暂停时应选择最早恢复的代理"
+
+    pool.set_proxies([b])
+    assert pool.proxies() == [b] and pool.state()[0]["failures"] == 2
+    return pool.state()
+
+
+async def test_j_lazy_exports():
+    # 直接调用模块的 __getattr__，确保按需导入表中的每一项都能解析
+    failed = []
+    for name in bilibili_api._LAZY_SUBMODULES + tuple(bilibili_api._LAZY_ATTRIBUTES):
+        try:
+            bilibili_api.__getattr__(name)
+        except Exception as e:
+            failed.append(f"{name}: {e!r}")
+        if name not in bilibili_api.__all__:
+            failed.append(f"{name}: 不在 __all__ 中")
+    assert not failed, failed
+    namespace = {}
+    exec("from bilibili_api import *", namespace)
+    missing = set(PREVIOUS_EXPORTS) - set(namespace)
+    assert not missing, missing
+    assert set(bilibili_api.__all__) <= set(namespace)
+    assert set(bilibili_api.__all__) <= set(dir(bilibili_api))
+    return len(namespace)
+
@@ -0,0 +1,48 @@
+# bilibili_api.utils.session_factory
+# 离线测试，不发送请求
+
+import httpx
+import aiohttp
+
+from bilibili_api.utils.session_factory import pool_stats
+
+KEYS = ("client", "in_use", "idle", "queued", "limit")
+
+
+async def test_a_pool_stats():
+    async with httpx.AsyncClient() as client:
+        stats = pool_stats(client)
+        assert stats["client"] == "httpx"
+        assert (stats["in_use"], stats["idle"], stats["queued"]) == (0, 0, 0)
+    async with aiohttp.ClientSession() as session:
+        stats = pool_stats(session)
+        assert stats["client"] == "aiohttp"
+        assert (stats["in_use"], stats["idle"], stats["queued"]) == (0, 0, 0)
+    # 自定义的传输层没有连接池
+    with httpx.Client(transport=httpx.MockTransport(lambda r: httpx.Response(200))) as c:
+        assert pool_stats(c)["in_use"] == 0
+    return stats
+
+
+async def test_b_pool_stats_private_attributes():
+    # 依赖的私有属性不存在或结构变化时，对应的统计为 None 而不是报错
+    async with httpx.AsyncClient() as client:
+        pool = client._transport._pool
+        client._transport._pool = object()
+        try:
+            stats = pool_stats(client)
+        finally:
+            client._transport._pool = pool
+    assert set(stats) == set(KEYS)
+    assert stats["in_use"] is stats["idle"] is stats["queued"] is None
+
+    async with aiohttp.ClientSession() as session:
+        connector = session._connector
+        session._connector = object()
+        try:
+            stats = pool_stats(session)
+        finally:
+            session._connector = connector
+    assert set(stats) == set(KEYS)
+    assert all(stats[key] is None for key in KEYS[1:])
+    return stats
@@ -0,0 +1,51 @@
+# bilibili_api.utils.utils
+# 离线测试
+
+import os
+import json
+import tempfile
+
+from bilibili_api.utils import utils
+
+
+def load_json_registry() -> dict:
+    registry = {}
+    for name in os.listdir(utils.API_DIR):
+        if name.endswith(".json"):
+            with open(os.path.join(utils.API_DIR, name), encoding="utf8") as f:
+                registry[name[:-5].lower()] = json.load(f)
+    return registry
+
+
+async def test_a_api_registry_cache():
+    expected = load_json_registry()
+    cache_dir = utils.API_CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        utils.API_CACHE_DIR = tmp
+        try:
+            cold = utils._load_api_registry()
+            files = os.listdir(tmp)
+            assert len(files) == 1 and files[0].startswith(utils._api_cache_prefix())
+            warm = utils._load_api_registry()
+        finally:
+            utils.API_CACHE_DIR = cache_dir
+    assert cold == expected
+    assert warm == expected, "从缓存读取的注册表应与直接解析 json 的结果相同"
+    assert utils.get_api("video") == expected["video"]
+
+
+async def test_b_api_registry_unwritable_cache():
+    expected = load_json_registry()
+    cache_dir = utils.API_CACHE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        # 缓存目录的上级是普通文件，无法创建目录（root 用户同样如此）
+        blocker = os.path.join(tmp, "file")
+        with open(blocker, "w") as f:
+            f.write("")
+        utils.API_CACHE_DIR = os.path.join(blocker, "cache")
+        try:
+            registry = utils._load_api_registry()
+        finally:
+            utils.API_CACHE_DIR = cache_dir
+        assert os.listdir(tmp) == ["file"]
+    assert registry == expected
@@ -120,6 +120,23 @@ async def test_o_Video_get_danmaku():
     return data
 
 
+async def test_oa_Video_get_danmaku_concurrency():
+    data = await video.get_danmakus(0, concurrency=4)
+    seq = await video.get_danmakus(0)
+    assert [dm.id_ for dm in data] == [
+        dm.id_ for dm in seq
+    ], "并发获取的弹幕顺序应与逐段获取一致"
+    return data
+
+
+async def test_ob_Video_iter_danmakus():
+    count = 0
+    async for dm in video.iter_danmakus(0, to_seg=0):
+        assert isinstance(dm, Danmaku)
+        count += 1
+    return count
+
+
 async def test_p_Video_get_danmaku_history():
     data = await video.get_danmakus(0, date=datetime.date(2023, 1, 1))
     return data